@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Deterministic generator of large SVG, XML and HTML benchmark documents.
+
+A document is a header, records repeated until the requested size is
+reached, and a footer. Every record has an ``id`` of the form ``r<n>``, so
+benchmarks can address the middle record of any document. The same kind,
+shape, size and seed always produce the same bytes, and documents are
+written in blocks, so even 1 GB files are generated in constant memory.
+
+Shapes:
+    wide:            many small sibling records under the root
+    deep:            records that are chains of DEEP_LEVELS nested elements
+    data-uris:       many records carrying a small base64 data URI
+    large-data-uris: few records carrying a data URI of up to
+                     LARGE_PAYLOAD_LIMIT bytes
+
+Usage:
+    python benchmarks/corpus.py svg wide 10MB out.svg
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import re
+import sys
+from typing import Any, Callable, Dict, Tuple
+
+KINDS = ('svg', 'xml', 'html')
+SHAPES = ('wide', 'deep', 'data-uris', 'large-data-uris')
+EXTENSIONS = {'svg': '.svg', 'xml': '.xml', 'html': '.html'}
+
+DEFAULT_SEED = 1
+
+# Nesting per record of the deep shape; libxml2 refuses more than 256 levels
+DEEP_LEVELS = 200
+# Decoded bytes of each data URI in the data-uris shape
+SMALL_PAYLOAD_SIZE = 2 * 1024
+# Largest decoded data URI; libxml2 rejects attribute values over 10 MB
+LARGE_PAYLOAD_LIMIT = 6 * 1024 * 1024
+# Bytes buffered before a write
+WRITE_BLOCK_SIZE = 1024 * 1024
+
+_UNITS = {'': 1, 'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+HEADERS = {
+    'svg': ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<svg xmlns="http://www.w3.org/2000/svg" '
+            'xmlns:xlink="http://www.w3.org/1999/xlink" width="1000" height="1000">\n'),
+    'xml': '<?xml version="1.0" encoding="UTF-8"?>\n<catalog version="1">\n',
+    'html': ('<!DOCTYPE html>\n<html xmlns="http://www.w3.org/1999/xhtml">\n'
+             '<head><title>xsl benchmark</title></head>\n<body>\n'),
+}
+FOOTERS = {'svg': '</svg>\n', 'xml': '</catalog>\n', 'html': '</body>\n</html>\n'}
+
+# Element nested by the deep shape
+CONTAINERS = {'svg': 'g', 'xml': 'section', 'html': 'div'}
+
+
+def parse_size(text: str) -> int:
+    """Parse a size such as ``512``, ``1KB``, ``10MB`` or ``1GB`` (binary units).
+
+    Raises:
+        ValueError: If the size is not understood
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*', text.upper())
+    if not match:
+        raise ValueError(f"Invalid size: {text}")
+    return int(float(match.group(1)) * _UNITS[match.group(2)])
+
+
+def format_size(size: int) -> str:
+    """Format a byte count with the largest unit dividing it, e.g. ``10MB``."""
+    for unit in ('GB', 'MB', 'KB'):
+        if size >= _UNITS[unit] and size % _UNITS[unit] == 0:
+            return f"{size // _UNITS[unit]}{unit}"
+    return f"{size}B"
+
+
+def _record_writer(kind: str, shape: str, size: int,
+                   rng: random.Random) -> Callable[[int], str]:
+    """Build the function rendering record ``n`` of a document."""
+    words = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(3, 10)))
+             for _ in range(256)]
+    colors = [f"#{rng.getrandbits(24):06x}" for _ in range(64)]
+
+    if shape in ('data-uris', 'large-data-uris'):
+        if shape == 'data-uris':
+            payload_size = SMALL_PAYLOAD_SIZE
+        else:
+            payload_size = max(SMALL_PAYLOAD_SIZE, min(size // 4, LARGE_PAYLOAD_LIMIT))
+        payloads = [base64.b64encode(rng.getrandbits(8 * payload_size).to_bytes(payload_size, 'little')).decode('ascii')
+                    for _ in range(2)]
+
+        def data_record(n):
+            uri = f"data:image/png;base64,{payloads[n % 2]}"
+            if kind == 'svg':
+                return f'<image id="r{n}" width="64" height="64" xlink:href="{uri}"/>\n'
+            if kind == 'xml':
+                return f'<attachment id="r{n}" name="{words[n % 256]}.png" href="{uri}"/>\n'
+            return f'<img id="r{n}" alt="{words[n % 256]}" src="{uri}"/>\n'
+        return data_record
+
+    if shape == 'deep':
+        tag = CONTAINERS[kind]
+        opening = f"<{tag}>" * (DEEP_LEVELS - 1)
+        closing = f"</{tag}>" * DEEP_LEVELS
+
+        def deep_record(n):
+            return f'<{tag} id="r{n}">{opening}{words[n % 256]}{closing}\n'
+        return deep_record
+
+    def wide_record(n):
+        word = words[n % 256]
+        if kind == 'svg':
+            return (f'<g id="r{n}" class="layer"><rect x="{n % 1000}" y="{n // 1000 % 1000}" '
+                    f'width="10" height="10" fill="{colors[n % 64]}"/>'
+                    f'<text x="{n % 1000}" y="{n // 1000 % 1000}">{word}</text></g>\n')
+        if kind == 'xml':
+            return (f'<record id="r{n}"><name>{word}</name><value>{n * 7 % 10007}</value>'
+                    f'<tags><tag>{words[n * 3 % 256]}</tag><tag>{words[n * 5 % 256]}</tag></tags></record>\n')
+        return (f'<div id="r{n}" class="item"><h2>{word}</h2>'
+                f'<p>{words[n * 3 % 256]} {words[n * 5 % 256]} {words[n * 11 % 256]}</p></div>\n')
+    return wide_record
+
+
+def generate(path: str, kind: str, shape: str, size: int,
+             seed: int = DEFAULT_SEED) -> Dict[str, Any]:
+    """Write a benchmark document.
+
+    Records are appended until the document reaches ``size`` bytes, so the
+    file is at least that large (and at least one record long).
+
+    Args:
+        path: Output file
+        kind: One of KINDS
+        shape: One of SHAPES
+        size: Target size in bytes
+        seed: Seed of the pseudo-random content
+
+    Returns:
+        dict: 'kind', 'shape', 'size', 'seed', the file's 'bytes' and the
+            number of 'records' (ids r0 .. r<records - 1>)
+
+    Raises:
+        ValueError: If the kind or shape is unknown
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind: {kind}")
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown shape: {shape}")
+
+    record = _record_writer(kind, shape, size, random.Random(f"{seed}:{kind}:{shape}"))
+    header = HEADERS[kind].encode('utf-8')
+    footer = FOOTERS[kind].encode('utf-8')
+    written = len(header)
+    records = 0
+    with open(path, 'wb') as f:
+        f.write(header)
+        block = []
+        block_size = 0
+        while records == 0 or written + block_size + len(footer) < size:
+            data = record(records).encode('utf-8')
+            block.append(data)
+            block_size += len(data)
+            records += 1
+            if block_size >= WRITE_BLOCK_SIZE:
+                f.write(b''.join(block))
+                written += block_size
+                block, block_size = [], 0
+        f.write(b''.join(block))
+        written += block_size
+        f.write(footer)
+        written += len(footer)
+
+    return {'kind': kind, 'shape': shape, 'size': size, 'seed': seed,
+            'bytes': written, 'records': records}
+
+
+def ensure(directory: str, kind: str, shape: str, size: int,
+           seed: int = DEFAULT_SEED) -> Tuple[str, Dict[str, Any]]:
+    """Get a benchmark document from a corpus directory, generating it if missing.
+
+    Each document is stored with a ``.json`` file holding generate()'s
+    result, which is written last, so a partial document is regenerated.
+
+    Returns:
+        tuple: (document path, generate() result)
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = f"{kind}-{shape}-{format_size(size)}-s{seed}{EXTENSIONS[kind]}"
+    path = os.path.join(directory, name)
+    meta_path = path + '.json'
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if os.path.getsize(path) == meta['bytes']:
+            return path, meta
+    except (OSError, ValueError, KeyError):
+        pass
+    meta = generate(path, kind, shape, size, seed)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    return path, meta
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate an xsl benchmark document")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("shape", choices=SHAPES)
+    parser.add_argument("size", type=parse_size, help="Target size, e.g. 1KB, 10MB, 1GB")
+    parser.add_argument("output", help="Output file")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(generate(args.output, args.kind, args.shape, args.size, args.seed)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for FileEditor on generated documents.
+
+For every combination of kind (svg, xml, html), shape (wide, deep,
+data-uris, large-data-uris) and size, a document is generated once into a
+corpus directory (see benchmarks/corpus.py) and these operations are timed:
+
+    load                   FileEditor(path)
+    query                  query() of the middle record by id (id index)
+    query_xpath            query() of the middle record by a predicate the
+                           id index cannot answer (full XPath evaluation)
+    set_element_attribute  on the middle record
+    list_elements          of every element with an id
+    extract_data_uri       of the middle record (data URI shapes only)
+    save                   to a scratch file
+
+Results are written as JSON and can be compared with a stored baseline;
+an operation whose median is slower than the baseline by more than the
+tolerance counts as a regression and makes the run exit with status 1.
+
+Usage:
+    python benchmarks/run.py --sizes 1KB 1MB --json results.json
+    python benchmarks/run.py --save-baseline benchmarks/baseline.json
+    python benchmarks/run.py --baseline benchmarks/baseline.json
+    python benchmarks/run.py --kinds svg --shapes wide --sizes 1GB --repeat 1
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import KINDS, SHAPES, ensure, format_size, parse_size  # noqa: E402
+from xsl import __version__  # noqa: E402
+from xsl.editor import FileEditor, LXML_AVAILABLE  # noqa: E402
+
+DEFAULT_SIZES = ('1KB', '100KB', '1MB')
+DEFAULT_REPEAT = 3
+# Allowed slowdown over the baseline before a result is a regression
+DEFAULT_TOLERANCE = 0.25
+# Differences below this many seconds are noise, whatever the ratio
+NOISE_FLOOR = 0.001
+
+OPERATIONS = ('load', 'query', 'query_xpath', 'set_element_attribute', 'list_elements',
+              'extract_data_uri', 'save')
+DATA_URI_SHAPES = ('data-uris', 'large-data-uris')
+
+
+def default_corpus_dir() -> str:
+    """Get the directory generated documents are kept in between runs."""
+    return os.path.join(tempfile.gettempdir(), 'xsl-bench-corpus')
+
+
+def _timed(function: Callable[[], Any]) -> float:
+    """Call a function and return the elapsed seconds."""
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def run_case(path: str, meta: Dict[str, Any], repeat: int) -> Dict[str, List[float]]:
+    """Time the operations on one document.
+
+    Every repeat loads a fresh editor, so each operation runs on a newly
+    parsed tree, as it would in a CLI invocation.
+
+    Args:
+        path: Document path
+        meta: corpus.generate() result for the document
+        repeat: Number of runs of each operation
+
+    Returns:
+        dict: Seconds per run, by operation
+    """
+    target = f"//*[@id='r{meta['records'] // 2}']"
+    xpath_target = f"//*[substring(@id, 2) = '{meta['records'] // 2}']"
+    scratch = f"{path}.out"
+    timings: Dict[str, List[float]] = {}
+
+    def record(operation, function):
+        timings.setdefault(operation, []).append(_timed(function))
+
+    try:
+        for run in range(repeat):
+            editors = []
+            record('load', lambda: editors.append(FileEditor(path)))
+            editor = editors[0]
+            record('query', lambda: editor.query(target))
+            record('query_xpath', lambda: editor.query(xpath_target))
+            record('set_element_attribute',
+                   lambda: editor.set_element_attribute(target, 'data-bench', str(run)))
+            record('list_elements', lambda: editor.list_elements('//*[@id]'))
+            if meta['shape'] in DATA_URI_SHAPES:
+                record('extract_data_uri', lambda: editor.extract_data_uri(target))
+            record('save', lambda: editor.save(scratch))
+    finally:
+        if os.path.exists(scratch):
+            os.unlink(scratch)
+    return timings
+
+
+def run_suite(kinds=KINDS, shapes=SHAPES, sizes=DEFAULT_SIZES, repeat: int = DEFAULT_REPEAT,
+              corpus_dir: Optional[str] = None,
+              progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """Run the benchmarks for every kind, shape and size.
+
+    Args:
+        kinds: Document kinds
+        shapes: Document shapes
+        sizes: Document sizes, in bytes or as strings like '10MB'
+        repeat: Runs of each operation
+        corpus_dir: Where generated documents are kept (default:
+            default_corpus_dir())
+        progress: Called with each case name before it runs
+
+    Returns:
+        dict: 'meta' about the environment and a list of 'results', one
+            per case and operation, with 'median_s', 'min_s' and 'runs', or
+            'error' if the case failed
+    """
+    corpus_dir = corpus_dir or default_corpus_dir()
+    results = []
+    for size in sizes:
+        size = parse_size(size) if isinstance(size, str) else size
+        for kind in kinds:
+            for shape in shapes:
+                case = f"{kind}-{shape}-{format_size(size)}"
+                if progress:
+                    progress(case)
+                base = {'case': case, 'kind': kind, 'shape': shape, 'size': size}
+                try:
+                    path, meta = ensure(corpus_dir, kind, shape, size)
+                    base.update(bytes=meta['bytes'], records=meta['records'])
+                    timings = run_case(path, meta, repeat)
+                except Exception as e:
+                    results.append(dict(base, operation=None, error=str(e)))
+                    continue
+                for operation in OPERATIONS:
+                    if operation in timings:
+                        runs = timings[operation]
+                        results.append(dict(base, operation=operation,
+                                            median_s=statistics.median(runs),
+                                            min_s=min(runs), runs=len(runs)))
+    return {'meta': environment(repeat), 'results': results}
+
+
+def environment(repeat: int) -> Dict[str, Any]:
+    """Describe the machine and versions a run was made with."""
+    lxml_version = None
+    if LXML_AVAILABLE:
+        from lxml import etree
+        lxml_version = '.'.join(str(part) for part in etree.LXML_VERSION)
+    return {
+        'xsl': __version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'lxml': lxml_version,
+        'repeat': repeat,
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[Dict[str, Any]]:
+    """Compare a run with a baseline run.
+
+    Args:
+        results: run_suite() result
+        baseline: run_suite() result to compare with
+        tolerance: Allowed relative slowdown, e.g. 0.25 for 25%
+
+    Returns:
+        list: For each timed result, 'case', 'operation', 'median_s',
+            'baseline_s', 'ratio' and 'status': 'regression', 'improvement',
+            'ok' or 'new' (not in the baseline)
+    """
+    previous = {(r['case'], r['operation']): r['median_s']
+                for r in baseline.get('results', []) if 'median_s' in r}
+    rows = []
+    for result in results['results']:
+        if 'median_s' not in result:
+            continue
+        row = {'case': result['case'], 'operation': result['operation'],
+               'median_s': result['median_s']}
+        baseline_s = previous.get((result['case'], result['operation']))
+        if baseline_s is None:
+            row.update(baseline_s=None, ratio=None, status='new')
+        else:
+            delta = result['median_s'] - baseline_s
+            ratio = result['median_s'] / baseline_s if baseline_s else float('inf')
+            if delta > NOISE_FLOOR and ratio > 1 + tolerance:
+                status = 'regression'
+            elif -delta > NOISE_FLOOR and ratio < 1 / (1 + tolerance):
+                status = 'improvement'
+            else:
+                status = 'ok'
+            row.update(baseline_s=baseline_s, ratio=round(ratio, 3), status=status)
+        rows.append(row)
+    return rows
+
+
+def _format_seconds(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return '-'
+    if seconds < 1:
+        return f"{seconds * 1000:.2f} ms"
+    return f"{seconds:.2f} s"
+
+
+def print_table(results: Dict[str, Any], comparison: Optional[List[Dict[str, Any]]] = None,
+                out=sys.stdout):
+    """Print results, and their comparison with a baseline, as a table."""
+    status = {(row['case'], row['operation']): row for row in comparison or []}
+    for result in results['results']:
+        if 'error' in result:
+            print(f"{result['case']:<32} ERROR {result['error']}", file=out)
+            continue
+        line = f"{result['case']:<32} {result['operation']:<22} {_format_seconds(result['median_s']):>10}"
+        row = status.get((result['case'], result['operation']))
+        if row is not None and row['ratio'] is not None:
+            line += f"  x{row['ratio']:<6} {row['status']}"
+        elif row is not None:
+            line += f"  {row['status']}"
+        print(line, file=out)
+
+
+def _write_json(data: Any, path: str):
+    text = json.dumps(data, indent=2) + '\n'
+    if path == '-':
+        sys.stdout.write(text)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark FileEditor on generated documents")
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=list(KINDS))
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=list(SHAPES))
+    parser.add_argument("--sizes", nargs="+", default=list(DEFAULT_SIZES),
+                        help=f"Document sizes from 1KB to 1GB (default: {' '.join(DEFAULT_SIZES)})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="Runs of each operation; the median is reported")
+    parser.add_argument("--corpus-dir", default=default_corpus_dir(),
+                        help="Directory generated documents are kept in")
+    parser.add_argument("--json", metavar="PATH", help="Write results as JSON ('-' for stdout)")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare with a stored result file")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Store the results as a baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Allowed slowdown over the baseline (default: {DEFAULT_TOLERANCE})")
+    args = parser.parse_args(argv)
+
+    for size in args.sizes:
+        parse_size(size)
+    out = sys.stderr if args.json == '-' else sys.stdout
+    results = run_suite(args.kinds, args.shapes, args.sizes, args.repeat, args.corpus_dir,
+                        progress=lambda case: print(f"... {case}", file=sys.stderr, flush=True))
+
+    comparison = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            comparison = compare(results, json.load(f), args.tolerance)
+        results['comparison'] = comparison
+
+    print_table(results, comparison, out)
+    if args.json:
+        _write_json(results, args.json)
+    if args.save_baseline:
+        _write_json({'meta': results['meta'], 'results': results['results']}, args.save_baseline)
+
+    regressions = [row for row in comparison or [] if row['status'] == 'regression']
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.tolerance:.0%} against {args.baseline}",
+              file=out)
+        return 1
+    return 1 if any('error' in result for result in results['results']) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
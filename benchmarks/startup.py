@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the xsl command.
+
+Runs ``python -m xsl --help`` (or another command line) repeatedly and
+reports the median time on top of a bare ``python -c pass``, so the number
+is what xsl itself costs regardless of how slow the interpreter starts on
+this machine. Exits with status 1 if the median exceeds the target.
+
+Usage:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --target-ms 50 --runs 20 -- --version
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+# Budget for `xsl --help` on top of interpreter startup
+DEFAULT_TARGET_MS = 50.0
+DEFAULT_RUNS = 15
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_command(command: List[str], runs: int) -> List[float]:
+    """Run a command repeatedly after one warm-up run.
+
+    The warm-up writes the bytecode cache, so compile time is not counted.
+
+    Args:
+        command: Command line
+        runs: Number of timed runs
+
+    Returns:
+        list: Wall-clock milliseconds per run
+    """
+    env = dict(os.environ, XSL_NO_DAEMON='1', PYTHONPATH=ROOT)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def measure(xsl_args: List[str], runs: int = DEFAULT_RUNS) -> Dict[str, float]:
+    """Measure how long an xsl command line takes to start.
+
+    Args:
+        xsl_args: Arguments after ``xsl``
+        runs: Number of timed runs
+
+    Returns:
+        dict: Median 'interpreter_ms', 'xsl_ms' and their difference 'overhead_ms'
+    """
+    interpreter = statistics.median(time_command([sys.executable, '-c', 'pass'], runs))
+    xsl = statistics.median(time_command([sys.executable, '-m', 'xsl'] + xsl_args, runs))
+    return {
+        'interpreter_ms': round(interpreter, 2),
+        'xsl_ms': round(xsl, 2),
+        'overhead_ms': round(xsl - interpreter, 2),
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure xsl startup time")
+    parser.add_argument("--target-ms", type=float, default=DEFAULT_TARGET_MS,
+                        help=f"Largest acceptable overhead (default: {DEFAULT_TARGET_MS:g})")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Timed runs")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    parser.add_argument("xsl_args", nargs="*", default=["--help"],
+                        help="xsl command line to time (default: --help)")
+    args = parser.parse_args(argv)
+
+    result = measure(args.xsl_args, args.runs)
+    result['command'] = ' '.join(['xsl'] + args.xsl_args)
+    result['target_ms'] = args.target_ms
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"{result['command']}: {result['overhead_ms']:.1f} ms on top of "
+              f"{result['interpreter_ms']:.1f} ms interpreter startup "
+              f"(target {args.target_ms:g} ms)")
+    return 0 if result['overhead_ms'] <= args.target_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Tests for processing many files on a process pool.
+"""
+
+import multiprocessing
+import os
+
+import pytest
+
+from xsl import batch
+from xsl.batch import expand_globs, process_files
+from xsl.cli import CLI
+from xsl.editor import FileEditor
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Twenty SVG files in nested directories plus one broken file."""
+    for i in range(20):
+        directory = tmp_path / "assets" / f"group{i % 3}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"icon{i:02d}.svg").write_text(
+            f'<svg xmlns="http://www.w3.org/2000/svg"><text id="t">icon {i}</text></svg>')
+    (tmp_path / "assets" / "broken.svg").write_text("<svg")
+    (tmp_path / "assets" / "notes.txt").write_text("not matched")
+    return tmp_path
+
+
+def test_expand_globs_recurses(corpus):
+    """Test that ** matches nested directories and only files are returned."""
+    paths = list(expand_globs([str(corpus / "assets" / "**" / "*.svg"),
+                               str(corpus / "assets" / "group0" / "*.svg")]))
+
+    assert len(paths) == 21
+    assert len(set(paths)) == len(paths)
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+@pytest.mark.parametrize("ordered", [True, False])
+def test_process_files_reports_each_file(corpus, ordered):
+    """Test ordered and unordered results with a per-file error."""
+    paths = list(expand_globs([str(corpus / "assets" / "**" / "*.svg")]))
+
+    results = list(process_files(paths, "query", {"xpath": "//svg:text"},
+                                 workers=2, chunk_size=3, ordered=ordered))
+
+    if ordered:
+        assert [result["path"] for result in results] == paths
+    else:
+        assert sorted(result["path"] for result in results) == sorted(paths)
+    errors = [result for result in results if "error" in result]
+    assert [result["path"] for result in errors] == [str(corpus / "assets" / "broken.svg")]
+    values = {result["value"] for result in results if "value" in result}
+    assert values == {f"icon {i}" for i in range(20)}
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="workers must inherit the patch")
+@pytest.mark.parametrize("ordered", [True, False])
+def test_process_files_survives_dead_workers(corpus, monkeypatch, ordered):
+    """Test that a worker dying reports errors for its chunk and the sweep goes on."""
+    process_file = batch.process_file
+
+    def crashing_process_file(path, operation, params):
+        if path.endswith("broken.svg"):
+            os._exit(1)
+        return process_file(path, operation, params)
+
+    monkeypatch.setattr(batch, "process_file", crashing_process_file)
+    paths = list(expand_globs([str(corpus / "assets" / "**" / "*.svg")]))
+
+    results = list(process_files(paths, "query", {"xpath": "//svg:text"},
+                                 workers=2, chunk_size=3, ordered=ordered))
+
+    by_path = {result["path"]: result for result in results}
+    assert len(results) == len(by_path) == len(paths)
+    assert "Worker process died" in by_path[str(corpus / "assets" / "broken.svg")]["error"]
+    assert all("value" in result or "Worker process died" in result["error"] for result in results)
+    if ordered:
+        # Chunks submitted after the first result were sent to a new pool
+        assert by_path[paths[-1]]["value"].startswith("icon ")
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+def test_process_files_extract_reports_decoded_size(tmp_path):
+    """Test that extract reports the payload size in bytes, not its base64 length."""
+    path = tmp_path / "image.svg"
+    path.write_text('<svg xmlns="http://www.w3.org/2000/svg">'
+                    '<image href="data:text/plain;base64,SGVsbG8="/></svg>')
+
+    results = list(process_files([str(path)], "extract", {"xpath": "//svg:image/@href"}, workers=1))
+    missing = list(process_files([str(path)], "extract", {"xpath": "//svg:rect"}, workers=1))
+
+    assert results == [{"path": str(path), "mime_type": "text/plain", "size": 5}]
+    assert "error" in missing[0]
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+def test_batch_set_saves_every_file(corpus, capsys):
+    """Test that batch set edits and saves each matching file."""
+    pattern = str(corpus / "assets" / "group*" / "*.svg")
+
+    CLI().run(["batch", "--glob", pattern, "--workers", "2", "set", "//svg:text", "red", "--attr", "fill"])
+
+    assert "Processed 20 files" in capsys.readouterr().out
+    for path in expand_globs([pattern]):
+        assert FileEditor(path).get_element_attribute("//svg:text", "fill") == "red"
@@ -0,0 +1,55 @@
+"""
+Tests for the benchmark corpus generator and suite.
+"""
+
+import pytest
+
+from benchmarks.corpus import SHAPES, ensure, generate, parse_size
+from benchmarks.run import compare, run_suite
+from xsl.editor import FileEditor
+
+
+def test_parse_size():
+    """Test binary size units."""
+    assert parse_size("512") == 512
+    assert parse_size("1KB") == 1024
+    assert parse_size("10mb") == 10 * 1024 ** 2
+    assert parse_size("1GB") == 1024 ** 3
+    with pytest.raises(ValueError):
+        parse_size("ten")
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+@pytest.mark.parametrize("kind", ["svg", "xml", "html"])
+def test_generated_documents_are_deterministic_and_parse(tmp_path, kind):
+    """Test that every shape is reproducible, reaches its size and loads."""
+    for shape in SHAPES:
+        first, second = tmp_path / f"{shape}-1", tmp_path / f"{shape}-2"
+        meta = generate(str(first), kind, shape, 20 * 1024)
+        generate(str(second), kind, shape, 20 * 1024)
+
+        assert first.read_bytes() == second.read_bytes()
+        assert meta["bytes"] == first.stat().st_size >= 20 * 1024
+        editor = FileEditor(str(first))
+        assert len(editor.query(f"//*[@id='r{meta['records'] - 1}']")) == 1
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+def test_suite_results_compare_with_baseline(tmp_path):
+    """Test a small run and its comparison with a slower and a faster baseline."""
+    results = run_suite(kinds=["svg"], shapes=["wide", "data-uris"], sizes=["2KB"],
+                        repeat=1, corpus_dir=str(tmp_path))
+
+    operations = {(r["case"], r["operation"]) for r in results["results"]}
+    assert ("svg-data-uris-2KB", "extract_data_uri") in operations
+    assert ("svg-wide-2KB", "save") in operations
+    assert ("svg-wide-2KB", "query_xpath") in operations
+    assert ("svg-wide-2KB", "extract_data_uri") not in operations
+    assert ensure(str(tmp_path), "svg", "wide", 2048)[1]["records"] > 0
+
+    slower = {"results": [dict(r, median_s=r["median_s"] + 1) for r in results["results"]]}
+    faster = {"results": [dict(r, median_s=r["median_s"] / 100) for r in results["results"]
+                          if r["operation"] != "save"]}
+    assert {row["status"] for row in compare(results, slower)} == {"improvement"}
+    statuses = {row["operation"]: row["status"] for row in compare(results, faster)}
+    assert statuses["save"] == "new"
@@ -2,3 +2,162 @@
 test_cli.py
 """
 
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+from xsl.cli import CLI
+from xsl.editor import FileEditor
+
+
+@pytest.fixture
+def temp_xml_file():
+    """Create a temporary XML file."""
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.xml', delete=False) as f:
+        f.write('<?xml version="1.0"?><data><item id="a">First</item>'
+                '<item id="b">Second</item></data>')
+        temp_path = f.name
+    yield temp_path
+    os.unlink(temp_path)
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+def test_query_stream(temp_xml_file, capsys):
+    """Test querying a file in streaming mode."""
+    CLI().run(["query", "//item[@id='b']", "--stream", temp_xml_file])
+    assert "Text: Second" in capsys.readouterr().out
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+def test_list_stream(temp_xml_file, capsys):
+    """Test listing elements in streaming mode."""
+    CLI().run(["list", "--xpath", "//item", "--limit", "1", "--stream", temp_xml_file])
+    out = capsys.readouterr().out
+    assert "Found 2 elements" in out
+    assert "/data[1]/item[1]" in out
+    assert "1 more" in out
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+def test_extract_all_to_outdir(tmp_path, capsys):
+    """Test extracting all Data URIs of the loaded file into a directory."""
+    svg_path = tmp_path / "image.svg"
+    svg_path.write_text('<svg xmlns="http://www.w3.org/2000/svg">'
+                        '<image href="data:text/plain;base64,SGVsbG8="/></svg>')
+    cli = CLI()
+    cli.editor = FileEditor(str(svg_path))
+
+    cli.run(["extract", "--all", "--outdir", str(tmp_path / "out")])
+
+    assert "(5 bytes)" in capsys.readouterr().out
+    assert len(list((tmp_path / "out").iterdir())) == 1
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+def test_set_from_file(temp_xml_file, tmp_path, capsys):
+    """Test applying a JSON Lines batch of updates."""
+    ops_path = tmp_path / "ops.jsonl"
+    ops_path.write_text(
+        '{"op": "text", "xpath": "//item[@id=\'a\']", "value": "Changed"}\n'
+        '\n'
+        '{"op": "remove", "xpath": "//item[@id=\'missing\']"}\n'
+    )
+    cli = CLI()
+    cli.editor = FileEditor(temp_xml_file)
+
+    cli.run(["set", "--from-file", str(ops_path)])
+
+    out = capsys.readouterr().out
+    assert "Applied 1 of 2 updates" in out
+    assert "No element matches" in out
+    assert cli.editor.get_element_text("//item[@id='a']") == "Changed"
+
+
+def test_extract_urls(tmp_path, capsys):
+    """Test extracting from a list of documents as NDJSON."""
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"image{i}.svg"
+        path.write_text('<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">'
+                        '<image xlink:href="data:text/plain;base64,SGVsbG8="/></svg>')
+        paths.append(str(path))
+    urls_path = tmp_path / "urls.txt"
+    urls_path.write_text("# documents\n" + "\n".join(paths + [str(tmp_path / "missing.svg")]) + "\n")
+
+    CLI().run(["extract", "//svg:image/@xlink:href", "--urls", str(urls_path), "--workers", "2"])
+
+    results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert sorted(result["url"] for result in results) == sorted(paths + [str(tmp_path / "missing.svg")])
+    assert sum(1 for result in results if result.get("mime_type") == "text/plain") == 3
+    assert sum(1 for result in results if "error" in result) == 1
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+def test_run_script(temp_xml_file, tmp_path, monkeypatch, capsys):
+    """Test running a script of shell commands with one save at the end."""
+    script = tmp_path / "edit.xsl-cmds"
+    script.write_text("# rename both items\n"
+                      "set //item[@id='a'] \"new first\"\n"
+                      "\n"
+                      "setattr //item[@id='b'] label \"it's\"\n"
+                      "query //item[@id='a']\n")
+    saves = []
+    original_save = FileEditor.save
+    monkeypatch.setattr(FileEditor, "save",
+                        lambda self, *args, **kwargs: saves.append(args) or original_save(self, *args, **kwargs))
+
+    CLI().run(["run", str(script), temp_xml_file])
+
+    assert "Result: new first" in capsys.readouterr().out
+    assert len(saves) == 1
+    editor = FileEditor(temp_xml_file)
+    assert editor.get_element_text("//item[@id='a']") == "new first"
+    assert editor.get_element_attribute("//item[@id='b']", "label") == "it's"
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+def test_run_script_from_stdin_stops_at_failure(temp_xml_file, monkeypatch, capsys):
+    """Test that a failed command stops the script without saving."""
+    monkeypatch.setattr("sys.stdin", io.StringIO("set //item[@id='a'] changed\n"
+                                                 "set //missing value\n"
+                                                 "set //item[@id='b'] changed\n"))
+
+    with pytest.raises(SystemExit):
+        CLI().run(["run", "-", temp_xml_file])
+
+    assert "Line 2" in capsys.readouterr().out
+    assert FileEditor(temp_xml_file).get_element_text("//item[@id='a']") == "First"
+
+
+def test_help_does_not_import_editor_stack():
+    """Test that startup stays light: --help loads neither the editor nor lxml/requests."""
+    code = ("import sys\n"
+            "from xsl.cli import main\n"
+            "try:\n"
+            "    main(['--help'])\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "heavy = {'xsl.editor', 'xsl.server', 'lxml.etree', 'requests', 'bs4'}\n"
+            "print(sorted(heavy & set(sys.modules)))\n")
+    env = dict(os.environ, XSL_NO_DAEMON="1")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            env=env, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_package_attributes_load_lazily():
+    """Test that the package's public names still resolve."""
+    import xsl
+
+    assert xsl.FileEditor is FileEditor
+    assert xsl.CLI is CLI
+    assert "FileEditorServer" in dir(xsl)
+    with pytest.raises(AttributeError):
+        xsl.missing
@@ -0,0 +1,95 @@
+"""
+Tests for the resident CLI daemon.
+"""
+
+import socket
+import threading
+
+import pytest
+
+from xsl import daemon
+from xsl.cli import main
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix sockets not available")
+
+
+@pytest.fixture
+def running_daemon(tmp_path, monkeypatch):
+    """Serve a daemon from a background thread on a temporary socket."""
+    path = str(tmp_path / "daemon.sock")
+    monkeypatch.setenv("XSL_SOCKET", path)
+    monkeypatch.delenv("XSL_NO_DAEMON", raising=False)
+    server = daemon.CLIDaemon(path, idle_timeout=10)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    assert daemon.start(path)
+    yield server
+    daemon.request({"control": "stop"}, path)
+    thread.join(5)
+
+
+def test_commands_run_against_the_resident_document(running_daemon, tmp_path, capsys):
+    """Test that load, query, set and save share one parsed document."""
+    path = tmp_path / "doc.xml"
+    path.write_text("<data>\n  <item id='a'>First</item>\n</data>\n")
+
+    assert main(["load", str(path)]) == 0
+    assert main(["query", "//item[@id='a']"]) == 0
+    assert main(["set", "//item[@id='a']", "Changed"]) == 0
+    assert main(["save"]) == 0
+
+    out = capsys.readouterr().out
+    assert "Loaded local file" in out
+    assert "Text: First" in out
+    assert path.read_text() == "<data>\n  <item id='a'>Changed</item>\n</data>\n"
+    assert running_daemon.info()["file"] == str(path)
+
+
+def test_failures_report_their_status(running_daemon, capsys):
+    """Test that the exit status of a command run by the daemon is returned."""
+    assert main(["query", "//item"]) == 1
+    assert "No file loaded" in capsys.readouterr().out
+
+
+def test_without_daemon_commands_run_in_process(tmp_path, monkeypatch, capsys):
+    """Test the fallback when no daemon is listening."""
+    monkeypatch.setenv("XSL_SOCKET", str(tmp_path / "none.sock"))
+    path = tmp_path / "doc.xml"
+    path.write_text("<data><item>First</item></data>")
+
+    assert daemon.forward(["query", "//item"]) is None
+    monkeypatch.setenv("XSL_NO_DAEMON", "1")
+    assert not daemon.should_forward(["load", str(path)])
+
+
+@pytest.mark.parametrize("argv", [
+    ["query", "--stream", "big.xml", "//item"],
+    ["query", "--stream=big.xml", "//item"],
+    ["query", "--str=big.xml", "//item"],
+    ["extract", "//image/@href", "--urls=list.txt"],
+])
+def test_streaming_and_url_commands_run_locally(argv, monkeypatch):
+    """Test that commands not using the loaded document are never forwarded."""
+    monkeypatch.delenv("XSL_NO_DAEMON", raising=False)
+    assert daemon.should_forward(["query", "//item"])
+    assert not daemon.should_forward(argv)
+
+
+def test_sockets_in_shared_directories_are_not_used(tmp_path, monkeypatch, capsys):
+    """Test that a socket another user could have planted receives nothing."""
+    directory = tmp_path / "shared"
+    directory.mkdir()
+    directory.chmod(0o755)
+    path = str(directory / "daemon.sock")
+    monkeypatch.setenv("XSL_SOCKET", path)
+    monkeypatch.delenv("XSL_NO_DAEMON", raising=False)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as planted:
+        planted.bind(path)
+        planted.listen()
+        planted.settimeout(0.2)
+
+        assert daemon.request({"argv": ["query", "//item"], "cwd": str(tmp_path)}) is None
+        assert not daemon.start(path)
+        with pytest.raises(socket.timeout):
+            planted.accept()
+    assert "not private" in capsys.readouterr().err
@@ -2,15 +2,19 @@
 Tests for FileEditor class.
 """
 
+import base64
+import io
 import os
 import tempfile
+import threading
 from pathlib import Path
 
 import pytest
 
 # Import the module under test
-from xsl.editor import FileEditor
-from xsl.utils import is_data_uri, parse_data_uri
+from xsl.blobstore import BlobStore
+from xsl.editor import FileEditor, StreamingEditor
+from xsl.utils import decode_data_uri, is_data_uri, parse_data_uri, parse_data_uri_header
 
 
 class TestFileEditor:
@@ -83,6 +87,63 @@ class TestFileEditor:
         assert editor.original_content is not None
         assert '<svg' in editor.original_content
 
+    def test_original_content_is_decoded_lazily(self, temp_svg_file):
+        """Test that the source is only decoded when original_content is read."""
+        editor = FileEditor(temp_svg_file)
+        assert editor._decoded_content is None
+        assert '<svg' in editor.original_content
+        assert editor._decoded_content is not None
+
+    def test_load_without_keeping_content(self, temp_svg_file):
+        """Test that keep_content=False drops the raw bytes after parsing."""
+        editor = FileEditor(temp_svg_file, keep_content=False)
+        assert editor.original_content is None
+        assert editor.file_type == 'svg'
+        assert editor.content_size == os.path.getsize(temp_svg_file)
+        assert editor.estimated_size() < FileEditor(temp_svg_file).estimated_size()
+
+    @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+    def test_load_from_memory_map(self, temp_svg_file, monkeypatch):
+        """Test that large local files are parsed in chunks from a memory map."""
+        import xsl.editor
+        monkeypatch.setattr(xsl.editor, 'MMAP_THRESHOLD', 1)
+        monkeypatch.setattr(xsl.editor, 'MMAP_CHUNK_SIZE', 64)
+        calls = []
+        original_load_mmap = FileEditor._load_mmap
+        monkeypatch.setattr(
+            FileEditor, '_load_mmap',
+            lambda editor: calls.append(editor) or original_load_mmap(editor)
+        )
+
+        editor = FileEditor(temp_svg_file, keep_content=False)
+        assert len(calls) == 1
+        assert editor.get_element_text("//svg:text[@id='text1']") == "Hello World"
+        assert editor.content_size == os.path.getsize(temp_svg_file)
+
+        # Callers keeping the content still get a single plain read
+        FileEditor(temp_svg_file)
+        assert len(calls) == 1
+
+    @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+    def test_load_from_memory_map_falls_back_to_standard_library(self, tmp_path, monkeypatch):
+        """Test that a memory-mapped file lxml refuses is parsed like a read file."""
+        import xsl.editor
+        monkeypatch.setattr(xsl.editor, 'MMAP_THRESHOLD', 1)
+        path = tmp_path / "huge.xml"
+        # Over libxml2's 10 MB limit for a single attribute value
+        path.write_text('<root><item data="' + 'x' * (11 * 1024 * 1024) + '">ok</item></root>')
+
+        editor = FileEditor(str(path), keep_content=False)
+
+        assert editor.tree.find("item").text == "ok"
+        assert type(editor.tree) is type(FileEditor(str(path)).tree)
+        assert editor.content_size == path.stat().st_size
+
+        with open(path, 'w') as f:
+            f.write('<root><item>')
+        with pytest.raises(ValueError, match="Cannot parse file"):
+            FileEditor(str(path), keep_content=False)
+
     def test_detect_file_types(self, temp_svg_file, temp_xml_file):
         """Test file type detection."""
         svg_editor = FileEditor(temp_svg_file)
@@ -147,6 +208,19 @@ class TestFileEditor:
             assert all('tag' in elem for elem in elements)
             assert all('attributes' in elem for elem in elements)
 
+    @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+    def test_list_elements_paths_match_getpath(self, tmp_path):
+        """Test that the one-pass paths equal lxml's getpath() for mixed namespaces."""
+        path = tmp_path / "mixed.svg"
+        path.write_text('<svg xmlns="http://www.w3.org/2000/svg" xmlns:x="urn:x">'
+                        '<g/><!-- c --><g><x:r/><r xmlns=""/><x:r/><r xmlns=""/></g>'
+                        + '<x:q/>' * 50 + '</svg>')
+        editor = FileEditor(str(path))
+
+        elements = editor.list_elements("//*")
+        tree = editor.tree.getroottree()
+        assert [elem['path'] for elem in elements] == [tree.getpath(e) for e in editor.tree.iter() if isinstance(e.tag, str)]
+
     def test_save_file(self, temp_svg_file):
         """Test saving file."""
         editor = FileEditor(temp_svg_file)
@@ -185,6 +259,308 @@ class TestFileEditor:
         # Clean up
         os.unlink(backup_path)
 
+    @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+    def test_xpath_cache_reuses_compiled_expressions(self, temp_svg_file):
+        """Test that repeated XPath queries hit the compiled expression cache."""
+        editor = FileEditor(temp_svg_file)
+        xpath = "//svg:rect[@width='50']"
+
+        editor.query(xpath)
+        before = FileEditor.xpath_cache_info()
+        for _ in range(3):
+            assert editor.get_element_attribute(xpath, "fill") == "red"
+        after = FileEditor.xpath_cache_info()
+
+        assert after['hits'] - before['hits'] == 3
+        assert after['misses'] == before['misses']
+        assert after['currsize'] <= after['maxsize']
+
+    def test_open_cached_shares_unchanged_documents(self, tmp_path):
+        """Test cache hits, reloads on change, copy-on-write and read-only views."""
+        from xsl.editor import DOCUMENT_CACHE
+
+        path = tmp_path / "doc.xml"
+        path.write_text("<root><item id='a'>one</item></root>")
+        DOCUMENT_CACHE.clear()
+
+        first = FileEditor.open_cached(str(path))
+        second = FileEditor.open_cached(str(path), read_only=True)
+        assert second.tree is first.tree
+        assert FileEditor.document_cache_info()['hits'] == 1
+
+        first.set_element_text("//item", "changed")
+        assert first.tree is not second.tree
+        assert second.get_element_text("//item") == "one"
+        assert FileEditor.open_cached(str(path)).get_element_text("//item") == "one"
+        with pytest.raises(ValueError):
+            second.set_element_text("//item", "changed")
+
+        first.save()
+        assert FileEditor.open_cached(str(path)).get_element_text("//item") == "changed"
+        info = FileEditor.document_cache_info()
+        assert (info['hits'], info['misses'], info['currsize']) == (2, 2, 1)
+
+        other = tmp_path / "other.xml"
+        other.write_text("<root/>")
+        maxsize, DOCUMENT_CACHE.maxsize = DOCUMENT_CACHE.maxsize, 1
+        try:
+            FileEditor.open_cached(str(other))
+        finally:
+            DOCUMENT_CACHE.maxsize = maxsize
+        assert FileEditor.document_cache_info()['evictions'] == 1
+        DOCUMENT_CACHE.clear()
+
+    @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+    def test_id_lookups_use_index(self, temp_svg_file):
+        """Test that @id XPaths are answered from the id index and match XPath."""
+        editor = FileEditor(temp_svg_file)
+        before = FileEditor.xpath_cache_info()
+
+        assert editor.query("//svg:*[@id='circle1']")[0].get("r") == "30"
+        assert len(editor.query('//svg:rect[@id="square1"]')) == 1
+        assert editor.query("//svg:circle[@id='square1']") == []
+        assert editor.query("//rect[@id='square1']") == []  # no namespace
+        assert editor.query("//*[@id='missing']") == []
+        assert FileEditor.xpath_cache_info()['misses'] == before['misses']
+
+    @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+    def test_id_index_follows_edits(self, temp_svg_file):
+        """Test that attribute changes, additions and removals update the id index."""
+        editor = FileEditor(temp_svg_file)
+        assert editor.query("//svg:*[@id='square1']")
+
+        assert editor.set_element_attribute("//svg:*[@id='square1']", "id", "box")
+        assert editor.query("//svg:*[@id='square1']") == []
+        assert editor.get_element_attribute("//svg:*[@id='box']", "fill") == "red"
+
+        assert editor.add_element("/svg:svg", "rect", attributes={"id": "new", "x": "1"})
+        assert editor.get_element_attribute("//svg:rect[@id='new']", "x") == "1"
+
+        assert editor.remove_element("//svg:*[@id='box']")
+        assert editor.query("//svg:*[@id='box']") == []
+        assert len(editor.query("//svg:rect")) == 1
+        assert editor.modified
+
+    @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+    def test_query_many(self, temp_xml_file):
+        """Test that query_many matches the single-lookup methods."""
+        editor = FileEditor(temp_xml_file)
+        specs = {
+            'title': "//title",
+            'admin': {'xpath': "//record[@type='admin']/name"},
+            'second': {'xpath': "/data/records/record[2]", 'attribute': 'type'},
+            'names': {'xpath': "//record/name", 'all': True},
+            'ids': {'xpath': "//record", 'attribute': 'id', 'all': True},
+            'by_id': {'xpath': "//record[@id='1']", 'attribute': 'type'},
+            'missing': {'xpath': "//nothing", 'default': 'n/a'},
+            'count': "count(//record)",
+            'email': "//record[last()]/email",
+        }
+        before = FileEditor.xpath_cache_info()
+
+        results = editor.query_many(specs)
+        # Only the two expressions outside the restricted syntax were compiled
+        assert FileEditor.xpath_cache_info()['misses'] - before['misses'] <= 2
+
+        assert results == {
+            'title': editor.get_element_text("//title"),
+            'admin': "Jane Smith",
+            'second': editor.get_element_attribute("/data/records/record[2]", "type"),
+            'names': ["John Doe", "Jane Smith"],
+            'ids': ["1", "2"],
+            'by_id': "user",
+            'missing': "n/a",
+            'count': 2.0,
+            'email': "jane@example.com",
+        }
+
+    @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+    def test_apply_updates(self, temp_xml_file):
+        """Test applying a batch of edits with per-op results."""
+        editor = FileEditor(temp_xml_file)
+        ops = [
+            {'op': 'remove', 'xpath': "//record[@id='2']"},
+            {'op': 'text', 'xpath': "//record/name", 'value': "Anonymous"},
+            {'op': 'attribute', 'xpath': "//record[@id='1']", 'attribute': 'id', 'value': 3},
+            {'op': 'add', 'xpath': "//records", 'tag': 'record', 'attributes': {'id': '9'}},
+            {'op': 'text', 'xpath': "//record[@id='2']/age", 'value': "0"},
+            {'op': 'text', 'xpath': "//nothing", 'value': "x"},
+            {'op': 'rename', 'xpath': "//title"},
+            {'op': 'attribute', 'xpath': "//title", 'value': "x"},
+        ]
+
+        results = editor.apply_updates(ops)
+
+        assert [r['success'] for r in results] == [True, True, True, True, False, False, False, False]
+        assert results[1]['count'] == 2
+        assert "removed" in results[4]['error']
+        assert "No element" in results[5]['error']
+        assert "Unknown op" in results[6]['error']
+        assert "attribute" in results[7]['error']
+        assert editor.query_many({
+            'names': {'xpath': "//record/name", 'all': True},
+            'ids': {'xpath': "//record", 'attribute': 'id', 'all': True},
+        }) == {'names': ["Anonymous"], 'ids': ["3", "9"]}
+        assert editor.get_element_attribute("//*[@id='3']", "type") == "user"
+        assert editor.modified
+
+    def test_save_is_atomic_and_backups_are_snapshots(self, tmp_path):
+        """Test that saving replaces the file and leaves the backup intact."""
+        path = tmp_path / "doc.xml"
+        path.write_text("<root><item id='a'>old</item></root>")
+        path.chmod(0o640)
+        editor = FileEditor(str(path))
+        editor.set_element_text("//item", "new")
+
+        editor.save(create_backup=True)
+
+        backup = tmp_path / "doc.xml.bak"
+        assert "old" in backup.read_text()
+        assert "new" in path.read_text()
+        assert path.stat().st_mode & 0o777 == 0o640
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["doc.xml", "doc.xml.bak"]
+
+    def test_failed_save_leaves_file_untouched(self, tmp_path):
+        """Test that an error while writing keeps the previous content."""
+        path = tmp_path / "doc.xml"
+        path.write_text("<root><item>old</item></root>")
+        editor = FileEditor(str(path))
+        editor.tree = None
+
+        with pytest.raises(IOError):
+            editor.save()
+
+        assert path.read_text() == "<root><item>old</item></root>"
+        assert [p.name for p in tmp_path.iterdir()] == ["doc.xml"]
+
+    @pytest.mark.skipif(not hasattr(os, "symlink"), reason="symbolic links not available")
+    def test_save_writes_through_symlinks_with_umask_mode(self, tmp_path):
+        """Test that saving keeps a symbolic link and new files follow the umask."""
+        target = tmp_path / "doc.xml"
+        target.write_text("<root><item>old</item></root>")
+        link = tmp_path / "link.xml"
+        link.symlink_to(target)
+        editor = FileEditor(str(link))
+        editor.set_element_text("//item", "new")
+
+        editor.save()
+        umask = os.umask(0o027)
+        try:
+            editor.save(str(tmp_path / "copy.xml"))
+        finally:
+            os.umask(umask)
+
+        assert link.is_symlink()
+        assert "new" in target.read_text()
+        assert (tmp_path / "copy.xml").stat().st_mode & 0o777 == 0o640
+
+    @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+    def test_iter_bytes_matches_compact_serialization(self, tmp_path):
+        """Test that chunked serialization equals serializing the whole tree."""
+        from lxml import etree
+
+        path = tmp_path / "doc.svg"
+        path.write_text(
+            '<?xml version="1.0"?>\n<!--c-->\n'
+            '<svg xmlns="http://www.w3.org/2000/svg" xmlns:x="urn:x" a="1">hi'
+            + '<g x:b="2">t<rect/>tail</g>\n  <!--in-->' * 50
+            + '<q xmlns="urn:q"/></svg>\n<!--after-->\n'
+        )
+        editor = FileEditor(str(path))
+        buffer = io.BytesIO()
+        etree.ElementTree(editor.tree).write(buffer, encoding='utf-8', xml_declaration=True)
+
+        chunks = list(editor.iter_bytes(chunk_size=256))
+
+        assert len(chunks) > 1
+        assert b''.join(chunks) == buffer.getvalue() == editor.tostring()
+        assert editor.tostring(pretty_print=True).count(b'\n') > buffer.getvalue().count(b'\n')
+
+        editor.set_element_text("//svg:q", "x")
+        editor.save(pretty_print=False)
+        assert path.read_bytes() == editor.tostring()
+
+    def test_save_async(self, tmp_path):
+        """Test saving on the background writer."""
+        path = tmp_path / "doc.xml"
+        path.write_text("<root><item>old</item></root>")
+        editor = FileEditor(str(path))
+        editor.set_element_text("//item", "new")
+        lock = threading.Lock()
+
+        future = editor.save_async(str(tmp_path / "out.xml"), lock=lock)
+
+        assert future.result(timeout=5) == str(tmp_path / "out.xml")
+        assert "new" in (tmp_path / "out.xml").read_text()
+        assert not editor.modified
+        assert not lock.locked()
+
+    @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+    @pytest.mark.parametrize("keep_content", [True, False])
+    def test_save_splices_tracked_edits(self, tmp_path, keep_content):
+        """Test that saving tracked edits leaves untouched markup byte-identical."""
+        from lxml import etree
+
+        source = (
+            "<?xml version='1.0' encoding='UTF-8'?>\n"
+            "<!-- header -->\n"
+            "<svg xmlns='http://www.w3.org/2000/svg'  xmlns:xlink='http://www.w3.org/1999/xlink'>\n"
+            "  <g id='layer1'   class='a'>\n"
+            "    <rect id='r1'/>\n"
+            "    <!-- keep -->\n"
+            "    <text id='t1'>Old</text>\n"
+            "    <circle id='c1' r='3'/>\n"
+            "  </g>\n"
+            "  <g id='layer2'><rect id='r2'/></g>\n"
+            "</svg>\n"
+        )
+        path = tmp_path / "doc.svg"
+        path.write_text(source)
+        editor = FileEditor(str(path), keep_content=keep_content, track_changes=True)
+
+        editor.set_element_attribute("//svg:rect[@id='r1']", "x", 'a"b<')
+        editor.set_element_attribute("//svg:g[@id='layer1']", "{http://www.w3.org/1999/xlink}href", "#x")
+        editor.set_element_text("//svg:text[@id='t1']", "New & <text>")
+        editor.add_element("//svg:rect[@id='r2']", "desc", "D")
+        editor.remove_element("//svg:circle[@id='c1']")
+        output = tmp_path / "out.svg"
+        editor.save(str(output))
+
+        saved = output.read_text()
+        assert saved.startswith("<?xml version='1.0' encoding='UTF-8'?>\n<!-- header -->\n")
+        assert "xmlns:xlink='http://www.w3.org/1999/xlink'>\n" in saved
+        assert "<!-- keep -->" in saved
+        assert '<rect id="r2"><desc>D</desc></rect>' in saved
+        assert "circle" not in saved
+        expected = etree.tostring(editor.tree, method="c14n")
+        assert etree.tostring(etree.parse(str(output)).getroot(), method="c14n") == expected
+
+        # Saving in place twice splices against the freshly written file
+        editor.save()
+        editor.set_element_text("//svg:text[@id='t1']", "Again")
+        editor.save()
+        assert "<text id='t1'>Again</text>" in path.read_text()
+        assert "<!-- keep -->" in path.read_text()
+
+    @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+    def test_save_falls_back_after_direct_tree_edits(self, tmp_path):
+        """Test that untracked tree edits are saved by full serialization."""
+        path = tmp_path / "doc.xml"
+        path.write_text("<root>\n  <item id='a'>x</item>\n</root>\n")
+        editor = FileEditor(str(path), track_changes=True)
+
+        editor.tree[0].text = "direct"
+        editor.mark_tree_edited()
+        editor.save()
+
+        assert '<item id="a">direct</item>' in path.read_text()
+
+    def test_query_many_rejects_invalid_specs(self, temp_xml_file):
+        """Test that a spec without an XPath is rejected."""
+        editor = FileEditor(temp_xml_file)
+        with pytest.raises(ValueError):
+            editor.query_many({'bad': {'attribute': 'id'}})
+
     def test_nonexistent_file(self):
         """Test handling of nonexistent files."""
         with pytest.raises(FileNotFoundError):
@@ -247,6 +623,130 @@ class TestDataURIFunctions:
         with pytest.raises(ValueError):
             parse_data_uri("data:invalid")
 
+        with pytest.raises(ValueError):
+            parse_data_uri("data:text/plain;base64,SGVsbG8=V29ybGQ=")
+
+    def test_parse_data_uri_header(self):
+        """Test header-only parsing with an untouched payload."""
+        payload = "A" * 1_000_000
+        data_uri = "data:image/png;charset=utf-8;base64," + payload
+
+        header = parse_data_uri_header(data_uri)
+        assert header["mime_type"] == "image/png"
+        assert header["is_base64"]
+        assert data_uri[header["data_offset"]:] == payload
+
+        raw = data_uri.encode("ascii")
+        header = parse_data_uri_header(raw)
+        assert isinstance(header["payload"], memoryview)
+        assert header["payload"].obj is raw
+        assert header["payload"][:4].tobytes() == b"AAAA"
+
+        assert parse_data_uri_header("x" * 1_000_000) is None
+        assert parse_data_uri_header("data:" + "x" * 1_000_000) is None
+
+    def test_decode_data_uri_in_chunks(self):
+        """Test chunked decoding into a stream."""
+        payload = bytes(range(256)) * 10
+        data_uri = "data:application/octet-stream;base64," + base64.b64encode(payload).decode()
+        stream = io.BytesIO()
+
+        result = decode_data_uri(data_uri, stream, chunk_size=10)
+
+        assert stream.getvalue() == payload
+        assert result["size"] == len(payload)
+        assert result["mime_type"] == "application/octet-stream"
+
+    def test_decode_data_uri_percent_encoded(self):
+        """Test that percent escapes split across chunks decode correctly."""
+        stream = io.BytesIO()
+        decode_data_uri("data:text/plain,Hello%20World%21", stream, chunk_size=4)
+        assert stream.getvalue() == b"Hello World!"
+
+    def test_decode_data_uri_rejects_invalid_base64(self):
+        """Test that invalid payloads are rejected while decoding."""
+        with pytest.raises(ValueError):
+            decode_data_uri("data:text/plain;base64,SGVs=G8gV29ybGQ=", io.BytesIO(), chunk_size=4)
+        with pytest.raises(ValueError):
+            decode_data_uri("data:text/plain;base64,SGVsb!8=", io.BytesIO())
+
+
+class TestStreamingEditor:
+    """Test cases for the iterparse-based StreamingEditor."""
+
+    @pytest.fixture
+    def temp_xml_file(self):
+        """Create a temporary XML file with repeated records."""
+        records = "".join(
+            f'<record id="{i}" type="{"admin" if i % 2 else "user"}"><name>User {i}</name></record>'
+            for i in range(1, 101)
+        )
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.xml', delete=False) as f:
+            f.write(f'<?xml version="1.0"?><data><records>{records}</records></data>')
+            temp_path = f.name
+        yield temp_path
+        os.unlink(temp_path)
+
+    @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+    def test_stream_matches_full_tree(self, temp_xml_file):
+        """Test that streaming queries agree with full-tree XPath."""
+        streaming = StreamingEditor(temp_xml_file)
+        editor = FileEditor(temp_xml_file)
+
+        for path in ["//record", "/data/records/record[@type='admin']", "//record[3]/name"]:
+            assert len(streaming.list_elements(path)) == len(editor.query(path))
+
+        assert streaming.get_element_text("//record[@id='42']/name") == "User 42"
+        assert streaming.get_element_attribute("//record[2]", "type") == "user"
+
+    @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+    def test_stream_paths_are_valid_xpath(self, temp_xml_file):
+        """Test that emitted paths address the same element in the full tree."""
+        streaming = StreamingEditor(temp_xml_file)
+        editor = FileEditor(temp_xml_file)
+
+        match = streaming.list_elements("//record[@id='7']")[0]
+        assert editor.get_element_attribute(match['path'], "id") == "7"
+
+    @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+    def test_stream_rejects_unsupported_paths(self, temp_xml_file):
+        """Test that full XPath syntax is refused in streaming mode."""
+        streaming = StreamingEditor(temp_xml_file)
+        with pytest.raises(ValueError):
+            streaming.list_elements("//record[contains(@type, 'ad')]")
+
+    @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+    @pytest.mark.parametrize("path", ["//*[2]", "//records/*[3]", "//record[@type='admin'][2]"])
+    def test_stream_rejects_positions_with_other_semantics(self, temp_xml_file, path):
+        """Test that positions XPath would count differently are refused, not misanswered."""
+        streaming = StreamingEditor(temp_xml_file)
+        with pytest.raises(ValueError, match="position"):
+            streaming.list_elements(path)
+        # The supported form agrees with XPath
+        assert (streaming.get_element_attribute("//record[2][@type='user']", "id")
+                == FileEditor(temp_xml_file).get_element_attribute("//record[2][@type='user']", "id"))
+
+    @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+    def test_stream_nested_matches_in_document_order(self, tmp_path):
+        """Test that nested matches come parent first, as from FileEditor."""
+        path = tmp_path / "nested.xml"
+        long_text = "x" * 100000
+        path.write_text(
+            '<root><item name="outer">outer text<item name="inner">inner text</item>tail</item>'
+            f'<item name="last">{long_text}<child/></item></root>'
+        )
+        streaming = StreamingEditor(str(path))
+        editor = FileEditor(str(path))
+
+        streamed = streaming.list_elements("//item")
+        assert ([info['attributes']['name'] for info in streamed]
+                == [e.get('name') for e in editor.query("//item")] == ["outer", "inner", "last"])
+        assert [editor.query(info['path'])[0].get('name') for info in streamed] == ["outer", "inner", "last"]
+        assert [info['text'] for info in streamed] == ["outer text", "inner text", long_text]
+        assert (streaming.get_element_attribute("//item", "name")
+                == editor.get_element_attribute("//item", "name") == "outer")
+        assert streaming.get_element_text("//item") == editor.get_element_text("//item") == "outer text"
+
 
 class TestFileEditorIntegration:
     """Integration tests for complete workflows."""
@@ -309,6 +809,97 @@ class TestFileEditorIntegration:
         pdf_result = editor.extract_data_uri("//svg:image[contains(@xlink:href, 'application/pdf')]/@xlink:href")
         assert pdf_result["mime_type"] == "application/pdf"
 
+    @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+    def test_save_data_uri_to_file(self, temp_complex_svg, tmp_path):
+        """Test streaming a Data URI payload into a file."""
+        editor = FileEditor(temp_complex_svg)
+        output_path = tmp_path / "document.pdf"
+
+        xpath = "//svg:image[contains(@xlink:href, 'application/pdf')]/@xlink:href"
+        assert editor.save_data_uri_to_file(xpath, str(output_path))
+        assert output_path.read_bytes().startswith(b"%PDF-1.4")
+
+        stream = io.BytesIO()
+        result = editor.write_data_uri("//svg:image[@width='100']", stream, chunk_size=64)
+        assert result["mime_type"] == "application/pdf"
+        assert stream.getvalue() == output_path.read_bytes()
+
+        missing_path = tmp_path / "missing.bin"
+        assert not editor.save_data_uri_to_file("//svg:rect", str(missing_path))
+        assert not missing_path.exists()
+
+        assert not editor.save_data_uri_to_file("//svg:rect", str(output_path))
+        assert output_path.read_bytes().startswith(b"%PDF-1.4")
+        editor.set_element_attribute("//svg:image[@width='100']", "xlink:href", "data:text/plain;base64,!!!!")
+        assert not editor.save_data_uri_to_file(xpath, str(output_path))
+        assert output_path.read_bytes() == stream.getvalue()
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["document.pdf"]
+
+    @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+    def test_extract_all_data_uris(self, tmp_path):
+        """Test extracting every Data URI in one pass into content-hashed files."""
+        png = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+        svg_path = tmp_path / "assets.svg"
+        svg_path.write_text(f'''<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">
+    <style>.bg {{ background: url("data:image/png;base64,{png}"); }}</style>
+    <image xlink:href="data:image/png;base64,{png}"/>
+    <image href="data:image/png;base64,{png}"/>
+    <rect style="fill: url('data:text/plain;base64,SGVsbG8=')"/>
+    <image href="https://example.com/remote.png"/>
+</svg>''')
+        editor = FileEditor(str(svg_path))
+
+        listed = editor.extract_all_data_uris()
+        assert [(item['source'], item['attribute']) for item in listed] == [
+            ('css', None), ('attribute', 'xlink:href'), ('attribute', 'href'), ('css', 'style'),
+        ]
+
+        outdir = tmp_path / "out"
+        umask = os.umask(0o022)
+        try:
+            results = editor.extract_all_data_uris(str(outdir), workers=2)
+        finally:
+            os.umask(umask)
+        assert all('error' not in item for item in results)
+        assert len({item['sha256'] for item in results}) == 2
+        assert sorted(p.suffix for p in outdir.iterdir()) == ['.png', '.txt']
+        assert {p.stat().st_mode & 0o777 for p in outdir.iterdir()} == {0o644}
+        assert (outdir / f"{results[3]['sha256']}.txt").read_bytes() == b"Hello"
+
+    @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+    def test_externalize_and_internalize_data_uris(self, temp_complex_svg, tmp_path):
+        """Test moving Data URIs into a blob store and back."""
+        editor = FileEditor(temp_complex_svg)
+        pdf_xpath = "//svg:image[@width='100']/@xlink:href"
+        original = editor.extract_data_uri(pdf_xpath)
+        original_uri = editor.query(pdf_xpath)[0]
+
+        umask = os.umask(0o022)
+        try:
+            results = editor.externalize_data_uris(BlobStore(str(tmp_path / "blobs")))
+        finally:
+            os.umask(umask)
+        assert len(results) == 2
+        # Blobs are readable by other users of a shared store
+        assert {p.stat().st_mode & 0o777 for p in (tmp_path / "blobs").rglob("*") if p.is_file()} == {0o644}
+        assert editor.modified
+        assert editor.query(pdf_xpath)[0].startswith("xsl-blob:application/pdf;sha256=")
+        assert not editor.find_by_xpath("//*[contains(@xlink:href, 'data:')]")
+
+        # Extraction keeps working against the store
+        assert editor.extract_data_uri(pdf_xpath)["data"] == original["data"]
+        stream = io.BytesIO()
+        assert editor.write_data_uri(pdf_xpath, stream)["size"] == len(stream.getvalue())
+        assert stream.getvalue().startswith(b"%PDF-1.4")
+
+        # A second document with the same assets adds no new blobs
+        blob_count = len(list((tmp_path / "blobs").rglob("*")))
+        FileEditor(temp_complex_svg).externalize_data_uris(BlobStore(str(tmp_path / "blobs")))
+        assert len(list((tmp_path / "blobs").rglob("*"))) == blob_count
+
+        assert editor.internalize_data_uris() == 2
+        assert editor.query(pdf_xpath)[0] == original_uri
+
     @pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
     def test_modify_and_save_workflow(self, temp_complex_svg):
         """Test complete modify and save workflow."""
@@ -0,0 +1,170 @@
+"""
+Tests for remote document loading.
+"""
+
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from xsl import remote
+from xsl.editor import FileEditor, extract_from_urls
+
+DOCUMENT = b'<root><item id="a">Remote</item></root>'
+IMAGE = (b'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">'
+         b'<image xlink:href="data:text/plain;base64,SGVsbG8="/></svg>')
+
+
+class DocumentHandler(BaseHTTPRequestHandler):
+    """Serves DOCUMENT with an ETag and honors If-None-Match."""
+
+    protocol_version = "HTTP/1.1"
+    etag = '"v1"'
+    requests = []
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/flaky" and len(self.requests) == 1:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.etag)
+            self.end_headers()
+            return
+        if self.path.startswith("/missing"):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = IMAGE if self.path.startswith("/image") else DOCUMENT
+        self.send_response(200)
+        self.send_header("Content-Type", "application/xml")
+        if self.path == "/unsized":
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        else:
+            self.send_header("Content-Length", str(len(body)))
+        if self.path != "/no-store":
+            self.send_header("ETag", self.etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    DocumentHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DocumentHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    fetcher = remote.configure(cache_dir=str(tmp_path / "http"), timeout=5)
+    yield fetcher
+    remote.configure(cache=False).close()
+
+
+def test_reload_of_unchanged_document_is_revalidated(base_url, fetcher):
+    """Test that a second load sends the ETag and is served from the cache."""
+    first = FileEditor(f"{base_url}/doc.xml")
+    second = FileEditor(f"{base_url}/doc.xml")
+
+    assert second.get_element_text("//item") == first.get_element_text("//item") == "Remote"
+    assert DocumentHandler.requests == [("/doc.xml", None), ("/doc.xml", '"v1"')]
+    assert fetcher.info() == {"requests": 2, "not_modified": 1}
+
+
+def test_responses_without_validators_are_not_cached(base_url, fetcher):
+    """Test that only responses with a validator are stored."""
+    FileEditor(f"{base_url}/no-store")
+    FileEditor(f"{base_url}/no-store")
+
+    assert [etag for _, etag in DocumentHandler.requests] == [None, None]
+
+
+def test_transient_errors_are_retried(base_url, fetcher):
+    """Test that a 503 is retried on the pooled session."""
+    assert FileEditor(f"{base_url}/flaky").get_element_text("//item") == "Remote"
+    assert len(DocumentHandler.requests) == 2
+
+
+def test_download_is_parsed_as_it_streams(base_url, fetcher):
+    """Test that streamed content is parsed and kept."""
+    editor = FileEditor(f"{base_url}/unsized")
+
+    assert editor.get_element_text("//item") == "Remote"
+    assert editor.content_size == len(DOCUMENT)
+    assert editor.original_content == DOCUMENT.decode()
+
+
+@pytest.mark.parametrize("path", ["/doc.xml", "/unsized"])
+def test_oversized_downloads_are_aborted(base_url, tmp_path, path):
+    """Test the max_size guard with and without a declared length."""
+    remote.configure(cache_dir=str(tmp_path / "http"), max_size=len(DOCUMENT) - 1)
+    try:
+        with pytest.raises(IOError, match="limit"):
+            FileEditor(f"{base_url}{path}")
+        assert list((tmp_path / "http").iterdir()) == []
+    finally:
+        remote.configure(cache=False)
+
+
+def test_extract_from_many_urls(base_url, fetcher):
+    """Test concurrent extraction with per-URL results and errors."""
+    urls = [f"{base_url}/image{i}.svg" for i in range(10)] + [f"{base_url}/missing.svg"]
+
+    results = list(extract_from_urls(urls, "//svg:image/@xlink:href", workers=4))
+
+    assert sorted(result["url"] for result in results) == sorted(urls)
+    by_url = {result["url"]: result for result in results}
+    assert by_url[urls[0]]["mime_type"] == "text/plain"
+    assert by_url[urls[0]]["data"] == "SGVsbG8="
+    assert "404" in by_url[urls[-1]]["error"]
+
+
+def test_cache_entry_keeps_validators_with_their_body(tmp_path):
+    """Test that an opened entry keeps serving its own body when replaced."""
+    cache = remote.HTTPCache(str(tmp_path / "http"))
+    url = "http://example.com/doc.xml"
+    cache.store(url, {"ETag": '"v1"'}, b"first")
+
+    meta, stored = cache.open(url)
+    try:
+        cache.store(url, {"ETag": '"v2"'}, b"second")
+        assert meta["etag"] == '"v1"'
+        assert b"".join(cache.iter_body(url, stored)) == b"first"
+    finally:
+        stored.close()
+    assert cache.lookup(url)["etag"] == '"v2"'
+    assert [p.suffix for p in (tmp_path / "http").iterdir()] == [".entry"]
+
+
+def test_cache_prunes_least_recently_used_entries(tmp_path):
+    """Test that the cache stays within max_bytes, dropping the oldest use first."""
+    cache = remote.HTTPCache(str(tmp_path / "http"), max_bytes=2500)
+    urls = [f"http://example.com/{i}" for i in range(3)]
+    for age, url in zip((300, 200), urls):
+        cache.store(url, {"ETag": '"v"'}, b"x" * 1000)
+        os.utime(cache._path(url), (time.time() - age, time.time() - age))
+    # Serving the oldest entry marks it as used
+    meta, stored = cache.open(urls[0])
+    with stored:
+        b"".join(cache.iter_body(urls[0], stored))
+
+    cache.store(urls[2], {"ETag": '"v"'}, b"x" * 1000)
+
+    assert [cache.lookup(url) is not None for url in urls] == [True, False, True]
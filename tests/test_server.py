@@ -0,0 +1,350 @@
+"""
+Tests for the xsl HTTP server.
+"""
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from xsl.server import FileEditorServer, PooledHTTPServer, SessionStore
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Handler whose /slow route blocks until released."""
+
+    release = threading.Event()
+
+    def do_GET(self):
+        if self.path == "/slow":
+            self.release.wait(5)
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve(handler, **kwargs):
+    """Start a pooled server on a free port in a background thread."""
+    server = PooledHTTPServer(("127.0.0.1", 0), handler, **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _stop(server):
+    server.shutdown()
+    server.server_close()
+
+
+def test_health_endpoint():
+    """Test that existing routes are served by the pooled server."""
+    server, base = _serve(FileEditorServer, workers=2)
+    try:
+        with urllib.request.urlopen(f"{base}/api/health", timeout=5) as response:
+            assert json.loads(response.read())["status"] == "ok"
+    finally:
+        _stop(server)
+
+
+def test_slow_request_does_not_block_others():
+    """Test that a blocked request leaves other workers free."""
+    SlowHandler.release.clear()
+    server, base = _serve(SlowHandler, workers=2)
+    try:
+        slow = threading.Thread(
+            target=lambda: urllib.request.urlopen(f"{base}/slow", timeout=5).read()
+        )
+        slow.start()
+        time.sleep(0.1)
+
+        with urllib.request.urlopen(f"{base}/fast", timeout=2) as response:
+            assert response.read() == b"ok"
+    finally:
+        SlowHandler.release.set()
+        slow.join()
+        _stop(server)
+
+
+def test_full_queue_is_rejected():
+    """Test that connections beyond workers + queue_size get a 503."""
+    SlowHandler.release.clear()
+    server, base = _serve(SlowHandler, workers=1, queue_size=0)
+    try:
+        slow = threading.Thread(
+            target=lambda: urllib.request.urlopen(f"{base}/slow", timeout=5).read()
+        )
+        slow.start()
+        time.sleep(0.1)
+
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(f"{base}/fast", timeout=2)
+        assert excinfo.value.code == 503
+    finally:
+        SlowHandler.release.set()
+        slow.join()
+        _stop(server)
+
+
+@pytest.fixture
+def xml_files(tmp_path):
+    """Create a few small XML files."""
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"doc{i}.xml"
+        path.write_text(f'<?xml version="1.0"?><root><item id="{i}">Item {i}</item></root>')
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+def test_session_store_unloads_and_reloads_clean_sessions(xml_files):
+    """Test that clean sessions over the memory budget reload transparently."""
+    store = SessionStore(memory_budget=1)
+    first = store.open(xml_files[0])
+    store.open(xml_files[1])
+
+    assert not first.resident
+    assert store.stats()["evictions"] == 1
+
+    with store.checkout(first.session_id) as session:
+        assert session.editor.get_element_text("//item") == "Item 0"
+    assert store.stats()["reloads"] == 1
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+def test_session_store_keeps_dirty_sessions(xml_files):
+    """Test that sessions with unsaved edits are never evicted."""
+    store = SessionStore(max_sessions=1, memory_budget=1)
+    first = store.open(xml_files[0])
+    with store.checkout(first.session_id) as session:
+        session.editor.set_element_text("//item", "Edited")
+    second = store.open(xml_files[1])
+    third = store.open(xml_files[2])
+
+    assert [s.resident for s in (first, second, third)] == [True, False, True]
+    with store.checkout(first.session_id) as session:
+        assert session.editor.get_element_text("//item") == "Edited"
+    stats = store.stats()
+    assert stats["sessions"] == 3
+    assert stats["dirty"] == 1
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+def test_session_store_unloads_sessions_over_the_count(xml_files):
+    """Test that sessions beyond max_sessions are unloaded, not forgotten."""
+    store = SessionStore(max_sessions=1, max_ids=2)
+    sessions = [store.open(path) for path in xml_files]
+
+    assert [s.resident for s in sessions] == [False, False, True]
+    with store.checkout(sessions[1].session_id) as session:
+        assert session.editor.get_element_text("//item") == "Item 1"
+    assert store.stats()["reloads"] == 1
+
+    # Over max_ids the least recently used unloaded session is dropped
+    with pytest.raises(KeyError):
+        with store.checkout(sessions[0].session_id):
+            pass
+    assert store.stats()["sessions"] == 2
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+def test_session_store_refreshes_size_after_edits(xml_files):
+    """Test that edits update the size counted against the memory budget."""
+    store = SessionStore()
+    session = store.open(xml_files[0])
+    size = session.size
+
+    with store.checkout(session.session_id, edit=True) as checked_out:
+        checked_out.editor.set_element_text("//item", "x" * 10000)
+
+    assert session.size > size + 9000
+    assert store.stats()["memory_used"] == session.size
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+def test_session_store_expires_idle_sessions(xml_files):
+    """Test that idle sessions are unloaded after the TTL and reload on access."""
+    store = SessionStore(ttl=0.05)
+    session = store.open(xml_files[0])
+    time.sleep(0.1)
+    store.open(xml_files[1])
+
+    assert not session.resident
+    with store.checkout(session.session_id) as checked_out:
+        assert checked_out.editor.get_element_text("//item") == "Item 0"
+    stats = store.stats()
+    assert stats["expirations"] == 1
+    assert stats["reloads"] == 1
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+def test_session_store_does_not_expire_dirty_sessions(xml_files):
+    """Test that the TTL never discards unsaved edits."""
+    store = SessionStore(ttl=0.05)
+    session = store.open(xml_files[0])
+    with store.checkout(session.session_id) as checked_out:
+        checked_out.editor.set_element_text("//item", "Edited")
+    time.sleep(0.1)
+    store.open(xml_files[1])
+
+    with store.checkout(session.session_id) as checked_out:
+        assert checked_out.editor.get_element_text("//item") == "Edited"
+    assert store.stats()["expirations"] == 0
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+def test_session_store_skips_session_checked_out_by_same_thread(xml_files):
+    """Test that eviction leaves a checked-out session alone, even in its own thread."""
+    store = SessionStore(max_sessions=1)
+    first = store.open(xml_files[0])
+
+    with store.checkout(first.session_id):
+        store.open(xml_files[1])
+        store.open(xml_files[2])
+        assert first.resident
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+def test_load_and_query_by_session_id(xml_files):
+    """Test the load/query workflow addressing documents by session id."""
+    FileEditorServer.sessions = SessionStore()
+    server, base = _serve(FileEditorServer, workers=2)
+
+    def post(route, payload):
+        request = urllib.request.Request(
+            f"{base}{route}", data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return json.loads(response.read())
+
+    try:
+        session_ids = [post("/api/load", {"file_path": p})["session_id"] for p in xml_files[:2]]
+        result = post("/api/query", {"query": "//item", "session_id": session_ids[0]})
+        assert result["elements"][0]["text"] == "Item 0"
+
+        with urllib.request.urlopen(f"{base}/api/sessions", timeout=5) as response:
+            assert json.loads(response.read())["sessions"] == 2
+
+        batch = post("/api/query_batch", {"session_id": session_ids[0], "queries": {
+            "first": "//item",
+            "all": {"xpath": "//item", "all": True},
+        }})
+        assert batch["results"]["first"] == "Item 0"
+        assert batch["results"]["all"][0] == "Item 0"
+    finally:
+        _stop(server)
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+def test_add_and_remove_elements(xml_files):
+    """Test adding and removing elements through the API."""
+    FileEditorServer.sessions = SessionStore()
+    server, base = _serve(FileEditorServer, workers=2)
+
+    def post(route, payload):
+        request = urllib.request.Request(
+            f"{base}{route}", data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return json.loads(response.read())
+
+    try:
+        session_id = post("/api/load", {"file_path": xml_files[0]})["session_id"]
+        added = post("/api/add", {"session_id": session_id, "parent_xpath": "/*",
+                                  "tag": "item", "text": "New", "attributes": {"id": "n"}})
+        assert added["success"]
+        result = post("/api/query", {"query": "//item[@id='n']", "session_id": session_id})
+        assert result["elements"][0]["text"] == "New"
+
+        assert post("/api/remove", {"session_id": session_id, "xpath": "//item[@id='n']"})["success"]
+        assert not post("/api/remove", {"session_id": session_id, "xpath": "//item[@id='n']"})["success"]
+
+        with urllib.request.urlopen(f"{base}/api/document?session_id={session_id}", timeout=5) as response:
+            assert response.headers["Content-Type"] == "application/xml"
+            assert b'<item id="0">Item 0</item>' in response.read()
+
+        output = f"{xml_files[0]}.out"
+        saved = post("/api/save", {"session_id": session_id, "output_path": output, "async": True})
+        assert saved["success"] and saved["pending"]
+        deadline = time.monotonic() + 5
+        while FileEditorServer.sessions.stats()["dirty"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        with open(output) as f:
+            assert "Item 0" in f.read()
+    finally:
+        _stop(server)
+
+
+def test_extract_batch_streams_ndjson(tmp_path):
+    """Test that batch extraction returns one JSON line per URL."""
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"image{i}.svg"
+        path.write_text('<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">'
+                        '<image xlink:href="data:text/plain;base64,SGVsbG8="/></svg>')
+        paths.append(str(path))
+    server, base = _serve(FileEditorServer, workers=2)
+
+    try:
+        request = urllib.request.Request(
+            f"{base}/api/extract_batch",
+            data=json.dumps({"urls": paths, "xpath": "//svg:image/@xlink:href", "workers": 2}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            assert response.headers["Content-Type"] == "application/x-ndjson"
+            results = [json.loads(line) for line in response.read().splitlines()]
+    finally:
+        _stop(server)
+
+    assert sorted(result["url"] for result in results) == paths
+    assert all(result["mime_type"] == "text/plain" for result in results)
+
+
+@pytest.mark.parametrize("workers", [None, "many", [2]])
+def test_extract_batch_rejects_invalid_workers(workers):
+    """Test that a bad worker count gets a JSON 400 instead of a dropped connection."""
+    server, base = _serve(FileEditorServer, workers=2)
+    try:
+        request = urllib.request.Request(
+            f"{base}/api/extract_batch",
+            data=json.dumps({"urls": [], "xpath": "//image/@href", "workers": workers}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(request, timeout=5)
+        assert excinfo.value.code == 400
+        assert "workers" in json.loads(excinfo.value.read())["error"]
+    finally:
+        _stop(server)
+
+
+@pytest.mark.skipif(not pytest.importorskip("lxml", minversion=None), reason="lxml not available")
+def test_document_stream_failure_after_headers_closes_connection(xml_files, monkeypatch):
+    """Test that a failure mid-stream ends the body instead of appending a JSON response."""
+    from xsl.editor import FileEditor
+
+    def failing_iter_bytes(self, pretty_print=False):
+        yield b"<root>"
+        raise ValueError("serialization failed")
+
+    monkeypatch.setattr(FileEditor, "iter_bytes", failing_iter_bytes)
+    FileEditorServer.sessions = SessionStore()
+    session = FileEditorServer.sessions.open(xml_files[0])
+    server, base = _serve(FileEditorServer, workers=2)
+    try:
+        url = f"{base}/api/document?session_id={session.session_id}"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.status == 200
+            assert response.read() == b"<root>"
+    finally:
+        _stop(server)
@@ -4,16 +4,40 @@ XSL - Universal File Editor for XML/SVG/HTML
 A powerful tool for editing XML-based files with XPath and CSS selectors.
 """
 
+import importlib
+
 __version__ = '0.1.0'
 
-# Core functionality
-from .editor import FileEditor
-from .cli import CLI, main as cli_main
-from .server import FileEditorServer
+# Core functionality, imported on first access so that `xsl --help` and
+# `import xsl` don't pay for lxml and requests
+_LAZY_ATTRIBUTES = {
+    'BlobStore': ('.blobstore', 'BlobStore'),
+    'FileEditor': ('.editor', 'FileEditor'),
+    'StreamingEditor': ('.editor', 'StreamingEditor'),
+    'CLI': ('.cli', 'CLI'),
+    'cli_main': ('.cli', 'main'),
+    'FileEditorServer': ('.server', 'FileEditorServer'),
+}
 
 __all__ = [
+    'BlobStore',
     'FileEditor',
+    'StreamingEditor',
     'CLI',
     'FileEditorServer',
     'cli_main',
 ]
+
+
+def __getattr__(name):
+    """Import a core class or function on first access."""
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _LAZY_ATTRIBUTES[name]
+    value = getattr(importlib.import_module(module_name, __name__), attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
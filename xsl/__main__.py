@@ -8,7 +8,7 @@ This module allows the package to be run as a script using `python -m xsl`.
 def main():
     """Run the xsl CLI."""
     from .cli import main as cli_main
-    cli_main()
+    raise SystemExit(cli_main())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,191 @@
+"""
+Apply one operation to many files on a process pool.
+
+Parsing and XPath evaluation are CPU bound and hold the GIL, so a sweep
+over a corpus runs each file in a worker process. Files are sent to the
+workers in chunks to keep the per-task overhead low, and only a bounded
+number of chunks is in flight, so a long file list is consumed lazily.
+Every file gets its own result; a file that cannot be processed reports
+an 'error' instead of stopping the sweep, and so does every file of a
+chunk whose worker process died.
+"""
+
+import glob
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .editor import FileEditor
+
+BATCH_OPERATIONS = ('query', 'set', 'extract', 'list')
+
+# Files per task sent to a worker process
+DEFAULT_CHUNK_SIZE = 8
+
+# Chunks in flight per worker, so workers never wait for the next task
+_CHUNKS_PER_WORKER = 2
+
+# Elements reported per file by 'list'
+LIST_LIMIT = 20
+
+
+def expand_globs(patterns: Iterable[str]) -> Iterator[str]:
+    """Expand glob patterns into file paths.
+
+    ``**`` matches any number of directories. Each pattern's matches are
+    yielded in sorted order; directories and repeated paths are skipped.
+
+    Args:
+        patterns: Glob patterns, e.g. ``assets/**/*.svg``
+
+    Yields:
+        str: Matching file paths
+    """
+    seen = set()
+    for pattern in patterns:
+        for path in sorted(glob.iglob(os.path.expanduser(pattern), recursive=True)):
+            if path not in seen and os.path.isfile(path):
+                seen.add(path)
+                yield path
+
+
+def process_file(path: str, operation: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply an operation to one file.
+
+    Args:
+        path: File path
+        operation: One of BATCH_OPERATIONS
+        params: Operation arguments:
+            query: 'xpath' and optional 'attr'
+            set: 'xpath', 'value' and optional 'attr'; the file is saved if
+                anything changed
+            extract: optional 'xpath' and 'outdir'; without an XPath every
+                Data URI is listed, or written to 'outdir'
+            list: optional 'xpath'
+
+    Returns:
+        dict: 'path' plus the operation's result, or 'path' and 'error'
+    """
+    try:
+        if operation == 'set':
+            editor = FileEditor(path, track_changes=True)
+            if params.get('attr'):
+                updated = editor.set_element_attribute(params['xpath'], params['attr'], params['value'])
+            else:
+                updated = editor.set_element_text(params['xpath'], params['value'])
+            if updated:
+                editor.save()
+            return {'path': path, 'updated': updated}
+
+        editor = FileEditor(path)
+        if operation == 'query':
+            if params.get('attr'):
+                value = editor.get_element_attribute(params['xpath'], params['attr'])
+            else:
+                value = editor.get_element_text(params['xpath'])
+            return {'path': path, 'value': value}
+
+        if operation == 'extract':
+            if params.get('xpath'):
+                # Decode without keeping the payload, to report its size in bytes
+                with open(os.devnull, 'wb') as sink:
+                    result = editor.write_data_uri(params['xpath'], sink)
+                return {'path': path, 'mime_type': result['mime_type'], 'size': result['size']}
+            results = editor.extract_all_data_uris(params.get('outdir'), workers=1)
+            return {'path': path, 'data_uris': results}
+
+        if operation == 'list':
+            elements = editor.list_elements(params.get('xpath') or '//*')
+            return {'path': path, 'count': len(elements), 'elements': elements[:LIST_LIMIT]}
+
+        raise ValueError(f"Unknown batch operation: {operation}")
+    except Exception as e:
+        return {'path': path, 'error': str(e)}
+
+
+def _process_chunk(paths: List[str], operation: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Apply an operation to a chunk of files in a worker process."""
+    return [process_file(path, operation, params) for path in paths]
+
+
+def _chunk_results(future, paths: List[str]) -> List[Dict[str, Any]]:
+    """Get the results of a chunk, or an error per file if its worker died."""
+    try:
+        return future.result()
+    except BrokenProcessPool as e:
+        return [{'path': path, 'error': f"Worker process died: {e}"} for path in paths]
+
+
+def process_files(paths: Iterable[str], operation: str, params: Optional[Dict[str, Any]] = None,
+                  workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  ordered: bool = True) -> Iterator[Dict[str, Any]]:
+    """Apply an operation to many files on a process pool.
+
+    Args:
+        paths: File paths, e.g. from expand_globs()
+        operation: One of BATCH_OPERATIONS
+        params: Operation arguments, as for process_file()
+        workers: Worker processes (default: number of CPUs); 1 runs in
+            this process
+        chunk_size: Files per task sent to a worker
+        ordered: Yield results in the order of ``paths`` instead of as
+            they complete
+
+    A worker process that dies (e.g. killed for running out of memory)
+    fails every chunk in flight on the pool; their files report an error
+    and the remaining files go to a new pool.
+
+    Yields:
+        dict: One process_file() result per file
+
+    Raises:
+        ValueError: If the operation is unknown
+    """
+    if operation not in BATCH_OPERATIONS:
+        raise ValueError(f"Unknown batch operation: {operation}")
+    params = params or {}
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, chunk_size)
+
+    pending = iter(paths)
+    if workers == 1:
+        for path in pending:
+            yield process_file(path, operation, params)
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+
+    def submit(count):
+        nonlocal executor
+        submitted = []
+        for _ in range(count):
+            chunk = list(islice(pending, chunk_size))
+            if not chunk:
+                break
+            try:
+                future = executor.submit(_process_chunk, chunk, operation, params)
+            except BrokenProcessPool:
+                executor.shutdown(wait=False)
+                executor = ProcessPoolExecutor(max_workers=workers)
+                future = executor.submit(_process_chunk, chunk, operation, params)
+            submitted.append((future, chunk))
+        return submitted
+
+    try:
+        if ordered:
+            in_flight = deque(submit(workers * _CHUNKS_PER_WORKER))
+            while in_flight:
+                yield from _chunk_results(*in_flight.popleft())
+                in_flight.extend(submit(1))
+        else:
+            in_flight = dict(submit(workers * _CHUNKS_PER_WORKER))
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from _chunk_results(future, in_flight.pop(future))
+                in_flight.update(submit(len(done)))
+    finally:
+        executor.shutdown()
@@ -0,0 +1,117 @@
+"""
+Content-addressed blob store for externalized data URIs.
+
+Decoded payloads are stored once per SHA-256 digest under
+``<root>/<first two hex digits>/<remaining digits>``. Documents refer to
+them with ``xsl-blob:<mime>;sha256=<digest>`` references. Blobs get the
+mode of any new file (0666 less the umask), so a store can be shared by
+every user and process that resolves those references.
+"""
+
+import base64
+import os
+import re
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+from .utils import decode_data_uri_content_addressed
+
+BLOB_URI_SCHEME = 'xsl-blob:'
+
+# Reference to a stored blob, carrying the MIME type needed to re-inline it
+BLOB_URI_PATTERN = re.compile(
+    r'xsl-blob:(?P<mime>[a-z]+/[a-z0-9\-+.]+);sha256=(?P<digest>[0-9a-f]{64})',
+    re.IGNORECASE
+)
+
+
+def parse_blob_uri(uri: str) -> Optional[Tuple[str, str]]:
+    """Parse a blob reference.
+
+    Args:
+        uri: The string to check
+
+    Returns:
+        tuple: (mime, digest), or None if the string is not a blob reference
+    """
+    if not uri.startswith(BLOB_URI_SCHEME):
+        return None
+    match = BLOB_URI_PATTERN.fullmatch(uri)
+    if not match:
+        return None
+    return match.group('mime'), match.group('digest').lower()
+
+
+class BlobStore:
+    """Directory of decoded data URI payloads keyed by SHA-256."""
+
+    def __init__(self, root: str):
+        """Initialize the store, creating its directory if needed.
+
+        Args:
+            root: Store directory
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, digest: str) -> str:
+        """Get the file path of a blob.
+
+        Args:
+            digest: Hex SHA-256 digest
+
+        Returns:
+            str: Path of the blob file (it may not exist)
+        """
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def has(self, digest: str) -> bool:
+        """Check whether a blob is stored."""
+        return os.path.exists(self.path(digest))
+
+    def open(self, digest: str) -> BinaryIO:
+        """Open a stored blob for reading.
+
+        Raises:
+            FileNotFoundError: If the blob is not stored
+        """
+        return open(self.path(digest), 'rb')
+
+    def put_data_uri(self, uri: str) -> Dict[str, Any]:
+        """Store the decoded payload of a data URI.
+
+        Args:
+            uri: The data URI to store
+
+        Returns:
+            dict: 'mime_type', 'size', 'sha256' and 'path' of the blob
+
+        Raises:
+            ValueError: If the input is not a valid data URI
+        """
+        return decode_data_uri_content_addressed(uri, self.root, self.path)
+
+    @staticmethod
+    def reference(digest: str, mime: str) -> str:
+        """Build the reference that replaces a data URI in a document."""
+        return f"{BLOB_URI_SCHEME}{mime};sha256={digest}"
+
+    def to_data_uri(self, reference: str) -> str:
+        """Re-inline a blob reference as a base64 data URI.
+
+        Args:
+            reference: Blob reference
+
+        Returns:
+            str: The equivalent data URI
+
+        Raises:
+            ValueError: If the reference is invalid
+            FileNotFoundError: If the blob is not stored
+        """
+        parsed = parse_blob_uri(reference)
+        if parsed is None:
+            raise ValueError(f"Invalid blob reference: {reference}")
+        mime, digest = parsed
+        with self.open(digest) as f:
+            encoded = base64.b64encode(f.read()).decode('ascii')
+        return f"data:{mime};base64,{encoded}"
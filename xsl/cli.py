@@ -9,21 +9,35 @@ This module provides the CLI interface for the xsl package.
 """
 
 import argparse
+import json
+import re
 import sys
 import os
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import TYPE_CHECKING, Iterable, Optional, List, Dict, Any
 
-from . import __version__, FileEditor
+from . import __version__, daemon
+
+# The editor stack (lxml, requests) is imported by the commands that use it,
+# so `xsl --help`, `xsl --version` and forwarding to the daemon start fast
+if TYPE_CHECKING:
+    from .editor import FileEditor
 
 
 class CLI:
     """Command-line interface for xsl."""
 
-    def __init__(self):
-        self.editor: Optional[FileEditor] = None
+    def __init__(self, open_cached: bool = False):
+        """Initialize the CLI.
+
+        Args:
+            open_cached: Load files through FileEditor.open_cached, with
+                change tracking (used by the resident daemon)
+        """
+        self.editor: Optional["FileEditor"] = None
+        self.open_cached = open_cached
 
-    def run(self):
+    def run(self, argv: Optional[List[str]] = None):
         """Run the CLI with command line arguments."""
         parser = argparse.ArgumentParser(
             description="xsl - Universal File Editor for XML/SVG/HTML",
@@ -49,11 +63,16 @@ class CLI:
         query_parser.add_argument(
             "--attr", help="Attribute name (required for attribute type)"
         )
+        query_parser.add_argument(
+            "--stream",
+            metavar="FILE",
+            help="Stream FILE with iterparse instead of loading it (restricted paths)",
+        )
 
         # Set command
         set_parser = subparsers.add_parser("set", help="Set element value")
-        set_parser.add_argument("xpath", help="XPath expression")
-        set_parser.add_argument("value", help="New value")
+        set_parser.add_argument("xpath", nargs="?", help="XPath expression")
+        set_parser.add_argument("value", nargs="?", help="New value")
         set_parser.add_argument(
             "--type",
             choices=["text", "attribute"],
@@ -63,16 +82,56 @@ class CLI:
         set_parser.add_argument(
             "--attr", help="Attribute name (required for attribute type)"
         )
+        set_parser.add_argument(
+            "--from-file",
+            metavar="OPS",
+            help="Apply a batch of updates from a JSON Lines file, one op per line",
+        )
 
         # Extract Data URI command
         extract_parser = subparsers.add_parser(
             "extract", help="Extract Data URI from element"
         )
-        extract_parser.add_argument("xpath", help="XPath to element with Data URI")
+        extract_parser.add_argument(
+            "xpath", nargs="?", help="XPath to element with Data URI"
+        )
         extract_parser.add_argument("--output", help="Save extracted data to file")
         extract_parser.add_argument(
             "--info", action="store_true", help="Show Data URI info only"
         )
+        extract_parser.add_argument(
+            "--all", action="store_true", help="Extract every Data URI in the document"
+        )
+        extract_parser.add_argument(
+            "--outdir", help="Directory for --all output, named by content hash"
+        )
+        extract_parser.add_argument(
+            "--workers", type=int,
+            help="Decoding threads for --all, concurrent downloads for --urls"
+        )
+        extract_parser.add_argument(
+            "--urls", metavar="FILE",
+            help="Extract from every URL listed in FILE ('-' for stdin), printing NDJSON",
+        )
+        extract_parser.add_argument(
+            "--store", help="Blob store resolving externalized Data URIs"
+        )
+
+        # Externalize / internalize commands
+        externalize_parser = subparsers.add_parser(
+            "externalize", help="Move Data URIs into a content-addressed blob store"
+        )
+        externalize_parser.add_argument("--store", required=True, help="Blob store directory")
+        externalize_parser.add_argument(
+            "--min-size",
+            type=int,
+            default=0,
+            help="Keep Data URIs with shorter payloads inline (default: 0)",
+        )
+        internalize_parser = subparsers.add_parser(
+            "internalize", help="Re-inline Data URIs from a blob store"
+        )
+        internalize_parser.add_argument("--store", required=True, help="Blob store directory")
 
         # List command
         list_parser = subparsers.add_parser("list", help="List elements")
@@ -82,6 +141,11 @@ class CLI:
         list_parser.add_argument(
             "--limit", type=int, default=20, help="Limit results (default: 20)"
         )
+        list_parser.add_argument(
+            "--stream",
+            metavar="FILE",
+            help="Stream FILE with iterparse instead of loading it (restricted paths)",
+        )
 
         # Add command
         add_parser = subparsers.add_parser("add", help="Add new element")
@@ -100,6 +164,10 @@ class CLI:
         save_parser.add_argument(
             "--backup", action="store_true", help="Create backup before saving"
         )
+        save_parser.add_argument(
+            "--compact", action="store_true",
+            help="Write the tree without re-indenting it (faster, smaller)"
+        )
 
         # Info command
         info_parser = subparsers.add_parser("info", help="Show file information")
@@ -107,13 +175,76 @@ class CLI:
         # Shell command
         shell_parser = subparsers.add_parser("shell", help="Interactive shell mode")
 
+        # Batch command
+        batch_parser = subparsers.add_parser(
+            "batch", help="Apply a query or edit to every file matching a glob"
+        )
+        batch_parser.add_argument(
+            "--glob", action="append", required=True, dest="globs", metavar="PATTERN",
+            help="Files to process, e.g. 'assets/**/*.svg' (repeatable)"
+        )
+        batch_parser.add_argument(
+            "--workers", type=int, help="Worker processes (default: number of CPUs)"
+        )
+        batch_parser.add_argument(
+            "--chunk-size", type=int, help="Files per task sent to a worker"
+        )
+        batch_parser.add_argument(
+            "--unordered", action="store_true",
+            help="Print results as files complete instead of in path order"
+        )
+        batch_parser.add_argument(
+            "--json", action="store_true", help="Print one JSON result per file"
+        )
+        batch_subparsers = batch_parser.add_subparsers(
+            dest="operation", required=True, help="Operation applied to each file"
+        )
+        batch_query = batch_subparsers.add_parser("query", help="Query element text")
+        batch_query.add_argument("xpath", help="XPath expression")
+        batch_query.add_argument("--attr", help="Attribute name instead of text")
+        batch_set = batch_subparsers.add_parser("set", help="Set element value and save")
+        batch_set.add_argument("xpath", help="XPath expression")
+        batch_set.add_argument("value", help="New value")
+        batch_set.add_argument("--attr", help="Attribute name instead of text")
+        batch_extract = batch_subparsers.add_parser("extract", help="Extract Data URIs")
+        batch_extract.add_argument(
+            "xpath", nargs="?", help="XPath to element with Data URI (default: all)"
+        )
+        batch_extract.add_argument(
+            "--outdir", help="Write every Data URI here, named by content hash"
+        )
+        batch_list = batch_subparsers.add_parser("list", help="List elements")
+        batch_list.add_argument("xpath", nargs="?", default="//*", help="XPath filter")
+
+        # Run command
+        run_parser = subparsers.add_parser(
+            "run", help="Run shell commands from a script against one loaded file"
+        )
+        run_parser.add_argument("script", help="Script of shell commands, or - for stdin")
+        run_parser.add_argument("file", nargs="?", help="File to load before the script runs")
+        run_parser.add_argument(
+            "--output", help="Save to this path instead of the loaded file"
+        )
+        run_parser.add_argument(
+            "--keep-going", action="store_true", help="Continue after a failed command"
+        )
+        run_parser.add_argument(
+            "--no-save", action="store_true", help="Do not save at the end"
+        )
+
+        # Daemon command
+        daemon_parser = subparsers.add_parser(
+            "daemon", help="Control the background process keeping loaded files resident"
+        )
+        daemon_parser.add_argument("action", choices=["start", "stop", "status"])
+
         # Examples command
         examples_parser = subparsers.add_parser("examples", help="Create example files")
         examples_parser.add_argument(
             "--dir", default=".", help="Directory to create examples (default: .)"
         )
 
-        args = parser.parse_args()
+        args = parser.parse_args(argv)
 
         if not args.command:
             parser.print_help()
@@ -135,8 +266,14 @@ class CLI:
 
     def execute_command(self, args):
         """Execute a single command."""
+        from .blobstore import BlobStore
+        from .editor import FileEditor, StreamingEditor
+
         if args.command == "load":
-            self.editor = FileEditor(args.file)
+            if self.open_cached:
+                self.editor = FileEditor.open_cached(args.file, track_changes=True)
+            else:
+                self.editor = FileEditor(args.file)
             file_type = "remote" if args.file.startswith("http") else "local"
             print(f"✅ Loaded {file_type} file: {args.file} ({self.editor.file_type})")
 
@@ -144,7 +281,28 @@ class CLI:
             if "elements_count" in info:
                 print(f"   Found {info['elements_count']} elements")
 
+        elif args.command == "daemon":
+            self._control_daemon(args.action)
+
+        elif args.command == "batch":
+            self._batch(args)
+
+        elif args.command == "run":
+            if args.file:
+                self.editor = FileEditor(args.file, track_changes=True)
+            if args.script == "-":
+                failures = self.run_script(sys.stdin, args.keep_going,
+                                           not args.no_save, args.output)
+            else:
+                with open(args.script, "r", encoding="utf-8") as f:
+                    failures = self.run_script(f, args.keep_going,
+                                               not args.no_save, args.output)
+            if failures:
+                sys.exit(1)
+
         elif args.command == "query":
+            if args.stream:
+                self.editor = StreamingEditor(args.stream)
             self._require_loaded_file()
 
             if args.type == "text":
@@ -158,7 +316,33 @@ class CLI:
                 print(f"Attribute {args.attr}: {result}")
 
         elif args.command == "extract":
+            if args.urls:
+                self._extract_urls(args.urls, args.xpath, args.workers)
+                return
             self._require_loaded_file()
+            if args.store:
+                self.editor.blob_store = BlobStore(args.store)
+
+            if args.all:
+                results = self.editor.extract_all_data_uris(args.outdir, args.workers)
+                if not results:
+                    print("No Data URIs found")
+                    return
+                for result in results:
+                    location = result["path"]
+                    if result["attribute"]:
+                        location += f"/@{result['attribute']}"
+                    if "error" in result:
+                        print(f"❌ {location}: {result['error']}")
+                    elif args.outdir:
+                        print(f"✅ {location} -> {result['file']} ({result['size']} bytes)")
+                    else:
+                        print(f"{location}: {result['mime_type']} ({result['source']})")
+                return
+
+            if not args.xpath:
+                print("❌ XPath required unless --all is given")
+                return
 
             if args.info:
                 # Show Data URI information only
@@ -174,7 +358,9 @@ class CLI:
             elif args.output:
                 # Save to file
                 success = self.editor.save_data_uri_to_file(args.xpath, args.output)
-                if not success:
+                if success:
+                    print(f"✅ Data URI saved to {args.output}")
+                else:
                     print("❌ Failed to extract and save Data URI")
             else:
                 # Show raw data info
@@ -191,9 +377,34 @@ class CLI:
                     )
                     print(f"Base64 data: {preview}")
 
+        elif args.command == "externalize":
+            self._require_loaded_file()
+
+            results = self.editor.externalize_data_uris(
+                BlobStore(args.store), min_size=args.min_size
+            )
+            stored = [result for result in results if "error" not in result]
+            for result in results:
+                if "error" in result:
+                    print(f"❌ {result['path']}: {result['error']}")
+            print(f"✅ Externalized {len(stored)} Data URIs into {args.store}")
+
+        elif args.command == "internalize":
+            self._require_loaded_file()
+
+            count = self.editor.internalize_data_uris(BlobStore(args.store))
+            print(f"✅ Re-inlined {count} Data URIs from {args.store}")
+
         elif args.command == "set":
             self._require_loaded_file()
 
+            if args.from_file:
+                self._apply_updates_file(args.from_file)
+                return
+            if args.xpath is None or args.value is None:
+                print("❌ xpath and value required (or --from-file)")
+                return
+
             if args.type == "text":
                 success = self.editor.set_element_text(args.xpath, args.value)
             elif args.type == "attribute":
@@ -210,14 +421,24 @@ class CLI:
                 print("❌ Element not found")
 
         elif args.command == "list":
-            self._require_loaded_file()
-
-            elements = self.editor.list_elements(args.xpath)
+            if args.stream:
+                # Count every match but only keep the ones we print
+                self.editor = StreamingEditor(args.stream)
+                elements = []
+                total = 0
+                for elem in self.editor.iter_elements(args.xpath):
+                    total += 1
+                    if len(elements) < args.limit:
+                        elements.append(elem)
+            else:
+                self._require_loaded_file()
+                elements = self.editor.list_elements(args.xpath)
+                total = len(elements)
             if not elements:
                 print("No elements found")
                 return
 
-            print(f"Found {len(elements)} elements:")
+            print(f"Found {total} elements:")
             for i, elem in enumerate(elements[: args.limit]):
                 print(f"\n{i + 1}. Path: {elem['path']}")
                 print(f"   Tag: {elem['tag']}")
@@ -231,9 +452,9 @@ class CLI:
                 if elem["attributes"]:
                     print(f"   Attributes: {elem['attributes']}")
 
-            if len(elements) > args.limit:
+            if total > args.limit:
                 print(
-                    f"\n... and {len(elements) - args.limit} more (use --limit to see more)"
+                    f"\n... and {total - args.limit} more (use --limit to see more)"
                 )
 
         elif args.command == "add":
@@ -287,13 +508,116 @@ class CLI:
                 backup_path = self.editor.backup()
                 print(f"📋 Backup created: {backup_path}")
 
-            success = self.editor.save(args.output)
+            success = self.editor.save(args.output, pretty_print=not args.compact)
             if success:
                 save_path = args.output or self.editor.file_path
                 print(f"✅ File saved to {save_path}")
             else:
                 print("❌ Save failed")
 
+    def _apply_updates_file(self, path: str):
+        """Apply the update ops of a JSON Lines file to the loaded file."""
+        ops = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    ops.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    print(f"❌ {path}:{line_number}: invalid JSON: {e}")
+                    return
+
+        results = self.editor.apply_updates(ops)
+        for op, result in zip(ops, results):
+            if not result["success"]:
+                xpath = op.get("xpath") if isinstance(op, dict) else None
+                print(f"❌ {result['op']} {xpath}: {result.get('error', 'nothing changed')}")
+        applied = sum(1 for result in results if result["success"])
+        print(f"✅ Applied {applied} of {len(results)} updates")
+
+    def _extract_urls(self, path: str, xpath: Optional[str], workers: Optional[int]):
+        """Extract a Data URI from each URL listed in a file, one JSON line per URL."""
+        from .editor import DEFAULT_FETCH_WORKERS, extract_from_urls
+
+        if not xpath:
+            print("❌ XPath required with --urls")
+            return
+        f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+        try:
+            urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+        for result in extract_from_urls(urls, xpath, workers or DEFAULT_FETCH_WORKERS):
+            print(json.dumps(result), flush=True)
+
+    def _batch(self, args):
+        """Apply a batch operation to every file matching the globs, then report errors."""
+        from .batch import DEFAULT_CHUNK_SIZE, expand_globs, process_files
+
+        params = {key: value for key, value in vars(args).items()
+                  if key in ("xpath", "value", "attr", "outdir") and value is not None}
+        results = process_files(expand_globs(args.globs), args.operation, params,
+                                workers=args.workers,
+                                chunk_size=args.chunk_size or DEFAULT_CHUNK_SIZE,
+                                ordered=not args.unordered)
+        errors = []
+        count = 0
+        for result in results:
+            count += 1
+            if "error" in result:
+                errors.append(result)
+            if args.json:
+                print(json.dumps(result), flush=True)
+            elif "error" not in result:
+                print(self._format_batch_result(args.operation, result), flush=True)
+
+        if not count:
+            print(f"❌ No files match {', '.join(args.globs)}")
+            sys.exit(1)
+        if errors:
+            if not args.json:
+                print(f"❌ {len(errors)} of {count} files failed:")
+                for result in errors:
+                    print(f"   {result['path']}: {result['error']}")
+            sys.exit(1)
+        if not args.json:
+            print(f"✅ Processed {count} files")
+
+    @staticmethod
+    def _format_batch_result(operation: str, result: Dict[str, Any]) -> str:
+        """Format one successful batch result as a line."""
+        path = result["path"]
+        if operation == "query":
+            return f"{path}: {result['value']}"
+        if operation == "set":
+            return f"{path}: {'updated' if result['updated'] else 'not found'}"
+        if operation == "list":
+            return f"{path}: {result['count']} elements"
+        if "data_uris" in result:
+            return f"{path}: {len(result['data_uris'])} Data URIs"
+        return f"{path}: {result['mime_type']} ({result['size']} bytes)"
+
+    def _control_daemon(self, action: str):
+        """Start, stop or report on the resident daemon."""
+        if not daemon.available():
+            print("❌ Daemon not available (no Unix sockets, or XSL_NO_DAEMON is set)")
+            return
+        if action == "start":
+            print("✅ Daemon running" if daemon.start() else "❌ Daemon did not start")
+            return
+        response = daemon.request({"control": action})
+        if response is None:
+            print("Daemon not running")
+        elif action == "stop":
+            print("✅ Daemon stopped")
+        else:
+            info = response["info"]
+            print(f"Daemon pid {info['pid']}, up {info['uptime']:.0f}s, "
+                  f"{info['requests']} requests, file: {info['file'] or '-'}")
+
     def _require_loaded_file(self):
         """Check if a file is loaded, exit if not."""
         if not self.editor:
@@ -326,111 +650,7 @@ class CLI:
 
                 if command_line == "exit":
                     break
-                elif command_line == "help":
-                    print(
-                        "Available commands: load, query, attr, set, setattr, extract, save, list, info, help, exit"
-                    )
-                    continue
-
-                parts = command_line.split()
-                command = parts[0]
-
-                if command == "load" and len(parts) == 2:
-                    self.editor = FileEditor(parts[1])
-                    file_type = "remote" if parts[1].startswith("http") else "local"
-                    print(f"✅ Loaded {file_type} file ({self.editor.file_type})")
-
-                elif command == "query" and len(parts) >= 2:
-                    if not self.editor:
-                        print("❌ No file loaded")
-                        continue
-                    xpath = " ".join(parts[1:])
-                    result = self.editor.get_element_text(xpath)
-                    print(f"Result: {result}")
-
-                elif command == "attr" and len(parts) >= 3:
-                    if not self.editor:
-                        print("❌ No file loaded")
-                        continue
-                    xpath = parts[1]
-                    attr_name = parts[2]
-                    result = self.editor.get_element_attribute(xpath, attr_name)
-                    print(f"Attribute {attr_name}: {result}")
-
-                elif command == "set" and len(parts) >= 3:
-                    if not self.editor:
-                        print("❌ No file loaded")
-                        continue
-                    xpath = parts[1]
-                    value = " ".join(parts[2:])
-                    success = self.editor.set_element_text(xpath, value)
-                    print("✅ Updated" if success else "❌ Not found")
-
-                elif command == "setattr" and len(parts) >= 4:
-                    if not self.editor:
-                        print("❌ No file loaded")
-                        continue
-                    xpath = parts[1]
-                    attr_name = parts[2]
-                    attr_value = " ".join(parts[3:])
-                    success = self.editor.set_element_attribute(
-                        xpath, attr_name, attr_value
-                    )
-                    print("✅ Updated" if success else "❌ Not found")
-
-                elif command == "extract" and len(parts) >= 2:
-                    if not self.editor:
-                        print("❌ No file loaded")
-                        continue
-                    xpath = " ".join(parts[1:])
-                    result = self.editor.extract_data_uri(xpath)
-                    if "error" in result:
-                        print(f"❌ {result['error']}")
-                    else:
-                        print(
-                            f"✅ MIME: {result['mime_type']}, Size: {result['size']} bytes"
-                        )
-
-                elif command == "list":
-                    if not self.editor:
-                        print("❌ No file loaded")
-                        continue
-                    xpath = parts[1] if len(parts) > 1 else "//*"
-                    elements = self.editor.list_elements(xpath)[:10]  # limit to 10
-                    for elem in elements:
-                        text_preview = (
-                            elem["text"][:50] + "..."
-                            if len(elem["text"]) > 50
-                            else elem["text"]
-                        )
-                        print(f"{elem['tag']}: {repr(text_preview)}")
-
-                elif command == "info":
-                    if not self.editor:
-                        print("❌ No file loaded")
-                        continue
-                    info = self.editor.get_info()
-                    print(
-                        f"File: {info['file_path']} ({info['file_type']}, {info['size']} bytes)"
-                    )
-                    if "elements_count" in info:
-                        print(f"Elements: {info['elements_count']}")
-
-                elif command == "save":
-                    if not self.editor:
-                        print("❌ No file loaded")
-                        continue
-                    output = parts[1] if len(parts) > 1 else None
-                    if self.editor.is_remote and not output:
-                        print("❌ Remote file requires output path")
-                        continue
-                    success = self.editor.save(output)
-                    print("✅ Saved" if success else "❌ Save failed")
-
-                else:
-                    print(
-                        "❌ Unknown command or wrong arguments. Type 'help' for available commands."
-                    )
+                self._shell_command(split_command(command_line))
 
             except KeyboardInterrupt:
                 print("\n👋 Goodbye!")
@@ -438,6 +658,160 @@ class CLI:
             except Exception as e:
                 print(f"❌ Error: {e}")
 
+    def run_script(self, lines: Iterable[str], keep_going: bool = False,
+                   save: bool = True, output: Optional[str] = None) -> int:
+        """Run shell commands from a script against one loaded document.
+
+        Lines are split like shell input, except that quoted words may hold
+        spaces; blank lines and lines starting with ``#`` are skipped. The
+        document is saved once at the end if it has unsaved changes.
+
+        Args:
+            lines: Script lines
+            keep_going: Continue after a failed command
+            save: Save the document at the end
+            output: Path to save to (default: the loaded file)
+
+        Returns:
+            int: Number of failed commands
+        """
+        failures = 0
+        count = 0
+        for line_number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line == "exit":
+                break
+            count += 1
+            try:
+                ok = self._shell_command(split_command(line))
+            except Exception as e:
+                print(f"❌ Error: {e}")
+                ok = False
+            if not ok:
+                failures += 1
+                print(f"❌ Line {line_number}: {line}")
+                if not keep_going:
+                    print("⏹️  Stopped; nothing saved")
+                    return failures
+
+        if save and self.editor is not None and (self.editor.modified or output):
+            if self.editor.is_remote and not output:
+                print("❌ Remote file requires --output")
+                return failures + 1
+            self.editor.save(output)
+            print(f"💾 Saved {output or self.editor.file_path}")
+        print(f"✅ Ran {count - failures} of {count} commands")
+        return failures
+
+    def _shell_command(self, parts: List[str]) -> bool:
+        """Execute one shell command.
+
+        Args:
+            parts: Command name followed by its arguments
+
+        Returns:
+            bool: False if the command failed or was not understood
+        """
+        command = parts[0]
+
+        if command == "help":
+            print(
+                "Available commands: load, query, attr, set, setattr, extract, save, list, info, help, exit"
+            )
+            return True
+
+        if command == "load" and len(parts) == 2:
+            from .editor import FileEditor
+
+            self.editor = FileEditor(parts[1])
+            file_type = "remote" if parts[1].startswith("http") else "local"
+            print(f"✅ Loaded {file_type} file ({self.editor.file_type})")
+            return True
+
+        if command not in ("query", "attr", "set", "setattr", "extract", "list", "info", "save"):
+            print(
+                "❌ Unknown command or wrong arguments. Type 'help' for available commands."
+            )
+            return False
+        if not self.editor:
+            print("❌ No file loaded")
+            return False
+
+        if command == "query" and len(parts) >= 2:
+            xpath = " ".join(parts[1:])
+            result = self.editor.get_element_text(xpath)
+            print(f"Result: {result}")
+
+        elif command == "attr" and len(parts) >= 3:
+            xpath = parts[1]
+            attr_name = parts[2]
+            result = self.editor.get_element_attribute(xpath, attr_name)
+            print(f"Attribute {attr_name}: {result}")
+
+        elif command == "set" and len(parts) >= 3:
+            xpath = parts[1]
+            value = " ".join(parts[2:])
+            success = self.editor.set_element_text(xpath, value)
+            print("✅ Updated" if success else "❌ Not found")
+            return success
+
+        elif command == "setattr" and len(parts) >= 4:
+            xpath = parts[1]
+            attr_name = parts[2]
+            attr_value = " ".join(parts[3:])
+            success = self.editor.set_element_attribute(
+                xpath, attr_name, attr_value
+            )
+            print("✅ Updated" if success else "❌ Not found")
+            return success
+
+        elif command == "extract" and len(parts) >= 2:
+            xpath = " ".join(parts[1:])
+            result = self.editor.extract_data_uri(xpath)
+            if "error" in result:
+                print(f"❌ {result['error']}")
+                return False
+            print(
+                f"✅ MIME: {result['mime_type']}, Size: {result['size']} bytes"
+            )
+
+        elif command == "list":
+            xpath = parts[1] if len(parts) > 1 else "//*"
+            elements = self.editor.list_elements(xpath)[:10]  # limit to 10
+            for elem in elements:
+                text_preview = (
+                    elem["text"][:50] + "..."
+                    if len(elem["text"]) > 50
+                    else elem["text"]
+                )
+                print(f"{elem['tag']}: {repr(text_preview)}")
+
+        elif command == "info":
+            info = self.editor.get_info()
+            print(
+                f"File: {info['file_path']} ({info['file_type']}, {info['size']} bytes)"
+            )
+            if "elements_count" in info:
+                print(f"Elements: {info['elements_count']}")
+
+        elif command == "save":
+            output = parts[1] if len(parts) > 1 else None
+            if self.editor.is_remote and not output:
+                print("❌ Remote file requires output path")
+                return False
+            success = self.editor.save(output)
+            print("✅ Saved" if success else "❌ Save failed")
+            return bool(success)
+
+        else:
+            print(
+                "❌ Unknown command or wrong arguments. Type 'help' for available commands."
+            )
+            return False
+        return True
+
     def create_examples(self, directory: str):
         """Create example files for testing."""
         from .examples import create_example_files
@@ -449,6 +823,26 @@ class CLI:
             print(f"❌ Error creating examples: {e}")
 
 
+# One word of a shell or script line: quoted strings and [...] predicates
+# are kept whole, so XPaths and values may contain spaces
+_WORD_PATTERN = re.compile(r'''(?:'[^']*'|"[^"]*"|\[[^\]]*\]|[^\s'"\[]|['"\[])+''')
+
+
+def split_command(line: str) -> List[str]:
+    """Split a shell or script line into words, unquoting quoted words.
+
+    Args:
+        line: Command line, e.g. ``set //item[@id='a b'] "new value"``
+
+    Returns:
+        list: The words
+    """
+    return [
+        word[1:-1] if len(word) >= 2 and word[0] == word[-1] and word[0] in "'\"" else word
+        for word in _WORD_PATTERN.findall(line)
+    ]
+
+
 def main(args: List[str] = None) -> int:
     """Entry point for the xsl CLI command.
     
@@ -458,6 +852,12 @@ def main(args: List[str] = None) -> int:
     Returns:
         int: Exit code (0 for success, non-zero for error)
     """
+    argv = sys.argv[1:] if args is None else args
+    if daemon.should_forward(argv):
+        status = daemon.forward(argv)
+        if status is not None:
+            return status
+
     cli = CLI()
     try:
         cli.run(args)
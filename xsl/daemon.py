@@ -0,0 +1,336 @@
+"""
+Background daemon keeping parsed documents resident between xsl commands.
+
+Every ``xsl`` invocation is a new process, so without help each step of a
+pipeline (``xsl load``, ``xsl query``, ``xsl set``, ``xsl save``) would
+have nothing loaded. ``xsl load`` starts this daemon when it is not
+running, and the commands that work on the loaded document are sent to it
+over a Unix socket. The daemon runs them with the regular CLI, in the
+caller's working directory, and returns their output and exit status. It
+exits after an idle timeout or on ``xsl daemon stop``.
+"""
+
+import contextlib
+import io
+import json
+import os
+import socket
+import stat
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+# Commands that operate on the loaded document and run in the daemon
+DAEMON_COMMANDS = frozenset({
+    'load', 'query', 'set', 'add', 'remove', 'save', 'info', 'list',
+    'extract', 'externalize', 'internalize',
+})
+
+# Options that make a command independent of the loaded document
+LOCAL_OPTIONS = frozenset({'--stream', '--urls'})
+
+# Seconds without requests after which the daemon exits
+DEFAULT_IDLE_TIMEOUT = 1800.0
+
+# Seconds to wait for a newly started daemon to accept connections
+START_TIMEOUT = 5.0
+
+
+def available() -> bool:
+    """Check whether commands may be sent to a daemon (``XSL_NO_DAEMON`` disables it)."""
+    return hasattr(socket, 'AF_UNIX') and not os.environ.get('XSL_NO_DAEMON')
+
+
+def socket_path() -> str:
+    """Get the daemon socket path.
+
+    ``$XSL_SOCKET`` if set, else ``xsl/daemon.sock`` in ``$XDG_RUNTIME_DIR``,
+    else a per-user directory in the temp directory. The socket's directory
+    must be private to the user (see private_directory()).
+    """
+    if os.environ.get('XSL_SOCKET'):
+        return os.environ['XSL_SOCKET']
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.path.join(os.environ['XDG_RUNTIME_DIR'], 'xsl', 'daemon.sock')
+    return os.path.join(tempfile.gettempdir(), f"xsl-{os.getuid()}", 'daemon.sock')
+
+
+def private_directory(directory: str) -> bool:
+    """Check that a directory belongs to the current user and no one else can use it.
+
+    Otherwise another local user could have bound the socket there and would
+    receive every forwarded command line and forge its output.
+    """
+    try:
+        st = os.lstat(directory)
+    except OSError:
+        return False
+    return (stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid()
+            and not st.st_mode & 0o077)
+
+
+def _is_local_option(arg: str) -> bool:
+    """Check for one of LOCAL_OPTIONS as argparse accepts it.
+
+    That includes the ``--option=value`` form and unambiguous
+    abbreviations such as ``--str``.
+    """
+    name = arg.split('=', 1)[0]
+    return (len(name) > 2 and name.startswith('--')
+            and any(option.startswith(name) for option in LOCAL_OPTIONS))
+
+
+def should_forward(argv: List[str]) -> bool:
+    """Check whether a command line is one the daemon runs."""
+    return (bool(argv) and argv[0] in DAEMON_COMMANDS
+            and not any(_is_local_option(arg) for arg in argv[1:]) and available())
+
+
+class CLIDaemon:
+    """Unix socket server running CLI commands against resident documents.
+
+    Requests are handled one at a time, so commands of a pipeline apply in
+    order and the working directory can be switched per request.
+    """
+
+    def __init__(self, path: Optional[str] = None,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        """Initialize the daemon.
+
+        Args:
+            path: Socket path (default: socket_path())
+            idle_timeout: Seconds without requests before exiting
+        """
+        from .cli import CLI
+
+        self.path = path or socket_path()
+        self.idle_timeout = idle_timeout
+        self.cli = CLI(open_cached=True)
+        self.started = time.time()
+        self.requests = 0
+        self._running = False
+
+    def serve_forever(self):
+        """Accept requests until stopped or idle for idle_timeout seconds."""
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        st = os.lstat(directory)
+        if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid():
+            raise IOError(f"Socket directory {directory} belongs to another user")
+        if st.st_mode & 0o077:
+            os.chmod(directory, 0o700)
+        if os.path.exists(self.path):
+            conn = _connect(self.path)
+            if conn is not None:
+                conn.close()
+                raise IOError(f"A daemon is already listening on {self.path}")
+            os.unlink(self.path)
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+            server.bind(self.path)
+            server.listen()
+            server.settimeout(self.idle_timeout)
+            self._running = True
+            try:
+                while self._running:
+                    try:
+                        conn, _ = server.accept()
+                    except socket.timeout:
+                        break
+                    with conn:
+                        try:
+                            self._handle(conn)
+                        except OSError:
+                            pass  # Client went away
+            finally:
+                self._running = False
+                if os.path.exists(self.path):
+                    os.unlink(self.path)
+
+    def _handle(self, conn: socket.socket):
+        """Answer one request read from a connection."""
+        conn.settimeout(None)
+        data = _read_all(conn)
+        if not data:
+            return  # Connection check, e.g. by start()
+        try:
+            request = json.loads(data)
+        except ValueError:
+            response = {'stderr': "Invalid request\n", 'status': 2}
+        else:
+            self.requests += 1
+            if request.get('control') == 'stop':
+                self._running = False
+                response = {'stdout': "Daemon stopped\n", 'status': 0}
+            elif request.get('control') == 'status':
+                response = {'status': 0, 'info': self.info()}
+            else:
+                response = self.run(request.get('argv', []), request.get('cwd') or os.getcwd())
+        conn.sendall(json.dumps(response).encode('utf-8'))
+
+    def run(self, argv: List[str], cwd: str) -> Dict[str, Any]:
+        """Run a CLI command line in a working directory.
+
+        Args:
+            argv: Command line arguments
+            cwd: Directory relative paths are resolved against
+
+        Returns:
+            dict: Captured 'stdout' and 'stderr' and the exit 'status'
+        """
+        argv = list(argv)
+        if argv[:1] == ['load'] and len(argv) > 1 and '://' not in argv[1]:
+            # The document outlives this request's working directory
+            argv[1] = os.path.join(cwd, argv[1])
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        previous = os.getcwd()
+        status = 0
+        try:
+            os.chdir(cwd)
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                self.cli.run(argv)
+        except SystemExit as e:
+            status = e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            stderr.write(f"Error: {e}\n")
+            status = 1
+        finally:
+            os.chdir(previous)
+        return {'stdout': stdout.getvalue(), 'stderr': stderr.getvalue(), 'status': status}
+
+    def info(self) -> Dict[str, Any]:
+        """Get the daemon's state.
+
+        Returns:
+            dict: 'pid', 'uptime', 'requests' and the loaded 'file'
+        """
+        editor = self.cli.editor
+        return {
+            'pid': os.getpid(),
+            'uptime': time.time() - self.started,
+            'requests': self.requests,
+            'file': editor.file_path if editor is not None else None,
+        }
+
+
+def _read_all(conn: socket.socket) -> bytes:
+    """Read from a connection until the peer shuts down its side."""
+    chunks = []
+    for chunk in iter(lambda: conn.recv(65536), b''):
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def _connect(path: str) -> Optional[socket.socket]:
+    """Connect to a daemon socket, or return None if nothing listens there.
+
+    Sockets in a directory that is not private to the user are never
+    connected to.
+    """
+    if not private_directory(os.path.dirname(path) or '.'):
+        return None
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(path)
+    except OSError:
+        conn.close()
+        return None
+    return conn
+
+
+def request(message: Dict[str, Any], path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Send a request to the daemon.
+
+    Args:
+        message: {'argv': [...], 'cwd': ...} or {'control': 'stop'|'status'}
+        path: Socket path (default: socket_path())
+
+    Returns:
+        dict: The daemon's response, or None if no daemon is running
+    """
+    conn = _connect(path or socket_path())
+    if conn is None:
+        return None
+    with conn:
+        conn.sendall(json.dumps(message).encode('utf-8'))
+        conn.shutdown(socket.SHUT_WR)
+        return json.loads(_read_all(conn))
+
+
+def start(path: Optional[str] = None, idle_timeout: float = DEFAULT_IDLE_TIMEOUT) -> bool:
+    """Start a daemon in the background unless one is running.
+
+    Args:
+        path: Socket path (default: socket_path())
+        idle_timeout: Seconds without requests before it exits
+
+    Returns:
+        bool: True once a daemon accepts connections
+    """
+    path = path or socket_path()
+    directory = os.path.dirname(path) or '.'
+    if os.path.lexists(directory) and not private_directory(directory):
+        sys.stderr.write(f"xsl: not using daemon, {directory} is not private to this user\n")
+        return False
+    conn = _connect(path)
+    if conn is not None:
+        conn.close()
+        return True
+
+    import subprocess
+
+    subprocess.Popen(
+        [sys.executable, '-c', 'from xsl.daemon import serve; serve()',
+         '--socket', path, '--idle-timeout', str(idle_timeout)],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        conn = _connect(path)
+        if conn is not None:
+            conn.close()
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def forward(argv: List[str], path: Optional[str] = None) -> Optional[int]:
+    """Run a command line in the daemon, printing its output.
+
+    ``load`` starts the daemon if needed; other commands only use a running
+    one.
+
+    Args:
+        argv: Command line arguments
+        path: Socket path (default: socket_path())
+
+    Returns:
+        int: The command's exit status, or None if no daemon handled it
+    """
+    if argv[0] == 'load' and not start(path):
+        return None
+    response = request({'argv': argv, 'cwd': os.getcwd()}, path)
+    if response is None:
+        return None
+    sys.stdout.write(response.get('stdout', ''))
+    sys.stderr.write(response.get('stderr', ''))
+    return response.get('status', 0)
+
+
+def serve(argv: Optional[List[str]] = None):
+    """Run a daemon in the foreground with command line options."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="xsl document daemon")
+    parser.add_argument("--socket", help="Socket path")
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help="Seconds without requests before exiting")
+    args = parser.parse_args(argv)
+    CLIDaemon(args.socket, args.idle_timeout).serve_forever()
+
+
+if __name__ == "__main__":
+    serve()
@@ -6,59 +6,336 @@ Provides functionality for editing XML/HTML/SVG files with XPath and CSS selecto
 import os
 import re
 import base64
+import copy
 import logging
+import mmap
 import shutil
-from typing import Any, Dict, Optional, Union, List
+import threading
+from bisect import insort
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, Optional, Union, List
 from pathlib import Path
 import xml.etree.ElementTree as ET
 
-from .utils import is_data_uri, parse_data_uri
+from .blobstore import BLOB_URI_PATTERN, BLOB_URI_SCHEME, BlobStore, parse_blob_uri
+from .remote import get_fetcher
+from .splice import (
+    XMLNS_PATTERN,
+    SpliceError,
+    drop_inherited_declarations,
+    escape_attribute,
+    escape_text,
+    locate_elements,
+    write_spliced,
+)
+from .utils import (
+    CSS_DATA_URL_PATTERN,
+    DATA_URI_CHUNK_SIZE,
+    atomic_write,
+    decode_data_uri,
+    decode_data_uri_content_addressed,
+    extension_for_mime,
+    is_data_uri,
+    parse_data_uri,
+    parse_data_uri_header,
+    snapshot_file,
+)
 
+# requests is imported by xsl.remote on the first remote load; without
+# lxml, documents are parsed with xml.etree and XPath support is limited
 try:
-    from lxml import etree, html
+    from lxml import etree
     LXML_AVAILABLE = True
 except ImportError:
     LXML_AVAILABLE = False
-    print("Warning: lxml not available. Installing: pip install lxml")
 
-try:
-    from bs4 import BeautifulSoup
-    BS4_AVAILABLE = True
-except ImportError:
-    BS4_AVAILABLE = False
-    print("Warning: BeautifulSoup4 not available. Installing: pip install beautifulsoup4")
 
-try:
-    import requests
-    REQUESTS_AVAILABLE = True
-except ImportError:
-    REQUESTS_AVAILABLE = False
-    print("Warning: requests not available. Installing: pip install requests")
+class XPathCache:
+    """Process-wide, size-bounded LRU cache of compiled XPath expressions.
+
+    Compiled ``etree.XPath`` objects are keyed by the expression and the
+    namespace map they were compiled against, so the same expression used
+    with different prefix bindings never shares an entry.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        """Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of compiled expressions to keep
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, xpath: str, namespaces: Optional[Dict[str, str]] = None):
+        """Return a compiled XPath for the expression, compiling it on a miss.
+
+        Args:
+            xpath: XPath expression
+            namespaces: Prefix to namespace URI mapping
+
+        Returns:
+            etree.XPath: The compiled expression
+
+        Raises:
+            etree.XPathSyntaxError: If the expression cannot be compiled
+        """
+        key = (xpath, tuple(sorted((namespaces or {}).items())))
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compiled
+            self.misses += 1
+
+        compiled = etree.XPath(xpath, namespaces=namespaces)
+
+        with self._lock:
+            self._entries[key] = compiled
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def info(self) -> Dict[str, int]:
+        """Get cache statistics.
+
+        Returns:
+            dict: 'hits', 'misses', 'maxsize' and 'currsize' counters
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'maxsize': self.maxsize,
+                'currsize': len(self._entries),
+            }
+
+    def clear(self):
+        """Drop all compiled expressions and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Shared by every FileEditor in the process
+XPATH_CACHE = XPathCache()
+
+
+class DocumentCache:
+    """Process-wide, bounded LRU cache of parsed local documents.
+
+    Entries are keyed by real path and remember the (mtime_ns, size) of the
+    file they were parsed from; when a lookup finds the file changed on
+    disk, it is parsed again and the entry replaced. The cache is bounded
+    by entry count and by the estimated size of the cached trees.
+    """
+
+    def __init__(self, maxsize: int = 32, max_bytes: int = 256 * 1024 * 1024):
+        """Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of documents to keep
+            max_bytes: Maximum estimated size of the kept documents
+        """
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # real path -> (mtime_ns, size), editor, estimated size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, file_path: str) -> 'FileEditor':
+        """Return the parsed document of a local file, parsing it on a miss.
+
+        The returned editor is shared; callers must not modify it.
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            FileEditor: The cached editor
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            ValueError: If the file cannot be parsed
+        """
+        real_path = os.path.realpath(file_path)
+        stat = os.stat(real_path)
+        with self._lock:
+            entry = self._entries.get(real_path)
+            if entry is not None and entry[0] == (stat.st_mtime_ns, stat.st_size):
+                self._entries.move_to_end(real_path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        editor = FileEditor(real_path, keep_content=False)
+        size = editor.estimated_size()
+
+        with self._lock:
+            stale = self._entries.pop(real_path, None)
+            if stale is not None:
+                self._bytes -= stale[2]
+            self._entries[real_path] = (editor._source_stat, editor, size)
+            self._bytes += size
+            while len(self._entries) > 1 and (len(self._entries) > self.maxsize
+                                              or self._bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+        return editor
+
+    def info(self) -> Dict[str, int]:
+        """Get cache statistics.
+
+        Returns:
+            dict: 'hits', 'misses', 'evictions', 'maxsize', 'currsize',
+                'bytes' and 'max_bytes'
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'maxsize': self.maxsize,
+                'currsize': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def clear(self):
+        """Drop all documents and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+# Parsed documents handed out by FileEditor.open_cached
+DOCUMENT_CACHE = DocumentCache()
+
+# Background writer for FileEditor.save_async, started on first use; a
+# single thread keeps saves in the order they were requested
+_SAVE_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_SAVE_EXECUTOR_LOCK = threading.Lock()
+
+
+def _save_executor() -> ThreadPoolExecutor:
+    """Get the background writer, starting it if needed."""
+    global _SAVE_EXECUTOR
+    with _SAVE_EXECUTOR_LOCK:
+        if _SAVE_EXECUTOR is None:
+            _SAVE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix='xsl-save')
+        return _SAVE_EXECUTOR
+
+
+# Rough per-node cost of a parsed element (libxml2 node plus bookkeeping)
+_NODE_OVERHEAD = 120
+
+# XPaths selecting elements by @id alone, e.g. //svg:*[@id='logo'], which
+# FileEditor.query answers from its id index instead of scanning the tree
+ID_XPATH_PATTERN = re.compile(
+    r'^\s*//(?P<tag>\*|(?:[A-Za-z_][\w.\-]*:)?(?:[A-Za-z_][\w.\-]*|\*))'
+    r'\[\s*@id\s*=\s*(?:\'(?P<id>[^\']*)\'|"(?P<id_dq>[^"]*)")\s*\]\s*$'
+)
+
+# Update types accepted by FileEditor.apply_updates and their required keys
+UPDATE_OPS = {
+    'text': ('xpath', 'value'),
+    'attribute': ('xpath', 'attribute', 'value'),
+    'add': ('xpath', 'tag'),
+    'remove': ('xpath',),
+}
+
+# Attributes (by local name) that may hold a data URI
+DATA_URI_ATTRIBUTES = ('href', 'src', 'data')
+
+# Local files at least this large are parsed from a memory map when the raw
+# bytes are not kept, in chunks of MMAP_CHUNK_SIZE
+MMAP_THRESHOLD = 1024 * 1024
+MMAP_CHUNK_SIZE = 1024 * 1024
+
+# Documents loaded concurrently by extract_from_urls
+DEFAULT_FETCH_WORKERS = 8
+
+# Approximate size of the chunks produced by FileEditor.iter_bytes
+SERIALIZE_CHUNK_SIZE = 64 * 1024
+
+# Default namespaces for common XML formats
+DEFAULT_NAMESPACES = {
+    'svg': 'http://www.w3.org/2000/svg',
+    'xlink': 'http://www.w3.org/1999/xlink',
+    'html': 'http://www.w3.org/1999/xhtml',
+    'xhtml': 'http://www.w3.org/1999/xhtml'
+}
 
 
 class FileEditor:
     """Main class for XML/HTML/SVG file editing with XPath and CSS selector support."""
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, keep_content: bool = True,
+                 blob_store: Optional[BlobStore] = None, track_changes: bool = False):
         """Initialize FileEditor with a file path or URL.
         
         Args:
             file_path: Path to file or URL
+            keep_content: If False, drop the raw file bytes once the tree is
+                built; ``original_content`` is then None
+            blob_store: Store that resolves externalized data URI references
+            track_changes: Record the elements changed through this editor so
+                save() rewrites only their byte ranges in the source file
             
         Raises:
             ValueError: If the file cannot be loaded or parsed
         """
+        self._init_state(file_path, keep_content, blob_store, track_changes)
+        self._load_file()
+
+    def _init_state(self, file_path: str, keep_content: bool,
+                    blob_store: Optional[BlobStore], track_changes: bool):
+        """Set up an editor with no document loaded."""
         self.file_path = file_path
         self.tree = None
-        self.original_content = None
-        # Default namespaces for common XML formats
-        self.ns = {
-            'svg': 'http://www.w3.org/2000/svg',
-            'xlink': 'http://www.w3.org/1999/xlink',
-            'html': 'http://www.w3.org/1999/xhtml',
-            'xhtml': 'http://www.w3.org/1999/xhtml'
-        }
-        self._load_file()
+        self.keep_content = keep_content
+        self.blob_store = blob_store
+        # Raw bytes as loaded; decoded into original_content on first access
+        self._raw_content: Optional[bytes] = None
+        self._decoded_content: Optional[str] = None
+        self.content_size = 0
+        # True once the tree has been changed and not yet saved
+        self.modified = False
+        self.ns = dict(DEFAULT_NAMESPACES)
+        # id attribute value -> elements in document order, built on first use
+        self._id_index: Optional[Dict[str, List[Any]]] = None
+        # Changes since the source was parsed, keyed by each changed
+        # element's child-index path in the source (see xsl.splice)
+        self.track_changes = track_changes
+        self._changes: Dict[tuple, Dict[str, Any]] = {}
+        self._removed_children: Dict[tuple, List[int]] = {}
+        self._new_elements: set = set()
+        self._changes_valid = True
+        # (mtime_ns, size) of the local file the tree was parsed from, and
+        # whether the kept raw bytes are still that source
+        self._source_stat: Optional[tuple] = None
+        self._raw_is_source = True
+        # Tree shared with DOCUMENT_CACHE (see open_cached); copied before
+        # the first change unless the handle is read-only
+        self._shared = False
+        self.read_only = False
     
     @property
     def is_remote(self) -> bool:
@@ -72,25 +349,140 @@ class FileEditor:
                  self.file_path.startswith('https://') or
                  self.file_path.startswith('ftp://')))
 
+    @property
+    def original_content(self) -> Optional[str]:
+        """The file content as loaded, decoded as UTF-8 on first access.
+
+        Returns:
+            str: The decoded content, or None if it was not kept
+        """
+        if self._decoded_content is None and self._raw_content is not None:
+            self._decoded_content = self._raw_content.decode('utf-8')
+        return self._decoded_content
+
+    @original_content.setter
+    def original_content(self, value: Optional[str]):
+        self._decoded_content = value
+        self._raw_is_source = False
+        self._raw_content = value.encode('utf-8') if value is not None else None
+
     def _load_file(self):
         """Load file content from path or URL."""
         if not self.file_path:
             raise ValueError("No file path provided")
             
         if self.is_remote:
-            import requests
-            try:
-                response = requests.get(self.file_path)
-                response.raise_for_status()
-                content = response.content
-            except Exception as e:
-                raise IOError(f"Failed to fetch remote file: {str(e)}")
+            if LXML_AVAILABLE:
+                self._load_stream(self._remote_chunks())
+                return
+            content = b''.join(self._remote_chunks())
         else:
+            stat = os.stat(self.file_path)
+            self._source_stat = (stat.st_mtime_ns, stat.st_size)
+            if (not self.keep_content and LXML_AVAILABLE
+                    and stat.st_size >= MMAP_THRESHOLD):
+                self._load_mmap()
+                return
             with open(self.file_path, 'rb') as f:
                 content = f.read()
         
-        self.original_content = content.decode('utf-8')
+        self.content_size = len(content)
         self._parse_content(content)
+        if self.keep_content:
+            self._raw_content = content
+
+    def _remote_chunks(self):
+        """Yield the body of the remote file as it downloads.
+
+        Raises:
+            IOError: If the download fails or exceeds the fetcher's max_size
+        """
+        try:
+            yield from get_fetcher().iter_content(self.file_path)
+        except Exception as e:
+            raise IOError(f"Failed to fetch remote file: {str(e)}")
+
+    def _load_stream(self, chunks):
+        """Parse content while it arrives, keeping the bytes if requested.
+
+        Args:
+            chunks: Iterable of bytes chunks
+
+        Raises:
+            ValueError: If the content cannot be parsed
+        """
+        kept = []
+        self.content_size = 0
+
+        def counted():
+            for chunk in chunks:
+                self.content_size += len(chunk)
+                if self.keep_content:
+                    kept.append(chunk)
+                yield chunk
+
+        self._parse_chunks(counted())
+        if self.keep_content:
+            self._raw_content = b''.join(kept)
+
+    def _load_mmap(self):
+        """Parse a local file by feeding lxml from a read-only memory map.
+
+        The parser receives fixed-size chunks of the mapped region, so no
+        full-size copy of the file is made on the heap and the pages stay
+        shareable through the OS page cache. Content lxml rejects is
+        parsed with the standard library, from the same map, as
+        _parse_content() does.
+
+        Raises:
+            ValueError: If the content cannot be parsed
+        """
+        with open(self.file_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                self.content_size = len(mapped)
+
+                def chunks():
+                    for offset in range(0, len(mapped), MMAP_CHUNK_SIZE):
+                        yield mapped[offset:offset + MMAP_CHUNK_SIZE]
+
+                try:
+                    self._parse_chunks(chunks())
+                    return
+                except ValueError as e:
+                    logging.warning(f"Failed to parse with lxml: {e}")
+
+                parser = ET.XMLParser()
+                try:
+                    for chunk in chunks():
+                        parser.feed(chunk)
+                    self.tree = parser.close()
+                except ET.ParseError as e:
+                    raise ValueError(f"Cannot parse file: {str(e)}")
+
+    def _parse_chunks(self, chunks):
+        """Parse content arriving in chunks with lxml's feed parser.
+
+        Args:
+            chunks: Iterable of bytes chunks
+
+        Raises:
+            ValueError: If the content cannot be parsed
+        """
+        parser = etree.XMLParser()
+        try:
+            for chunk in chunks:
+                parser.feed(chunk)
+            self.tree = parser.close()
+        except etree.XMLSyntaxError as e:
+            raise ValueError(f"Cannot parse file: {str(e)}")
+        self._register_namespaces()
+
+    def _register_namespaces(self):
+        """Add the prefixes declared on the root element to self.ns."""
+        if hasattr(self.tree, 'nsmap'):
+            for prefix, uri in self.tree.nsmap.items():
+                if prefix is not None:  # Skip default namespace
+                    self.ns[prefix] = uri
 
     def _parse_content(self, content: bytes):
         """Parse file content with appropriate parser.
@@ -105,10 +497,7 @@ class FileEditor:
             try:
                 self.tree = etree.fromstring(content)
                 # Update namespaces from the document
-                if hasattr(self.tree, 'nsmap'):
-                    for prefix, uri in self.tree.nsmap.items():
-                        if prefix is not None:  # Skip default namespace
-                            self.ns[prefix] = uri
+                self._register_namespaces()
                 return
             except etree.XMLSyntaxError as e:
                 logging.warning(f"Failed to parse with lxml: {e}")
@@ -137,8 +526,11 @@ class FileEditor:
             
         try:
             if LXML_AVAILABLE:
-                # Register namespaces with lxml
-                return self.tree.xpath(xpath, namespaces=self.ns)
+                by_id = self._query_id_index(xpath)
+                if by_id is not None:
+                    return by_id
+                # Reuse the compiled expression for these namespaces
+                return XPATH_CACHE.get(xpath, self.ns)(self.tree)
             else:
                 # Basic XPath support with standard library
                 # Replace namespace prefixes in XPath for standard library
@@ -150,6 +542,165 @@ class FileEditor:
         except Exception as e:
             raise ValueError(f"Invalid XPath expression '{xpath}': {str(e)}")
 
+    def _get_id_index(self) -> Dict[str, List[Any]]:
+        """Get the id -> elements index, building it on first use."""
+        if self._id_index is None:
+            index: Dict[str, List[Any]] = {}
+            for elem in self.tree.iter(etree.Element):
+                elem_id = elem.get('id')
+                if elem_id is not None:
+                    index.setdefault(elem_id, []).append(elem)
+            self._id_index = index
+        return self._id_index
+
+    def invalidate_id_index(self):
+        """Drop the id index, e.g. after editing ``tree`` directly.
+
+        Edits made through FileEditor methods keep the index up to date.
+        """
+        self._id_index = None
+
+    def mark_tree_edited(self):
+        """Declare that ``tree`` was edited directly, not through FileEditor.
+
+        Drops the id index and makes the next save() serialize the whole
+        tree, since such edits are not in the change log.
+        """
+        self._prepare_write()
+        self._id_index = None
+        self._changes_valid = False
+        self.modified = True
+
+    def _query_id_index(self, xpath: str) -> Optional[List[Any]]:
+        """Answer a ``//tag[@id='x']`` XPath from the id index.
+
+        Args:
+            xpath: XPath expression
+
+        Returns:
+            list: Matching elements in document order, or None if the
+                expression is not a plain id lookup
+        """
+        match = ID_XPATH_PATTERN.match(xpath)
+        if match is None:
+            return None
+        tag = match.group('tag')
+        elem_id = match.group('id') if match.group('id') is not None else match.group('id_dq')
+
+        # Elements match by exact name, or when that is None, by the
+        # prefix of their Clark-notation name
+        prefix, exact = '', None
+        if ':' in tag:
+            ns_prefix, local = tag.split(':', 1)
+            if ns_prefix not in self.ns:
+                # Let XPath report the undefined prefix
+                return None
+            namespace = f"{{{self.ns[ns_prefix]}}}"
+            if local == '*':
+                prefix = namespace
+            else:
+                exact = namespace + local
+        elif tag != '*':
+            # Unprefixed names select elements in no namespace, as in XPath
+            exact = tag
+
+        return [
+            elem for elem in self._get_id_index().get(elem_id, ())
+            if (elem.tag == exact if exact is not None else elem.tag.startswith(prefix))
+            and elem.get('id') == elem_id
+        ]
+
+    def _index_id(self, elem, elem_id: Optional[str]):
+        """Record in the id index that ``elem`` carries ``elem_id``."""
+        if self._id_index is None or elem_id is None:
+            return
+        if elem_id in self._id_index:
+            # Duplicate id: rebuild on next use to keep document order
+            self._id_index = None
+        else:
+            self._id_index[elem_id] = [elem]
+
+    def _unindex_id(self, elem, elem_id: Optional[str]):
+        """Remove ``elem`` from the id index entry of ``elem_id``."""
+        if self._id_index is None or elem_id is None:
+            return
+        entries = self._id_index.get(elem_id)
+        if entries and elem in entries:
+            entries.remove(elem)
+            if not entries:
+                del self._id_index[elem_id]
+
+    @staticmethod
+    def xpath_cache_info() -> Dict[str, int]:
+        """Get statistics of the shared compiled XPath cache.
+
+        Returns:
+            dict: 'hits', 'misses', 'maxsize' and 'currsize' counters
+        """
+        return XPATH_CACHE.info()
+
+    @classmethod
+    def open_cached(cls, file_path: str, read_only: bool = False,
+                    blob_store: Optional[BlobStore] = None,
+                    track_changes: bool = False) -> 'FileEditor':
+        """Open a local file through the shared parsed-document cache.
+
+        The returned editor shares the cached tree while it is only read;
+        the first change made through its methods copies the tree, so the
+        cached document is never modified. Do not edit ``tree`` directly.
+        Cached documents do not keep their raw bytes (``original_content``
+        is None). URLs are loaded without caching.
+
+        Args:
+            file_path: Path to the file
+            read_only: Make changes raise ValueError instead of copying
+            blob_store: Store that resolves externalized data URI references
+            track_changes: See FileEditor
+
+        Returns:
+            FileEditor: An editor over the cached document
+        """
+        if file_path.startswith(('http://', 'https://', 'ftp://')):
+            editor = cls(file_path, blob_store=blob_store, track_changes=track_changes)
+            editor.read_only = read_only
+            return editor
+        cached = DOCUMENT_CACHE.get(file_path)
+        editor = cls.__new__(cls)
+        editor._init_state(file_path, False, blob_store, track_changes)
+        editor.tree = cached.tree
+        editor.ns = dict(cached.ns)
+        editor.content_size = cached.content_size
+        editor._source_stat = cached._source_stat
+        editor._shared = True
+        editor.read_only = read_only
+        return editor
+
+    @staticmethod
+    def document_cache_info() -> Dict[str, int]:
+        """Get statistics of the shared parsed-document cache.
+
+        Returns:
+            dict: 'hits', 'misses', 'evictions', 'maxsize', 'currsize',
+                'bytes' and 'max_bytes'
+        """
+        return DOCUMENT_CACHE.info()
+
+    def _prepare_write(self):
+        """Copy a tree shared through open_cached() before changing it.
+
+        Raises:
+            ValueError: If the editor is read-only
+        """
+        if self.read_only:
+            raise ValueError(f"{self.file_path} is opened read-only")
+        if self._shared:
+            if hasattr(self.tree, 'getroottree'):
+                self.tree = copy.deepcopy(self.tree.getroottree()).getroot()
+            else:
+                self.tree = copy.deepcopy(self.tree)
+            self._shared = False
+            self._id_index = None
+
     def set_value(self, xpath: str, value: str) -> bool:
         """Set value of elements matching XPath.
         
@@ -160,21 +711,37 @@ class FileEditor:
         Returns:
             True if successful
         """
+        self._prepare_write()
         elements = self.query(xpath)
         if not elements:
             return False
             
         for elem in elements:
-            if hasattr(elem, 'text'):
-                elem.text = value
+            if self._set_text(elem, value):
+                self.modified = True
         return True
 
-    def save(self, output_path: str = None, create_backup: bool = False) -> str:
+    def save(self, output_path: str = None, create_backup: bool = False,
+             pretty_print: bool = True) -> str:
         """Save changes to file.
+
+        The file is written atomically: the content goes to a temporary file
+        in the same directory, which is fsynced and renamed over the target,
+        so a crash never leaves a truncated file.
+
+        With ``track_changes``, only the byte ranges of the elements changed
+        through this editor are rewritten and the rest of the source is
+        copied through unchanged. The whole tree is serialized instead when
+        that is not possible (no source bytes, source file changed on disk,
+        entity declarations, encodings that are not ASCII-compatible,
+        direct edits of ``tree``).
         
         Args:
             output_path: Output file path (default: overwrite original)
-            create_backup: If True, create a backup before saving
+            create_backup: If True, snapshot the existing file as
+                ``<output_path>.bak`` (a hard link) before saving
+            pretty_print: Indent a fully serialized tree; False writes the
+                tree as it is, streamed in chunks (see iter_bytes())
             
         Returns:
             Path to saved file
@@ -184,28 +751,348 @@ class FileEditor:
         """
         output_path = output_path or self.file_path
         
-        if create_backup and os.path.exists(output_path):
-            backup_path = f"{output_path}.bak"
-            import shutil
-            shutil.copy2(output_path, backup_path)
-        
         try:
-            if LXML_AVAILABLE:
-                etree.ElementTree(self.tree).write(
-                    output_path,
-                    encoding='utf-8',
-                    xml_declaration=True,
-                    pretty_print=True
-                )
-            else:
-                ET.ElementTree(self.tree).write(
-                    output_path,
-                    encoding='utf-8',
-                    xml_declaration=True
-                )
+            if create_backup and os.path.exists(output_path):
+                snapshot_file(output_path, f"{output_path}.bak")
+
+            if not self._save_incremental(output_path):
+                with atomic_write(output_path) as f:
+                    if LXML_AVAILABLE and pretty_print:
+                        etree.ElementTree(self.tree).write(
+                            f,
+                            encoding='utf-8',
+                            xml_declaration=True,
+                            pretty_print=True
+                        )
+                    else:
+                        for chunk in self.iter_bytes():
+                            f.write(chunk)
+            self.modified = False
+            if self._is_source_file(output_path):
+                self._reset_changes()
             return output_path
         except Exception as e:
             raise IOError(f"Failed to save file {output_path}: {str(e)}")
+
+    def save_async(self, output_path: str = None, create_backup: bool = False,
+                   lock=None) -> Future:
+        """Save changes on a background writer thread.
+
+        Saves are written one at a time, in the order they were requested.
+        The editor must not be modified while the save runs; callers that
+        share it between threads pass the lock guarding their edits, which
+        is held for the duration of the save.
+
+        Args:
+            output_path: Output file path (default: overwrite original)
+            create_backup: If True, snapshot the existing file first
+            lock: Lock to hold while saving
+
+        Returns:
+            Future: Resolves to the saved path, or raises IOError
+        """
+        def run():
+            if lock is None:
+                return self.save(output_path, create_backup)
+            with lock:
+                return self.save(output_path, create_backup)
+
+        return _save_executor().submit(run)
+
+    def iter_bytes(self, pretty_print: bool = False,
+                   chunk_size: int = SERIALIZE_CHUNK_SIZE) -> Iterator[bytes]:
+        """Serialize the document as UTF-8 XML in chunks.
+
+        Compact output is produced one top-level child of the root at a
+        time, so memory use is bounded by the largest child rather than the
+        whole document. Pretty-printed output (and documents with an
+        internal DTD subset) are serialized at once and then sliced.
+
+        Args:
+            pretty_print: Indent the output
+            chunk_size: Approximate size of the chunks yielded
+
+        Yields:
+            bytes: Consecutive pieces of the serialized document
+        """
+        if self.tree is None:
+            raise ValueError("No document loaded")
+        if not LXML_AVAILABLE:
+            data = ET.tostring(self.tree, encoding='UTF-8', xml_declaration=True)
+            for offset in range(0, len(data), chunk_size):
+                yield data[offset:offset + chunk_size]
+            return
+
+        doc = self.tree.getroottree()
+        dtd = doc.docinfo.internalDTD
+        if pretty_print or (dtd is not None and (any(dtd.iterelements()) or any(dtd.entities()))):
+            data = etree.tostring(doc, encoding='UTF-8', xml_declaration=True,
+                                  pretty_print=pretty_print)
+            for offset in range(0, len(data), chunk_size):
+                yield data[offset:offset + chunk_size]
+            return
+
+        root = doc.getroot()
+        # The root's own tags, from a childless copy with the same text
+        shell = etree.Element(root.tag, dict(root.attrib), nsmap=root.nsmap)
+        shell.text = root.text if len(root) == 0 else root.text or ''
+        frame = etree.tostring(shell, encoding='utf-8')
+        close_at = frame.rindex(b'</') if len(root) else len(frame)
+
+        buffer = bytearray(b"<?xml version='1.0' encoding='UTF-8'?>\n")
+        if doc.docinfo.doctype:
+            buffer += doc.docinfo.doctype.encode('utf-8') + b'\n'
+        for sibling in reversed(list(root.itersiblings(preceding=True))):
+            buffer += etree.tostring(sibling, encoding='utf-8', with_tail=False)
+        buffer += frame[:close_at]
+        for child in root:
+            buffer += drop_inherited_declarations(
+                etree.tostring(child, encoding='utf-8'), root.nsmap, 'utf-8')
+            if len(buffer) >= chunk_size:
+                yield bytes(buffer)
+                buffer.clear()
+        buffer += frame[close_at:]
+        for sibling in root.itersiblings():
+            buffer += etree.tostring(sibling, encoding='utf-8', with_tail=False)
+        yield bytes(buffer)
+
+    def tostring(self, pretty_print: bool = False) -> bytes:
+        """Serialize the document as UTF-8 XML.
+
+        Args:
+            pretty_print: Indent the output
+
+        Returns:
+            bytes: The serialized document
+        """
+        return b''.join(self.iter_bytes(pretty_print))
+
+    def _is_source_file(self, path: str) -> bool:
+        """Check whether a path is the local file the editor was loaded from."""
+        return (not self.is_remote and os.path.exists(path)
+                and os.path.realpath(path) == os.path.realpath(self.file_path))
+
+    def _reset_changes(self):
+        """Make the file just saved the new source of incremental saves."""
+        self._changes.clear()
+        self._removed_children.clear()
+        self._new_elements.clear()
+        self._changes_valid = True
+        stat = os.stat(self.file_path)
+        self._source_stat = (stat.st_mtime_ns, stat.st_size)
+        self._raw_is_source = False
+
+    def _source_path(self, elem) -> Optional[tuple]:
+        """Get the child-index path of an element in the source document.
+
+        Returns:
+            tuple: Indices among the parent's child nodes from the root
+                down, or None if the element was added after loading
+        """
+        chain = []
+        node = elem
+        while node is not None:
+            if node in self._new_elements:
+                return None
+            chain.append(node)
+            node = node.getparent()
+        chain.reverse()
+
+        path = ()
+        for parent, child in zip(chain, chain[1:]):
+            index = parent.index(child)
+            # Children removed since loading no longer count, so step over them
+            for removed in self._removed_children.get(path, ()):
+                if removed > index:
+                    break
+                index += 1
+            path += (index,)
+        return path
+
+    def _record_change(self, elem, kind: str, child=None):
+        """Log a change to a source element for the next incremental save.
+
+        Args:
+            elem: The changed element
+            kind: 'attributes', 'text', 'added' (``child`` was appended) or
+                'removed' (called before the element is detached)
+            child: The appended element, for 'added'
+        """
+        if not self.track_changes or not self._changes_valid:
+            return
+        if not hasattr(elem, 'getparent'):
+            self._changes_valid = False
+            return
+
+        if kind == 'removed' and elem in self._new_elements:
+            # Never saved: just forget about it
+            self._new_elements.discard(elem)
+            parent_path = self._source_path(elem.getparent())
+            if parent_path in self._changes:
+                added = self._changes[parent_path]['added']
+                if elem in added:
+                    added.remove(elem)
+            return
+
+        path = self._source_path(elem)
+        if kind == 'added':
+            self._new_elements.add(child)
+        if path is None:
+            # Inside an added element, which is written out whole
+            return
+
+        change = self._changes.setdefault(path, {
+            'element': elem, 'attributes': False, 'text': False,
+            'added': [], 'removed': False,
+        })
+        if kind == 'added':
+            change['added'].append(child)
+        else:
+            change[kind] = True
+        if kind == 'removed' and path:
+            insort(self._removed_children.setdefault(path[:-1], []), path[-1])
+
+    @contextmanager
+    def _open_source(self):
+        """Yield the bytes the change log refers to, or None if unavailable."""
+        if self._raw_is_source and self._raw_content is not None:
+            yield self._raw_content
+            return
+        if not self.is_remote and self._source_stat is not None:
+            try:
+                stat = os.stat(self.file_path)
+            except OSError:
+                stat = None
+            if stat is not None and stat.st_size and \
+                    (stat.st_mtime_ns, stat.st_size) == self._source_stat:
+                with open(self.file_path, 'rb') as f:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        yield mapped
+                return
+        yield None
+
+    def _save_incremental(self, output_path: str) -> bool:
+        """Write the source with only the changed byte ranges replaced.
+
+        Returns:
+            bool: False if the whole tree has to be serialized instead
+        """
+        if not (self.track_changes and self._changes_valid and LXML_AVAILABLE
+                and hasattr(self.tree, 'getroottree')):
+            return False
+        encoding = self.tree.getroottree().docinfo.encoding or 'UTF-8'
+        try:
+            if '<a b="c"/>'.encode(encoding) != b'<a b="c"/>':
+                return False
+        except LookupError:
+            return False
+
+        with self._open_source() as source:
+            if source is None:
+                return False
+            try:
+                edits = self._splice_edits(source, encoding)
+            except SpliceError as e:
+                logging.info(f"Incremental save not possible, serializing the tree: {e}")
+                return False
+            # The source may be mapped from the output file; the new file
+            # replaces it by rename, so the mapping stays valid meanwhile
+            with atomic_write(output_path) as f:
+                write_spliced(source, edits, f)
+        return True
+
+    def _splice_edits(self, source, encoding: str) -> List[tuple]:
+        """Turn the change log into sorted (start, end, replacement) byte edits.
+
+        Raises:
+            SpliceError: If the source does not match the change log
+        """
+        locations = locate_elements(source, self._changes.keys())
+        edits = []
+        for path, change in self._changes.items():
+            location = locations[path]
+            elem = change['element']
+            local = location['name'].rsplit(b':', 1)[-1].decode(encoding)
+            if local != etree.QName(elem).localname:
+                raise SpliceError(f"Source element <{local}> does not match the tree")
+
+            if change['removed']:
+                # The tail goes with the element, as in the tree
+                edits.append((location['start'], location['tail_end'], 0, b''))
+                continue
+            added = [child for child in change['added'] if child.getparent() is elem]
+            if location['empty'] and (change['text'] or added):
+                edits.append((location['start'], location['end'], 0,
+                              self._fragment(elem, encoding, with_tail=False)))
+                continue
+            if change['attributes']:
+                edits.append((location['start'], location['start_end'], 1,
+                              self._start_tag(elem, source, location, encoding)))
+            if change['text']:
+                edits.append((location['start_end'], location['text_end'], 2,
+                              escape_text(elem.text or '').encode(encoding, 'xmlcharrefreplace')))
+            if added:
+                edits.append((location['end_tag_start'], location['end_tag_start'], 3,
+                              b''.join(self._fragment(child, encoding) for child in added)))
+
+        # Outer ranges first, so edits inside a removed or rewritten element
+        # are dropped
+        edits.sort(key=lambda edit: (edit[0], -edit[1], edit[2]))
+        result = []
+        covered = 0
+        for start, end, _, replacement in edits:
+            if start < covered:
+                if end <= covered:
+                    continue
+                raise SpliceError("Overlapping edits")
+            result.append((start, end, replacement))
+            covered = max(covered, end)
+        return result
+
+    @staticmethod
+    def _fragment(elem, encoding: str, with_tail: bool = True) -> bytes:
+        """Serialize an element for insertion at its place in the source."""
+        parent = elem.getparent()
+        return drop_inherited_declarations(
+            etree.tostring(elem, encoding=encoding, with_tail=with_tail, xml_declaration=False),
+            parent.nsmap if parent is not None else {},
+            encoding,
+        )
+
+    def _start_tag(self, elem, source, location: Dict[str, Any], encoding: str) -> bytes:
+        """Serialize the start tag of a source element with its current attributes.
+
+        The raw tag name and namespace declarations are kept as in the source.
+
+        Raises:
+            SpliceError: If an attribute namespace has no prefix in scope
+        """
+        declared = {}
+        for match in XMLNS_PATTERN.finditer(source, location['start'], location['start_end']):
+            prefix = match.group('prefix')
+            declared[prefix.decode(encoding) if prefix else None] = match.group('decl')
+        parent = elem.getparent()
+        inherited = parent.nsmap if parent is not None else {}
+        parts = [b'<', location['name']]
+        parts.extend(b' ' + decl for decl in declared.values())
+        for prefix, uri in elem.nsmap.items():
+            if prefix not in declared and inherited.get(prefix) != uri:
+                name = f"xmlns:{prefix}" if prefix else "xmlns"
+                parts.append(f' {name}="{escape_attribute(uri)}"'.encode(encoding))
+
+        for name, value in elem.attrib.items():
+            if name.startswith('{'):
+                uri, local = name[1:].split('}', 1)
+                if uri == 'http://www.w3.org/XML/1998/namespace':
+                    prefix = 'xml'
+                else:
+                    prefix = next((p for p, u in elem.nsmap.items() if u == uri and p), None)
+                    if prefix is None:
+                        raise SpliceError(f"No prefix for attribute namespace {uri}")
+                name = f"{prefix}:{local}"
+            parts.append(f' {name}="{escape_attribute(value)}"'.encode(encoding, 'xmlcharrefreplace'))
+        parts.append(b'/>' if location['empty'] else b'>')
+        return b''.join(parts)
     
     def find_by_xpath(self, xpath: str) -> list:
         """Find elements by XPath.
@@ -291,13 +1178,13 @@ class FileEditor:
             for elem in elements:
                 # If we have a specific attribute, check that first
                 if attr:
-                    uri = self._get_attribute(elem, attr)
+                    uri = self._resolve_blob(self._get_attribute(elem, attr))
                     if uri and is_data_uri(uri):
                         try:
                             result = parse_data_uri(uri)
                             # For image data, ensure we keep the original mime type
                             if 'image/' in result.get('mime_type', ''):
-                                result['base64_data'] = uri.split(',', 1)[1]  # Store base64 data
+                                result['base64_data'] = result['data']  # Store base64 data
                                 result['data'] = result['base64_data']  # Keep for backward compatibility
                                 result['size'] = len(result['base64_data'])  # Add size field
                             result['xpath'] = xpath
@@ -311,13 +1198,13 @@ class FileEditor:
                 
                 # Otherwise check common attributes
                 for attr_name in ['xlink:href', 'href', 'data', 'src']:
-                    uri = self._get_attribute(elem, attr_name)
+                    uri = self._resolve_blob(self._get_attribute(elem, attr_name))
                     if uri and is_data_uri(uri):
                         try:
                             result = parse_data_uri(uri)
                             # For image data, ensure we keep the original mime type
                             if 'image/' in result.get('mime_type', ''):
-                                result['base64_data'] = uri.split(',', 1)[1]  # Store base64 data
+                                result['base64_data'] = result['data']  # Store base64 data
                                 result['data'] = result['base64_data']  # Keep for backward compatibility
                                 result['size'] = len(result['base64_data'])  # Add size field
                             result['xpath'] = xpath
@@ -342,29 +1229,332 @@ class FileEditor:
                 'data': ''
             }
     
-    def _get_attribute(self, element, name: str) -> str:
-        """Get an attribute from an element, handling namespaces.
-        
+    def _find_data_uri(self, xpath: str) -> Optional[str]:
+        """Find the first data URI addressed by an XPath.
+
+        The XPath may select attribute values directly (e.g. ending in
+        ``/@xlink:href``) or select elements whose common reference
+        attributes are searched.
+
         Args:
-            element: The XML element
-            name: Attribute name (can include namespace prefix)
-            
+            xpath: XPath to an element or attribute
+
         Returns:
-            The attribute value or None if not found
+            The data URI string or blob reference, or None if not found
         """
-        if not hasattr(element, 'get'):
-            return None
-            
-        # Try direct attribute first
-        value = element.get(name)
-        if value is not None:
-            return value
-            
-        # Try with xlink: prefix
-        if name.startswith('xlink:'):
-            return element.get(f"{{{self.ns.get('xlink', '')}}}{name[6:]}")
-            
-        # Try with full namespace
+        for match in self.query(xpath):
+            if isinstance(match, str):
+                if is_data_uri(match) or self._is_resolvable_blob(match):
+                    return match
+                continue
+            for name in ['xlink:href', 'href', 'data', 'src']:
+                uri = self._get_attribute(match, name)
+                if uri and (is_data_uri(uri) or self._is_resolvable_blob(uri)):
+                    return uri
+        return None
+
+    def _is_resolvable_blob(self, uri: str) -> bool:
+        """Check for a blob reference that the configured store can resolve."""
+        return self.blob_store is not None and parse_blob_uri(uri) is not None
+
+    def _resolve_blob(self, uri: Optional[str]) -> Optional[str]:
+        """Re-inline a blob reference as a data URI; other values pass through."""
+        if uri and self._is_resolvable_blob(uri):
+            return self.blob_store.to_data_uri(uri)
+        return uri
+
+    def write_data_uri(self, xpath: str, stream,
+                       chunk_size: int = DATA_URI_CHUNK_SIZE) -> Dict[str, Any]:
+        """Decode a data URI straight into a writable binary stream.
+
+        The payload is decoded and validated in fixed-size chunks, so peak
+        memory stays at one chunk regardless of the embedded file's size.
+
+        Args:
+            xpath: XPath to the element or attribute holding the data URI
+            stream: Writable binary stream
+            chunk_size: Payload characters decoded per step
+
+        Returns:
+            dict: 'mime_type', 'charset', 'is_base64', 'size' (bytes written)
+                and 'xpath'
+
+        Raises:
+            ValueError: If no data URI is found or it is invalid
+        """
+        uri = self._find_data_uri(xpath)
+        if uri is None:
+            raise ValueError(f"No data URI found for '{xpath}'")
+        return self._write_found_data_uri(uri, xpath, stream, chunk_size)
+
+    def _write_found_data_uri(self, uri: str, xpath: str, stream,
+                              chunk_size: int = DATA_URI_CHUNK_SIZE) -> Dict[str, Any]:
+        """Decode a data URI or blob reference found by _find_data_uri()."""
+        blob = parse_blob_uri(uri)
+        if blob is not None:
+            # Externalized payload: copy the stored bytes as they are
+            mime, digest = blob
+            with self.blob_store.open(digest) as f:
+                shutil.copyfileobj(f, stream, chunk_size)
+                size = f.tell()
+            return {'mime_type': mime, 'charset': 'utf-8', 'is_base64': True,
+                    'size': size, 'xpath': xpath}
+        result = decode_data_uri(uri, stream, chunk_size)
+        result['xpath'] = xpath
+        return result
+
+    def save_data_uri_to_file(self, xpath: str, output_path: str) -> bool:
+        """Decode a data URI into a file.
+
+        Args:
+            xpath: XPath to the element or attribute holding the data URI
+            output_path: File to write the decoded content to
+
+        The data URI is looked up before the file is touched, and the file
+        is written with atomic_write(), so on failure an existing file at
+        ``output_path`` keeps its content.
+
+        Returns:
+            bool: True if the file was written, False otherwise
+        """
+        try:
+            uri = self._find_data_uri(xpath)
+            if uri is None:
+                raise ValueError(f"No data URI found for '{xpath}'")
+            with atomic_write(output_path) as f:
+                self._write_found_data_uri(uri, xpath, f)
+            return True
+        except (ValueError, OSError) as e:
+            logging.warning(f"Failed to save data URI: {e}")
+            return False
+
+    def _attribute_name(self, name: str) -> str:
+        """Turn a Clark-notation attribute name into its prefixed form."""
+        if name.startswith('{'):
+            uri, local = name[1:].split('}', 1)
+            for prefix, ns_uri in self.ns.items():
+                if ns_uri == uri:
+                    return f"{prefix}:{local}"
+        return name
+
+    def iter_data_uris(self):
+        """Find every data URI in the document in a single tree walk.
+
+        Data URIs are looked for in ``href``, ``xlink:href``, ``src`` and
+        ``data`` attributes and in CSS ``url(...)`` references inside
+        ``style`` attributes and ``<style>`` elements.
+
+        Yields:
+            tuple: (info, uri) where info has 'path', 'attribute' (None for
+                ``<style>`` text), 'source' ('attribute' or 'css') and
+                'mime_type'
+        """
+        roottree = self.tree.getroottree() if hasattr(self.tree, 'getroottree') else None
+        for elem, name, info, uri in self._iter_data_uri_sites():
+            info['path'] = roottree.getpath(elem) if roottree is not None else ''
+            info['attribute'] = self._attribute_name(name) if name else None
+            yield info, uri
+
+    def _iter_data_uri_sites(self):
+        """Walk the tree once, yielding (element, attribute, info, uri).
+
+        ``attribute`` is the raw attribute name, or None for the text of a
+        ``<style>`` element.
+        """
+        if self.tree is None:
+            raise ValueError("No file loaded")
+
+        for elem in self.tree.iter():
+            if not isinstance(elem.tag, str):
+                continue
+            for name, value in elem.items():
+                local = name.rsplit('}', 1)[-1]
+                if local in DATA_URI_ATTRIBUTES:
+                    header = parse_data_uri_header(value)
+                    if header is not None:
+                        info = {'source': 'attribute', 'mime_type': header['mime_type']}
+                        yield elem, name, info, value
+                elif local == 'style' and 'url(' in value:
+                    for info, uri in self._css_data_uris(value):
+                        yield elem, name, info, uri
+            if elem.tag.rsplit('}', 1)[-1] == 'style' and elem.text and 'url(' in elem.text:
+                for info, uri in self._css_data_uris(elem.text):
+                    yield elem, None, info, uri
+
+    @staticmethod
+    def _css_data_uris(css: str):
+        """Yield (info, uri) for data URIs in CSS url(...) references."""
+        for match in CSS_DATA_URL_PATTERN.finditer(css):
+            uri = match.group('uri').strip()
+            header = parse_data_uri_header(uri)
+            if header is not None:
+                yield {'source': 'css', 'mime_type': header['mime_type']}, uri
+
+    def extract_all_data_uris(self, outdir: Optional[str] = None,
+                              workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Extract every data URI in the document.
+
+        The tree is walked once. With ``outdir``, payloads are decoded on a
+        thread pool and written as ``<sha256><ext>``, so identical assets
+        are stored once.
+
+        Args:
+            outdir: Directory to write decoded files to (default: only list)
+            workers: Number of decoding threads (default: ThreadPoolExecutor's)
+
+        Returns:
+            List of dictionaries with 'path', 'attribute', 'source' and
+            'mime_type'; with ``outdir`` also 'file', 'sha256' and 'size',
+            or 'error' if the payload could not be decoded
+        """
+        found = list(self.iter_data_uris())
+        if outdir is None:
+            return [info for info, _ in found]
+
+        os.makedirs(outdir, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                lambda item: self._write_content_addressed(item[0], item[1], outdir),
+                found,
+            )
+            return list(results)
+
+    def externalize_data_uris(self, store: Optional[BlobStore] = None,
+                              min_size: int = 0) -> List[Dict[str, Any]]:
+        """Move embedded data URIs into a content-addressed blob store.
+
+        Each data URI is decoded into the store (deduplicated by SHA-256)
+        and replaced in place by an ``xsl-blob:`` reference. The store
+        becomes this editor's ``blob_store``, so ``extract_data_uri`` keeps
+        resolving the references.
+
+        Args:
+            store: Blob store (default: this editor's ``blob_store``)
+            min_size: Leave data URIs with shorter payloads inline
+
+        Returns:
+            List of dictionaries with 'path', 'attribute', 'source',
+            'mime_type', 'sha256', 'size' and 'reference', or 'error' if
+            the payload could not be decoded
+        """
+        self._prepare_write()
+        store = store or self.blob_store
+        if store is None:
+            raise ValueError("No blob store configured")
+        self.blob_store = store
+
+        roottree = self.tree.getroottree() if hasattr(self.tree, 'getroottree') else None
+        results = []
+        for elem, name, info, uri in list(self._iter_data_uri_sites()):
+            info['path'] = roottree.getpath(elem) if roottree is not None else ''
+            info['attribute'] = self._attribute_name(name) if name else None
+            if len(uri) - parse_data_uri_header(uri)['data_offset'] < min_size:
+                continue
+            try:
+                stored = store.put_data_uri(uri)
+            except ValueError as e:
+                info['error'] = str(e)
+                results.append(info)
+                continue
+
+            reference = store.reference(stored['sha256'], info['mime_type'])
+            if info['source'] == 'attribute':
+                elem.set(name, reference)
+            elif name is None:
+                elem.text = elem.text.replace(uri, reference)
+            else:
+                elem.set(name, elem.get(name).replace(uri, reference))
+            self._record_change(elem, 'text' if name is None else 'attributes')
+            self.modified = True
+            info.update(sha256=stored['sha256'], size=stored['size'], reference=reference)
+            results.append(info)
+        return results
+
+    def internalize_data_uris(self, store: Optional[BlobStore] = None) -> int:
+        """Replace ``xsl-blob:`` references with inline base64 data URIs.
+
+        Args:
+            store: Blob store (default: this editor's ``blob_store``)
+
+        Returns:
+            int: Number of references re-inlined
+
+        Raises:
+            FileNotFoundError: If a referenced blob is missing from the store
+        """
+        self._prepare_write()
+        store = store or self.blob_store
+        if store is None:
+            raise ValueError("No blob store configured")
+        if self.tree is None:
+            raise ValueError("No file loaded")
+
+        def inline(match):
+            return store.to_data_uri(match.group(0))
+
+        count = 0
+        for elem in self.tree.iter():
+            if not isinstance(elem.tag, str):
+                continue
+            for name, value in elem.items():
+                if BLOB_URI_SCHEME not in value:
+                    continue
+                local = name.rsplit('}', 1)[-1]
+                if local in DATA_URI_ATTRIBUTES and parse_blob_uri(value):
+                    elem.set(name, store.to_data_uri(value))
+                    self._record_change(elem, 'attributes')
+                    count += 1
+                elif local == 'style':
+                    value, replaced = BLOB_URI_PATTERN.subn(inline, value)
+                    elem.set(name, value)
+                    self._record_change(elem, 'attributes')
+                    count += replaced
+            if (elem.tag.rsplit('}', 1)[-1] == 'style' and elem.text
+                    and BLOB_URI_SCHEME in elem.text):
+                elem.text, replaced = BLOB_URI_PATTERN.subn(inline, elem.text)
+                self._record_change(elem, 'text')
+                count += replaced
+        if count:
+            self.modified = True
+        return count
+
+    @staticmethod
+    def _write_content_addressed(info: Dict[str, Any], uri: str, outdir: str) -> Dict[str, Any]:
+        """Decode a data URI into ``outdir`` under its content hash."""
+        result = dict(info)
+        ext = extension_for_mime(info['mime_type'])
+        try:
+            written = decode_data_uri_content_addressed(
+                uri, outdir, lambda digest: os.path.join(outdir, digest + ext)
+            )
+            result.update(file=written['path'], sha256=written['sha256'], size=written['size'])
+        except ValueError as e:
+            result['error'] = str(e)
+        return result
+
+    def _get_attribute(self, element, name: str) -> str:
+        """Get an attribute from an element, handling namespaces.
+        
+        Args:
+            element: The XML element
+            name: Attribute name (can include namespace prefix)
+            
+        Returns:
+            The attribute value or None if not found
+        """
+        if not hasattr(element, 'get'):
+            return None
+            
+        # Try direct attribute first
+        value = element.get(name)
+        if value is not None:
+            return value
+            
+        # Try with xlink: prefix
+        if name.startswith('xlink:'):
+            return element.get(f"{{{self.ns.get('xlink', '')}}}{name[6:]}")
+            
+        # Try with full namespace
         if ':' in name:
             prefix = name.split(':', 1)[0]
             if prefix in self.ns:
@@ -408,13 +1598,22 @@ class FileEditor:
         Returns:
             bool: True if successful, False otherwise
         """
+        self._prepare_write()
         elements = self.query(xpath)
         if not elements:
             return False
             
         for elem in elements:
-            if hasattr(elem, 'text'):
-                elem.text = text
+            if self._set_text(elem, text):
+                self.modified = True
+        return True
+
+    def _set_text(self, elem, text: str) -> bool:
+        """Set the text of one element; False if it has none (e.g. a string result)."""
+        if not hasattr(elem, 'text'):
+            return False
+        elem.text = text
+        self._record_change(elem, 'text')
         return True
         
     def set_element_attribute(self, xpath: str, attr_name: str, attr_value: str) -> bool:
@@ -428,26 +1627,146 @@ class FileEditor:
         Returns:
             bool: True if any elements were modified, False otherwise
         """
+        self._prepare_write()
         elements = self.query(xpath)
         if not elements:
             return False
             
         modified = False
         for elem in elements:
-            if hasattr(elem, 'set'):
-                # Handle namespaced attributes (e.g., xlink:href)
-                if ':' in attr_name:
-                    prefix = attr_name.split(':', 1)[0]
-                    if prefix in self.ns:
-                        ns_attr = f"{{{self.ns[prefix]}}}{attr_name.split(':', 1)[1]}"
-                        elem.set(ns_attr, attr_value)
-                        modified = True
-                else:
-                    elem.set(attr_name, attr_value)
-                    modified = True
+            if self._set_attribute(elem, attr_name, attr_value):
+                modified = True
                     
+        if modified:
+            self.modified = True
         return modified
+
+    def _set_attribute(self, elem, attr_name: str, attr_value: str) -> bool:
+        """Set an attribute on one element, keeping the id index current.
+
+        Returns:
+            bool: False if the element cannot hold attributes or the
+                attribute prefix is unknown
+        """
+        if not hasattr(elem, 'set'):
+            return False
+        # Handle namespaced attributes (e.g., xlink:href)
+        if ':' in attr_name:
+            prefix = attr_name.split(':', 1)[0]
+            if prefix not in self.ns:
+                return False
+            elem.set(f"{{{self.ns[prefix]}}}{attr_name.split(':', 1)[1]}", attr_value)
+        else:
+            if attr_name == 'id':
+                self._unindex_id(elem, elem.get('id'))
+                self._index_id(elem, attr_value)
+            elem.set(attr_name, attr_value)
+        self._record_change(elem, 'attributes')
+        return True
     
+    def _element_name(self, name: str, parent=None) -> str:
+        """Convert a possibly prefixed name (e.g. ``svg:rect``) to Clark notation.
+
+        Unprefixed names take the namespace of ``parent`` when it is in the
+        default namespace, so ``rect`` added to an SVG element is an SVG rect.
+        """
+        if ':' in name:
+            prefix, local = name.split(':', 1)
+            if prefix not in self.ns:
+                raise ValueError(f"Unknown namespace prefix: {prefix}")
+            return f"{{{self.ns[prefix]}}}{local}"
+        if parent is not None and getattr(parent, 'prefix', None) is None:
+            match = re.match(r'\{(.*)\}', parent.tag)
+            if match:
+                return f"{{{match.group(1)}}}{name}"
+        return name
+
+    def add_element(self, parent_xpath: str, tag_name: str, text: str = "",
+                    attributes: Optional[Dict[str, str]] = None) -> bool:
+        """Append a new element to the first element matching XPath.
+
+        Args:
+            parent_xpath: XPath to the parent element
+            tag_name: Tag of the new element (may be prefixed, e.g. ``svg:rect``)
+            text: Text content of the new element
+            attributes: Attributes of the new element
+
+        Returns:
+            bool: True if the element was added, False if no parent matched
+
+        Raises:
+            ValueError: If a namespace prefix is unknown
+        """
+        self._prepare_write()
+        parents = [elem for elem in self.query(parent_xpath) if hasattr(elem, 'tag')]
+        if not parents:
+            return False
+
+        self._append_element(parents[0], tag_name, text, attributes)
+        self.modified = True
+        return True
+
+    def _append_element(self, parent, tag_name: str, text: str = "",
+                        attributes: Optional[Dict[str, str]] = None):
+        """Append a new child to ``parent`` and index its id.
+
+        Returns:
+            The new element
+
+        Raises:
+            ValueError: If a namespace prefix is unknown
+        """
+        tag = self._element_name(tag_name, parent)
+        if LXML_AVAILABLE and hasattr(parent, 'getparent'):
+            new_element = etree.SubElement(parent, tag)
+        else:
+            new_element = ET.SubElement(parent, tag)
+        if text:
+            new_element.text = text
+        for key, value in (attributes or {}).items():
+            new_element.set(self._element_name(key) if ':' in key else key, value)
+
+        self._index_id(new_element, new_element.get('id'))
+        self._record_change(parent, 'added', new_element)
+        return new_element
+
+    def remove_element(self, xpath: str) -> bool:
+        """Remove the first element matching XPath, with its subtree.
+
+        Args:
+            xpath: XPath to the element
+
+        Returns:
+            bool: True if the element was removed, False otherwise
+        """
+        self._prepare_write()
+        elements = [elem for elem in self.query(xpath) if hasattr(elem, 'tag')]
+        if not elements or not self._detach(elements[0]):
+            return False
+
+        self.modified = True
+        return True
+
+    def _detach(self, element) -> bool:
+        """Remove one element from its parent and drop its subtree from the id index.
+
+        Returns:
+            bool: False if the element has no parent (the root)
+        """
+        if hasattr(element, 'getparent'):
+            parent = element.getparent()
+        else:
+            parent = next((p for p in self.tree.iter() if element in list(p)), None)
+        if parent is None:
+            return False
+
+        if self._id_index is not None:
+            for elem in element.iter(etree.Element):
+                self._unindex_id(elem, elem.get('id'))
+        self._record_change(element, 'removed')
+        parent.remove(element)
+        return True
+
     def list_elements(self, xpath: str) -> List[Dict[str, Any]]:
         """List elements matching XPath with their attributes.
         
@@ -459,19 +1778,390 @@ class FileEditor:
         """
         elements = self.query(xpath)
         result = []
+        paths = _ElementPaths()
         
         for elem in elements:
             if hasattr(elem, 'attrib'):
                 result.append({
+                    'path': paths.path(elem) if hasattr(elem, 'getroottree') else '',
                     'tag': elem.tag,
                     'text': getattr(elem, 'text', ''),
                     'attributes': dict(elem.attrib)
                 })
         
         return result
+
+    def query_many(self, specs: Dict[str, Union[str, Dict[str, Any]]]) -> Dict[str, Any]:
+        """Evaluate several lookups in one call.
+
+        Each spec is either an XPath, whose result is the text of the first
+        match as with get_element_text(), or a dict with these keys:
+
+            - xpath: XPath expression (required)
+            - attribute: Attribute to read instead of the text
+            - all: If true, return the values of every match as a list
+            - default: Value for a missing match, text or attribute
+              ('' for text, None for attributes)
+
+        Plain ``@id`` lookups are answered from the id index. When two or
+        more of the other specs use the restricted path syntax of
+        StreamingEditor, they are evaluated together in one traversal of
+        the tree; anything else goes through query().
+
+        Args:
+            specs: Result names mapped to specs
+
+        Returns:
+            dict: Result names mapped to values; XPaths returning a number,
+                string or boolean map to that value
+
+        Raises:
+            ValueError: If no file is loaded or a spec or XPath is invalid
+        """
+        if self.tree is None:
+            raise ValueError("No file loaded")
+
+        normalized = {}
+        for name, spec in specs.items():
+            if isinstance(spec, str):
+                spec = {'xpath': spec}
+            elif not isinstance(spec, dict) or not spec.get('xpath'):
+                raise ValueError(f"Invalid spec '{name}': expected an XPath or a dict with 'xpath'")
+            normalized[name] = spec
+
+        matches = self._match_many(
+            {name: spec['xpath'] for name, spec in normalized.items()},
+            {name for name, spec in normalized.items() if not spec.get('all')},
+        )
+        return {name: self._spec_value(matches[name], spec) for name, spec in normalized.items()}
+
+    def _match_many(self, xpaths: Dict[Any, str], first_only: set,
+                    errors: Optional[Dict[Any, str]] = None) -> Dict[Any, Any]:
+        """Evaluate several XPaths, sharing one tree traversal where possible.
+
+        Args:
+            xpaths: Keys mapped to XPath expressions
+            first_only: Keys for which only the first match is needed; more
+                may still be returned
+            errors: If given, invalid XPaths are recorded here by key
+                instead of raising, and left out of the result
+
+        Returns:
+            dict: Keys mapped to query() results
+
+        Raises:
+            ValueError: If an XPath is invalid and ``errors`` is None
+        """
+        shared = {}
+        if LXML_AVAILABLE and hasattr(self.tree, 'getparent'):
+            for key, xpath in xpaths.items():
+                if ID_XPATH_PATTERN.match(xpath):
+                    continue
+                try:
+                    steps = _compile_restricted_path(xpath)
+                    _resolve_restricted_steps(steps, self.ns)
+                except ValueError:
+                    continue
+                if _restricted_path_is_xpath(steps):
+                    shared[key] = steps
+
+        matches: Dict[Any, Any] = {}
+        if len(shared) >= 2:
+            matches.update(self._walk_restricted_paths(shared, first_only & set(shared)))
+        for key, xpath in xpaths.items():
+            if key in matches:
+                continue
+            try:
+                matches[key] = self.query(xpath)
+            except ValueError as e:
+                if errors is None:
+                    raise
+                errors[key] = str(e)
+        return matches
+
+    def apply_updates(self, ops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Apply a batch of edits, resolving every target XPath up front.
+
+        Each op is a dict with an ``op`` type and an ``xpath`` target:
+
+            - text: set the text of every match to ``value``
+            - attribute: set ``attribute`` to ``value`` on every match
+            - add: append a ``tag`` child, with optional ``text`` and
+              ``attributes``, to the first match
+            - remove: remove the first match
+
+        All XPaths are evaluated together against the document as it was
+        before the batch, as in query_many(), so no op can target an
+        element added by the same batch. Ops are then applied in document
+        order of their targets, ops on one element in the order given. An
+        op whose target was removed by an earlier op fails.
+
+        Args:
+            ops: Update operations
+
+        Returns:
+            list: One result per op, in the order given, with 'op',
+                'success', 'count' (elements changed) and, on failure,
+                'error'
+
+        Raises:
+            ValueError: If no file is loaded
+        """
+        self._prepare_write()
+        if self.tree is None:
+            raise ValueError("No file loaded")
+
+        results = []
+        xpaths = {}
+        for index, op in enumerate(ops):
+            kind = op.get('op') if isinstance(op, dict) else None
+            results.append({'op': kind, 'success': False, 'count': 0})
+            if kind not in UPDATE_OPS:
+                results[index]['error'] = f"Unknown op: {kind!r}"
+                continue
+            missing = [key for key in UPDATE_OPS[kind] if key not in op]
+            if missing:
+                results[index]['error'] = f"Missing {', '.join(missing)} for '{kind}'"
+                continue
+            xpaths[index] = op['xpath']
+
+        errors: Dict[Any, str] = {}
+        first_only = {index for index in xpaths if ops[index]['op'] in ('add', 'remove')}
+        matches = self._match_many(xpaths, first_only, errors)
+        for index, error in errors.items():
+            results[index]['error'] = error
+
+        targets = {}
+        for index, found in matches.items():
+            elements = [m for m in found if hasattr(m, 'tag')] if isinstance(found, list) else []
+            if not elements:
+                results[index]['error'] = "No element matches the XPath"
+                continue
+            targets[index] = elements[:1] if index in first_only else elements
+
+        positions = self._document_positions({elements[0] for elements in targets.values()})
+        removed = set()
+        for index in sorted(targets, key=lambda i: (positions.get(targets[i][0], -1), i)):
+            op = ops[index]
+            elements = targets[index]
+            if removed:
+                elements = [elem for elem in elements if not self._in_removed(elem, removed)]
+                if not elements:
+                    results[index]['error'] = "Target was removed by an earlier update"
+                    continue
+            try:
+                count = self._apply_update(op, elements, removed)
+            except ValueError as e:
+                results[index]['error'] = str(e)
+                continue
+            results[index].update(success=count > 0, count=count)
+            if count:
+                self.modified = True
+        return results
+
+    def _apply_update(self, op: Dict[str, Any], elements: List[Any], removed: set) -> int:
+        """Apply one validated apply_updates() op to its resolved targets.
+
+        Returns:
+            int: Number of elements changed
+        """
+        kind = op['op']
+        if kind == 'text':
+            return sum(self._set_text(elem, str(op['value'])) for elem in elements)
+        if kind == 'attribute':
+            return sum(self._set_attribute(elem, op['attribute'], str(op['value']))
+                       for elem in elements)
+        if kind == 'add':
+            attributes = {key: str(value) for key, value in (op.get('attributes') or {}).items()}
+            self._append_element(elements[0], op['tag'], str(op.get('text') or ''), attributes)
+            return 1
+        if not self._detach(elements[0]):
+            raise ValueError("Cannot remove the root element")
+        removed.add(elements[0])
+        return 1
+
+    @staticmethod
+    def _in_removed(elem, removed: set) -> bool:
+        """Check whether an element or one of its ancestors was removed."""
+        if elem in removed:
+            return True
+        ancestors = elem.iterancestors() if hasattr(elem, 'iterancestors') else ()
+        return any(ancestor in removed for ancestor in ancestors)
+
+    def _document_positions(self, elements: set) -> Dict[Any, int]:
+        """Map elements to their position in document order, stopping once all are found."""
+        positions: Dict[Any, int] = {}
+        if len(elements) < 2:
+            return positions
+        pending = set(elements)
+        for position, elem in enumerate(self.tree.iter()):
+            if elem in pending:
+                positions[elem] = position
+                pending.discard(elem)
+                if not pending:
+                    break
+        return positions
+
+    def _walk_restricted_paths(self, paths: Dict[str, List[Dict[str, Any]]],
+                               first_only: set) -> Dict[str, List[Any]]:
+        """Evaluate resolved restricted paths together in one tree traversal.
+
+        Args:
+            paths: Result names mapped to resolved steps
+            first_only: Names for which the first match is enough
+
+        Returns:
+            dict: Names mapped to matching elements in document order
+        """
+        # Index the first step of every path by node test and by its first
+        # attribute-equality predicate, so an element is only checked against
+        # first steps that can match it; later steps are only tried as
+        # successors of steps matched by the parent or an ancestor
+        named: Dict[str, Dict[str, Any]] = {}
+        wildcards: List[tuple] = []
+        for name, steps in paths.items():
+            step = steps[0]
+            test = step['test']
+            if test is not None and not test.endswith('}'):
+                bucket = named.setdefault(test, {'plain': [], 'keyed': {}})
+            else:
+                bucket = next((b for t, b in wildcards if t == test), None)
+                if bucket is None:
+                    bucket = {'plain': [], 'keyed': {}}
+                    wildcards.append((test, bucket))
+            key = next((pred for pred in step['resolved']
+                        if pred[0] == 'attr' and pred[2] is not None), None)
+            if key is None:
+                bucket['plain'].append(name)
+            else:
+                bucket['keyed'].setdefault(key[1], {}).setdefault(key[2], []).append(name)
+
+        results: Dict[str, List[Any]] = {name: [] for name in paths}
+        done = set()
+        # Per open element: the (name, step index) pairs it matched, and the
+        # union of those of all its ancestors (for descendant steps)
+        matched_stack: List[frozenset] = [frozenset()]
+        inherited_stack: List[frozenset] = [frozenset()]
+        sibling_counts: List[Dict[str, int]] = [{}]
+
+        for event, elem in etree.iterwalk(self.tree, events=('start', 'end')):
+            tag = elem.tag
+            if not isinstance(tag, str):
+                # Comments and processing instructions
+                continue
+            if event == 'end':
+                matched_stack.pop()
+                inherited_stack.pop()
+                sibling_counts.pop()
+                continue
+
+            counts = sibling_counts[-1]
+            position = counts.get(tag, 0) + 1
+            counts[tag] = position
+            at_root = len(matched_stack) == 1
+
+            candidates = []
+            buckets = [named[tag]] if tag in named else []
+            buckets.extend(b for test, b in wildcards if test is None or tag.startswith(test))
+            for bucket in buckets:
+                candidates.extend((name, 0) for name in bucket['plain'])
+                for attr, by_value in bucket['keyed'].items():
+                    value = elem.get(attr)
+                    if value is not None and value in by_value:
+                        candidates.extend((name, 0) for name in by_value[value])
+            for name, index in matched_stack[-1]:
+                if index + 1 < len(paths[name]) and not paths[name][index + 1]['descendant']:
+                    candidates.append((name, index + 1))
+            for name, index in inherited_stack[-1]:
+                if index + 1 < len(paths[name]) and paths[name][index + 1]['descendant']:
+                    candidates.append((name, index + 1))
+
+            # The element stands in for its attributes, which are read with get()
+            entry = (tag, elem, position)
+            matched = set()
+            for name, index in candidates:
+                steps = paths[name]
+                step = steps[index]
+                if name in done or (index == 0 and not (step['descendant'] or at_root)):
+                    continue
+                if not _restricted_step_matches(step, entry):
+                    continue
+                matched.add((name, index))
+                if index == len(steps) - 1:
+                    results[name].append(elem)
+                    if name in first_only:
+                        done.add(name)
+
+            matched = frozenset(matched)
+            matched_stack.append(matched)
+            inherited_stack.append(inherited_stack[-1] | matched if matched else inherited_stack[-1])
+            sibling_counts.append({})
+            if len(done) == len(paths):
+                break
+
+        return results
+
+    def _spec_value(self, matches: Any, spec: Dict[str, Any]) -> Any:
+        """Reduce the matches of a query_many() spec to its value."""
+        if not isinstance(matches, list):
+            return matches
+
+        attribute = spec.get('attribute')
+        default = spec.get('default', None if attribute else '')
+
+        def value_of(match):
+            if isinstance(match, str):
+                return str(match) or default
+            if attribute:
+                return self._get_attribute(match, attribute) or default
+            return getattr(match, 'text', None) or default
+
+        if spec.get('all'):
+            return [value_of(match) for match in matches]
+        return value_of(matches[0]) if matches else default
     
+    def get_info(self) -> Dict[str, Any]:
+        """Get information about the loaded file.
+
+        Returns:
+            dict: 'file_path', 'file_type', 'is_remote', 'size' (bytes as
+                loaded), 'modified' and, when a tree is loaded, 'elements_count'
+        """
+        info = {
+            'file_path': self.file_path,
+            'file_type': self.file_type,
+            'is_remote': self.is_remote,
+            'size': self.content_size,
+            'modified': self.modified,
+        }
+        if self.tree is not None:
+            info['elements_count'] = sum(1 for _ in self.tree.iter())
+        return info
+
+    def estimated_size(self) -> int:
+        """Estimate the memory held by this editor in bytes.
+
+        The estimate covers the retained source content and a fixed per-node
+        overhead plus the text and attribute payload of every node in the
+        tree. It is meant for budgeting, not exact accounting.
+
+        Returns:
+            int: Estimated size in bytes
+        """
+        size = len(self._raw_content or b'') + len(self._decoded_content or '')
+        if self.tree is None:
+            return size
+        for elem in self.tree.iter():
+            size += _NODE_OVERHEAD + len(elem.text or '') + len(elem.tail or '')
+            for name, value in elem.items():
+                size += len(name) + len(value)
+        return size
+
     def backup(self) -> str:
         """Create a backup of the current file.
+
+        The backup is a hard link to the file as it is now; saves replace
+        the file rather than rewriting it, so the backup keeps this content.
         
         Returns:
             str: Path to the backup file
@@ -482,10 +2172,450 @@ class FileEditor:
         if not self.file_path:
             raise IOError("No file loaded to back up")
             
-        backup_path = f"{self.file_path}.bak"
         try:
-            import shutil
-            shutil.copy2(self.file_path, backup_path)
-            return backup_path
+            return snapshot_file(self.file_path, f"{self.file_path}.bak")
         except Exception as e:
             raise IOError(f"Failed to create backup: {str(e)}")
+
+
+class _ElementPaths:
+    """Absolute paths of lxml elements, as ``getroottree().getpath()`` writes them.
+
+    getpath() scans an element's siblings to number it, so paths for all
+    children of a wide parent cost quadratic time. Here the steps of a
+    parent's children are numbered in one pass and kept, as are the paths
+    of ancestors, so each parent is visited once however many of its
+    children are asked for.
+
+    Steps follow libxml2: an element in a default namespace is written
+    ``*`` and numbered among all sibling elements, any other element by its
+    (prefixed) name and numbered among siblings with the same name. The
+    number is left out when the step is unique.
+    """
+
+    def __init__(self):
+        self._steps: Dict[Any, str] = {}
+        self._paths: Dict[Any, str] = {}
+
+    @staticmethod
+    def _key(elem) -> Optional[tuple]:
+        """Sibling group of an element: None for a default-namespace element."""
+        tag = elem.tag
+        if not tag.startswith('{'):
+            return ('', tag)
+        if elem.prefix is None:
+            return None
+        return (elem.prefix, tag.split('}', 1)[1])
+
+    @staticmethod
+    def _name(key: Optional[tuple]) -> str:
+        """Name written for a sibling group."""
+        if key is None:
+            return '*'
+        return f"{key[0]}:{key[1]}" if key[0] else key[1]
+
+    def _number_children(self, parent):
+        """Compute the steps of every element child of a parent."""
+        children = [child for child in parent if isinstance(child.tag, str)]
+        keys = [self._key(child) for child in children]
+        totals: Dict[tuple, int] = {}
+        for key in keys:
+            if key is not None:
+                totals[key] = totals.get(key, 0) + 1
+        seen: Dict[tuple, int] = {}
+        for position, (child, key) in enumerate(zip(children, keys), 1):
+            if key is None:
+                self._steps[child] = f"*[{position}]" if len(children) > 1 else '*'
+                continue
+            seen[key] = seen.get(key, 0) + 1
+            name = self._name(key)
+            self._steps[child] = f"{name}[{seen[key]}]" if totals[key] > 1 else name
+
+    def path(self, elem) -> str:
+        """Get the absolute path of an element."""
+        if not isinstance(elem.tag, str):
+            return elem.getroottree().getpath(elem)
+        chain = []
+        node = elem
+        while node is not None and node not in self._paths:
+            chain.append(node)
+            node = node.getparent()
+        path = self._paths[node] if node is not None else ''
+        for node in reversed(chain):
+            parent = node.getparent()
+            if parent is None:
+                step = self._name(self._key(node))
+            else:
+                if node not in self._steps:
+                    self._number_children(parent)
+                step = self._steps[node]
+            path = self._paths[node] = f"{path}/{step}"
+        return path
+
+
+def extract_from_urls(urls: Iterable[str], xpath: str,
+                      workers: int = DEFAULT_FETCH_WORKERS) -> Iterator[Dict[str, Any]]:
+    """Load many documents concurrently and extract a data URI from each.
+
+    Documents are fetched and parsed on a thread pool (remote loads share
+    the pooled session of xsl.remote) with at most ``workers`` loads in
+    flight, so a long URL list is consumed lazily. Results are yielded in
+    completion order.
+
+    Args:
+        urls: URLs or local paths
+        xpath: XPath to the data URI, as for FileEditor.extract_data_uri
+        workers: Maximum number of concurrent loads
+
+    Yields:
+        dict: The extract_data_uri result plus 'url', or 'url' and 'error'
+            if the document could not be loaded
+    """
+    def extract(url):
+        try:
+            result = FileEditor.open_cached(url, read_only=True).extract_data_uri(xpath)
+        except Exception as e:
+            result = {'error': str(e)}
+        return dict(result, url=url)
+
+    pending = iter(urls)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = {executor.submit(extract, url) for url in islice(pending, workers)}
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+            in_flight.update(executor.submit(extract, url) for url in islice(pending, len(done)))
+
+
+# One location step of a streaming path: axis, node test and predicates
+_STREAM_STEP_PATTERN = re.compile(
+    r'(?P<axis>//?)'
+    r'(?P<name>\*|[\w.\-]+:\*|[\w.\-]+(?::[\w.\-]+)?)'
+    r'(?P<predicates>(?:\[[^\]]*\])*)'
+)
+_STREAM_PREDICATE_PATTERN = re.compile(
+    r'\[\s*(?:@(?P<attr>[\w.\-]+(?::[\w.\-]+)?)'
+    r'(?:\s*=\s*(?:\'(?P<sq>[^\']*)\'|"(?P<dq>[^"]*)"))?'
+    r'|(?P<position>\d+))\s*\]'
+)
+
+
+def _compile_restricted_path(path: str) -> List[Dict[str, Any]]:
+    """Split a restricted path into location steps.
+
+    The syntax is the one documented on StreamingEditor.
+
+    Args:
+        path: Path expression in the restricted syntax
+
+    Returns:
+        List of steps with 'descendant', 'name' and 'predicates' keys
+
+    Raises:
+        ValueError: If the path uses unsupported syntax
+    """
+    steps = []
+    pos = 0
+    path = path.strip()
+    while pos < len(path):
+        match = _STREAM_STEP_PATTERN.match(path, pos)
+        if not match:
+            raise ValueError(f"Unsupported streaming path '{path}'")
+        predicates = []
+        raw = match.group('predicates')
+        pred_pos = 0
+        while pred_pos < len(raw):
+            pred = _STREAM_PREDICATE_PATTERN.match(raw, pred_pos)
+            if not pred:
+                raise ValueError(f"Unsupported predicate in streaming path '{path}'")
+            if pred.group('position'):
+                predicates.append(('position', int(pred.group('position'))))
+            else:
+                value = pred.group('sq')
+                if value is None:
+                    value = pred.group('dq')
+                predicates.append(('attr', pred.group('attr'), value))
+            pred_pos = pred.end()
+        steps.append({
+            'descendant': match.group('axis') == '//',
+            'name': match.group('name'),
+            'predicates': predicates,
+        })
+        pos = match.end()
+    if not steps:
+        raise ValueError("Empty streaming path")
+    return steps
+
+
+def _qualify_name(name: str, namespaces: Dict[str, str]) -> str:
+    """Turn a ``prefix:local`` name into Clark notation.
+
+    Raises:
+        ValueError: If the prefix is not registered
+    """
+    if ':' not in name:
+        return name
+    prefix, local = name.split(':', 1)
+    if prefix not in namespaces:
+        raise ValueError(f"Undefined namespace prefix '{prefix}'")
+    return f"{{{namespaces[prefix]}}}{local}"
+
+
+def _resolve_restricted_steps(steps: List[Dict[str, Any]], namespaces: Dict[str, str]):
+    """Resolve prefixes of node tests and attribute predicates in place."""
+    for step in steps:
+        name = step['name']
+        if name == '*':
+            step['test'] = None
+        elif name.endswith(':*'):
+            # Namespace wildcard: match on the '{uri}' prefix only
+            prefix = name[:-2]
+            if prefix not in namespaces:
+                raise ValueError(f"Undefined namespace prefix '{prefix}'")
+            step['test'] = f"{{{namespaces[prefix]}}}"
+        else:
+            step['test'] = _qualify_name(name, namespaces)
+        step['resolved'] = [
+            (pred[0], _qualify_name(pred[1], namespaces), pred[2]) if pred[0] == 'attr' else pred
+            for pred in step['predicates']
+        ]
+
+
+def _restricted_path_is_xpath(steps: List[Dict[str, Any]]) -> bool:
+    """Check that a restricted path selects what XPath would.
+
+    Positions are counted among same-tag siblings before any other
+    predicate is applied, which is XPath's meaning only for a named step
+    whose position predicate comes first.
+    """
+    for step in steps:
+        for index, pred in enumerate(step['predicates']):
+            if pred[0] == 'position' and (index > 0 or step['name'].endswith('*')):
+                return False
+    return True
+
+
+def _restricted_step_matches(step: Dict[str, Any], entry: tuple) -> bool:
+    """Check one location step against one open element."""
+    tag, attrib, position = entry
+    test = step['test']
+    if test is not None:
+        if test.endswith('}'):
+            if not tag.startswith(test):
+                return False
+        elif tag != test:
+            return False
+    for pred in step['resolved']:
+        if pred[0] == 'position':
+            if position != pred[1]:
+                return False
+        else:
+            value = attrib.get(pred[1])
+            if value is None or (pred[2] is not None and value != pred[2]):
+                return False
+    return True
+
+
+def _restricted_path_matches(steps: List[Dict[str, Any]], stack: List[tuple],
+                             step_index: int, stack_index: int) -> bool:
+    """Check that steps[:step_index + 1] match stack[:stack_index + 1].
+
+    ``stack`` holds the open elements from the root down as
+    ``(tag, attributes, position among same-tag siblings)`` tuples.
+    """
+    step = steps[step_index]
+    if not _restricted_step_matches(step, stack[stack_index]):
+        return False
+    if step_index == 0:
+        return step['descendant'] or stack_index == 0
+    if step['descendant']:
+        return any(
+            _restricted_path_matches(steps, stack, step_index - 1, i)
+            for i in range(stack_index - 1, -1, -1)
+        )
+    return stack_index > 0 and _restricted_path_matches(
+        steps, stack, step_index - 1, stack_index - 1
+    )
+
+
+class StreamingEditor:
+    """Read-only editor that streams a document with ``lxml.etree.iterparse``.
+
+    Only a restricted path syntax is supported: absolute ``/`` and ``//``
+    location steps over element names (``tag``, ``prefix:tag``, ``*``,
+    ``prefix:*``) with ``[@attr]``, ``[@attr='value']`` and ``[n]``
+    predicates, e.g. ``//svg:rect[@id='square1']`` or
+    ``/data/records/record[2]``. A position must be the first predicate of
+    a named step; ``//*[2]`` and ``//b[@k='x'][2]`` are rejected because
+    positions are counted among same-tag siblings only. Matches come in
+    document order, as from FileEditor. Processed elements are cleared as
+    soon as they end, so memory stays bounded by the document depth rather
+    than its size.
+    """
+
+    def __init__(self, file_path: str):
+        """Initialize StreamingEditor with a local file path.
+
+        Args:
+            file_path: Path to the file to stream
+
+        Raises:
+            ImportError: If lxml is not available
+            FileNotFoundError: If the file does not exist
+        """
+        if not LXML_AVAILABLE:
+            raise ImportError("Streaming mode requires lxml")
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        self.file_path = file_path
+        self.ns = dict(DEFAULT_NAMESPACES)
+
+    def _qualify(self, name: str) -> str:
+        """Turn a ``prefix:local`` name into Clark notation.
+
+        Raises:
+            ValueError: If the prefix is not registered
+        """
+        return _qualify_name(name, self.ns)
+
+    def _path_step(self, tag: str, position: int) -> str:
+        """Format one step of an element's absolute path."""
+        if tag.startswith('{'):
+            uri, local = tag[1:].split('}', 1)
+            for prefix, ns_uri in self.ns.items():
+                if ns_uri == uri:
+                    return f"{prefix}:{local}[{position}]"
+            return f"*[local-name()='{local}'][{position}]"
+        return f"{tag}[{position}]"
+
+    def iter_elements(self, path: str):
+        """Stream elements matching a restricted path.
+
+        Args:
+            path: Path expression in the restricted syntax
+
+        Yields:
+            dict: Element information with 'path', 'tag', 'text' and
+                'attributes', in document order (a parent before its
+                children)
+
+        Raises:
+            ValueError: If the path is unsupported or the file cannot be parsed
+        """
+        return self._iter_matches(path, with_text=True)
+
+    def _iter_matches(self, path: str, with_text: bool):
+        """Stream matches of a restricted path, deciding each at its start tag.
+
+        Tag and attributes are known at the start tag. The text is the
+        content before the first child, so it is final once the first child
+        starts or the element ends, whichever comes first; until then the
+        match is held back, which keeps document order. Without
+        ``with_text`` matches are yielded at their start tag, with no
+        'text'.
+        """
+        steps = _compile_restricted_path(path)
+        if not _restricted_path_is_xpath(steps):
+            raise ValueError(
+                f"Unsupported path for streaming: {path} (a position predicate "
+                "must come first and follow an element name)"
+            )
+        resolved = False
+        # Open elements as (tag, attributes, position among same-tag siblings)
+        stack: List[tuple] = []
+        paths: List[str] = []
+        sibling_counts: List[Dict[str, int]] = [{}]
+        # Match waiting for its text, as (info, element)
+        waiting = None
+
+        try:
+            for event, elem in etree.iterparse(
+                self.file_path, events=('start-ns', 'start', 'end'),
+                remove_comments=True, huge_tree=True
+            ):
+                if event == 'start-ns':
+                    prefix, uri = elem
+                    if prefix and prefix not in self.ns:
+                        self.ns[prefix] = uri
+                    continue
+
+                if event == 'start':
+                    if waiting is not None:
+                        # The waiting match is this element's parent
+                        info, parent = waiting
+                        waiting = None
+                        info['text'] = parent.text
+                        yield info
+                    if not resolved:
+                        _resolve_restricted_steps(steps, self.ns)
+                        resolved = True
+                    counts = sibling_counts[-1]
+                    position = counts.get(elem.tag, 0) + 1
+                    counts[elem.tag] = position
+                    stack.append((elem.tag, elem.attrib, position))
+                    paths.append(self._path_step(elem.tag, position))
+                    sibling_counts.append({})
+                    if _restricted_path_matches(steps, stack, len(steps) - 1, len(stack) - 1):
+                        info = {
+                            'path': '/' + '/'.join(paths),
+                            'tag': elem.tag,
+                            'attributes': dict(elem.attrib),
+                        }
+                        if with_text:
+                            waiting = (info, elem)
+                        else:
+                            yield info
+                    continue
+
+                if waiting is not None:
+                    info, waiting = waiting[0], None
+                    info['text'] = elem.text
+                    yield info
+                stack.pop()
+                paths.pop()
+                sibling_counts.pop()
+
+                # Drop the finished subtree and every sibling before it
+                elem.clear()
+                parent = elem.getparent()
+                if parent is not None:
+                    while elem.getprevious() is not None:
+                        del parent[0]
+        except etree.XMLSyntaxError as e:
+            raise ValueError(f"Cannot parse file: {str(e)}")
+
+    def list_elements(self, path: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """List elements matching a restricted path.
+
+        Args:
+            path: Path expression in the restricted syntax
+            limit: Stop parsing after this many matches (default: no limit)
+
+        Returns:
+            List of dictionaries with element information
+        """
+        result = []
+        for info in self.iter_elements(path):
+            result.append(info)
+            if limit is not None and len(result) >= limit:
+                break
+        return result
+
+    def get_element_text(self, path: str, default: str = "") -> str:
+        """Get text content of the first element matching a restricted path.
+
+        Parsing stops at the first match.
+        """
+        for info in self.iter_elements(path):
+            return info['text'] or default
+        return default
+
+    def get_element_attribute(self, path: str, attr_name: str, default: str = None) -> str:
+        """Get an attribute of the first element matching a restricted path.
+
+        Parsing stops at the start tag of the first match.
+        """
+        for info in self._iter_matches(path, with_text=False):
+            return info['attributes'].get(self._qualify(attr_name), default)
+        return default
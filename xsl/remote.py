@@ -0,0 +1,391 @@
+"""
+Pooled HTTP access to remote documents with an on-disk conditional-GET cache.
+
+All remote loads share one ``requests.Session`` whose adapter keeps
+connections alive per host and retries transient failures. Responses that
+carry an ``ETag`` or ``Last-Modified`` validator are stored on disk; the
+next fetch of the same URL sends ``If-None-Match`` / ``If-Modified-Since``
+and a ``304 Not Modified`` answer is served from the stored body. The
+cache is bounded in bytes and drops the least recently used entries.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import threading
+from contextlib import ExitStack, contextmanager, nullcontext
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple, Union
+
+from .utils import atomic_write
+
+# requests itself is imported when the first session is created, so local
+# use of the package does not pay for it
+REQUESTS_AVAILABLE = importlib.util.find_spec('requests') is not None
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (5.0, 30.0)
+DEFAULT_RETRIES = 3
+# Connections kept alive per host
+DEFAULT_POOL_SIZE = 16
+# Bytes per chunk when streaming a body
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Response statuses worth retrying
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Bytes of responses kept in the on-disk cache
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def default_cache_dir() -> str:
+    """Get the HTTP cache directory: ``$XDG_CACHE_HOME/xsl/http`` or ``~/.cache/xsl/http``."""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'xsl', 'http')
+
+
+class HTTPCache:
+    """Directory of response bodies stored with their validators.
+
+    Each URL is stored in one file, ``<sha256 of url>.entry``: a JSON line
+    with the URL, ``etag`` and ``last_modified``, followed by the body. The
+    file is replaced with a single rename, so validators and body always
+    belong to the same response, and a reader that opened an entry keeps
+    reading that response even if another download replaces it.
+
+    The files' modification times record their last use; when the entries
+    exceed ``max_bytes`` the least recently used ones are removed.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        """Initialize the cache, creating its directory if needed.
+
+        Args:
+            directory: Cache directory
+            max_bytes: Total size of stored entries to keep
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        """Get the entry path of a URL."""
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{key}.entry")
+
+    def open(self, url: str) -> Optional[Tuple[Dict[str, Any], BinaryIO]]:
+        """Open the stored entry of a URL.
+
+        Returns:
+            tuple: (validators with 'url', 'etag' and 'last_modified',
+                file positioned at the body), or None if not stored; the
+                caller closes the file
+        """
+        try:
+            f = open(self._path(url), 'rb')
+        except OSError:
+            return None
+        try:
+            meta = json.loads(f.readline())
+        except ValueError:
+            meta = None
+        if not isinstance(meta, dict) or meta.get('url') != url:
+            f.close()
+            return None
+        return meta, f
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get the stored validators of a URL.
+
+        Returns:
+            dict: 'url', 'etag' and 'last_modified', or None if not stored
+        """
+        entry = self.open(url)
+        if entry is None:
+            return None
+        entry[1].close()
+        return entry[0]
+
+    def iter_body(self, url: str, stream: BinaryIO,
+                  chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+        """Read a body from an entry opened with open() and mark it as used."""
+        try:
+            os.utime(self._path(url))
+        except OSError:
+            pass
+        for chunk in iter(lambda: stream.read(chunk_size), b''):
+            yield chunk
+
+    def prune(self):
+        """Remove least recently used entries until they fit in ``max_bytes``."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.entry'):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    @contextmanager
+    def storing(self, url: str, headers) -> Iterator[Optional[BinaryIO]]:
+        """Store a response body as it is written, if it carries a validator.
+
+        The entry is only created when the block exits normally, so an
+        interrupted download leaves no trace. Storing may prune older
+        entries.
+
+        Args:
+            url: Requested URL
+            headers: Response headers
+
+        Yields:
+            BinaryIO: Stream for the body, or None if the response is not
+                to be stored
+        """
+        meta = validators(headers)
+        if meta is None:
+            yield None
+            return
+        with atomic_write(self._path(url)) as f:
+            f.write(json.dumps(dict(meta, url=url)).encode('utf-8') + b'\n')
+            yield f
+        self.prune()
+
+    def store(self, url: str, headers, body: bytes) -> bool:
+        """Store a response body if it carries a validator.
+
+        Args:
+            url: Requested URL
+            headers: Response headers
+            body: Response body
+
+        Returns:
+            bool: True if the response was stored
+        """
+        with self.storing(url, headers) as sink:
+            if sink is None:
+                return False
+            sink.write(body)
+        return True
+
+    def clear(self):
+        """Remove all stored responses."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+
+
+def validators(headers) -> Optional[Dict[str, Optional[str]]]:
+    """Get the cache validators of a response.
+
+    Args:
+        headers: Response headers
+
+    Returns:
+        dict: 'etag' and 'last_modified', or None if the response has
+            neither or must not be stored
+    """
+    if 'no-store' in headers.get('Cache-Control', '').lower():
+        return None
+    etag = headers.get('ETag')
+    last_modified = headers.get('Last-Modified')
+    if etag is None and last_modified is None:
+        return None
+    return {'etag': etag, 'last_modified': last_modified}
+
+
+class RemoteFetcher:
+    """Fetches remote documents over a pooled session with conditional GETs."""
+
+    def __init__(self, timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES, pool_size: int = DEFAULT_POOL_SIZE,
+                 cache: bool = True, cache_dir: Optional[str] = None,
+                 max_size: Optional[int] = None,
+                 cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        """Initialize the fetcher.
+
+        Args:
+            timeout: Seconds, or (connect, read) seconds, per request
+            retries: Retries of failed connections and transient error statuses
+            pool_size: Connections kept alive per host
+            cache: Store responses with validators and revalidate them
+            cache_dir: Cache directory (default: default_cache_dir())
+            max_size: Largest body in bytes to download (default: no limit)
+            cache_max_bytes: Size of the cache, beyond which the least
+                recently used responses are removed
+        """
+        self.timeout = timeout
+        self.retries = retries
+        self.pool_size = pool_size
+        self.cache = (HTTPCache(cache_dir or default_cache_dir(), cache_max_bytes)
+                      if cache else None)
+        self.max_size = max_size
+        self.requests = 0
+        self.not_modified = 0
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> 'requests.Session':
+        """The shared session, created on first use.
+
+        Raises:
+            ImportError: If requests is not installed
+        """
+        if not REQUESTS_AVAILABLE:
+            raise ImportError("Remote files require requests: pip install requests")
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                retry = Retry(
+                    total=self.retries,
+                    backoff_factor=0.2,
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=frozenset({'GET', 'HEAD'}),
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(pool_connections=self.pool_size,
+                                      pool_maxsize=self.pool_size, max_retries=retry)
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+            return self._session
+
+    def fetch(self, url: str) -> bytes:
+        """Get the body of a URL, revalidating a cached copy if there is one.
+
+        Args:
+            url: http(s) URL
+
+        Returns:
+            bytes: Response body
+
+        Raises:
+            requests.RequestException: If the request fails or returns an
+                error status
+            IOError: If the body exceeds ``max_size``
+        """
+        return b''.join(self.iter_content(url))
+
+    def iter_content(self, url: str, chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+        """Stream the body of a URL, revalidating a cached copy if there is one.
+
+        Chunks are yielded as they arrive, so a consumer such as a feed
+        parser works while the download is still running. A fresh body is
+        written to the cache alongside and only kept once it is complete.
+
+        Args:
+            url: http(s) URL
+            chunk_size: Bytes per chunk
+
+        Yields:
+            bytes: Consecutive pieces of the body
+
+        Raises:
+            requests.RequestException: If the request fails or returns an
+                error status
+            IOError: If the body exceeds ``max_size``; a declared
+                Content-Length is checked before anything is downloaded
+        """
+        headers = {}
+        with ExitStack() as stack:
+            # The entry stays open so a 304 is answered with the body that
+            # goes with the validators sent, whatever is stored meanwhile
+            cached = self.cache.open(url) if self.cache else None
+            if cached:
+                meta, stored = cached
+                stack.callback(stored.close)
+                if meta.get('etag'):
+                    headers['If-None-Match'] = meta['etag']
+                if meta.get('last_modified'):
+                    headers['If-Modified-Since'] = meta['last_modified']
+            yield from self._download(url, headers, cached, chunk_size)
+
+    def _download(self, url: str, headers: Dict[str, str],
+                  cached: Optional[Tuple[Dict[str, Any], BinaryIO]],
+                  chunk_size: int) -> Iterator[bytes]:
+        """Send a (conditional) GET and stream the body, as for iter_content()."""
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            with self._lock:
+                self.requests += 1
+            if response.status_code == 304 and cached:
+                with self._lock:
+                    self.not_modified += 1
+                yield from self.cache.iter_body(url, cached[1], chunk_size)
+                return
+            response.raise_for_status()
+
+            length = response.headers.get('Content-Length', '')
+            if self.max_size is not None and length.isdigit() and int(length) > self.max_size:
+                raise IOError(f"{url} is {length} bytes, more than the limit of {self.max_size}")
+
+            storing = self.cache.storing(url, response.headers) if self.cache else nullcontext()
+            with storing as sink:
+                size = 0
+                for chunk in response.iter_content(chunk_size):
+                    size += len(chunk)
+                    if self.max_size is not None and size > self.max_size:
+                        raise IOError(f"{url} exceeds the limit of {self.max_size} bytes")
+                    if sink is not None:
+                        sink.write(chunk)
+                    yield chunk
+
+    def info(self) -> Dict[str, int]:
+        """Get request statistics.
+
+        Returns:
+            dict: 'requests' sent and how many were answered 'not_modified'
+        """
+        with self._lock:
+            return {'requests': self.requests, 'not_modified': self.not_modified}
+
+    def close(self):
+        """Close the pooled connections."""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+_FETCHER: Optional[RemoteFetcher] = None
+_FETCHER_LOCK = threading.Lock()
+
+
+def get_fetcher() -> RemoteFetcher:
+    """Get the fetcher used for remote loads, creating it with defaults if needed."""
+    global _FETCHER
+    with _FETCHER_LOCK:
+        if _FETCHER is None:
+            _FETCHER = RemoteFetcher()
+        return _FETCHER
+
+
+def configure(**options) -> RemoteFetcher:
+    """Replace the fetcher used for remote loads.
+
+    Args:
+        **options: RemoteFetcher arguments (timeout, retries, pool_size,
+            cache, cache_dir, max_size, cache_max_bytes)
+
+    Returns:
+        RemoteFetcher: The new fetcher
+    """
+    global _FETCHER
+    fetcher = RemoteFetcher(**options)
+    with _FETCHER_LOCK:
+        previous, _FETCHER = _FETCHER, fetcher
+    if previous is not None:
+        previous.close()
+    return fetcher
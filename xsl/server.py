@@ -4,20 +4,257 @@ HTTP Server for xsl - Web interface for remote file editing.
 
 import argparse
 import json
+import logging
+import os
 import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from http.server import BaseHTTPRequestHandler, HTTPServer
-from typing import Dict
+from typing import Any, Dict, Optional
 from urllib.parse import parse_qs, urlparse
 
 from . import __version__
-from .editor import FileEditor
+from .editor import DEFAULT_FETCH_WORKERS, FileEditor, extract_from_urls
+
+# Upper bound on the concurrent loads one /api/extract_batch request may ask for
+MAX_FETCH_WORKERS = 32
+
+
+class Session:
+    """A document opened through the server, identified by a session id."""
+
+    def __init__(self, session_id: str, file_path: str, editor: FileEditor):
+        self.session_id = session_id
+        self.file_path = file_path
+        self.editor: Optional[FileEditor] = editor
+        self.size = editor.estimated_size()
+        self.last_access = time.monotonic()
+        # Serializes requests against the same document. Not reentrant, so
+        # eviction's non-blocking acquire fails for a checked-out session even
+        # in the thread holding it
+        self.lock = threading.Lock()
+
+    @property
+    def resident(self) -> bool:
+        """Whether the parsed tree is currently held in memory."""
+        return self.editor is not None
+
+    @property
+    def dirty(self) -> bool:
+        """Whether the document has edits that were not saved yet."""
+        return self.editor is not None and self.editor.modified
+
+
+class SessionStore:
+    """Bounded store of open documents with LRU/TTL eviction.
+
+    Trees without unsaved edits are unloaded when their session has been
+    idle for longer than ``ttl`` seconds, when more than ``max_sessions``
+    trees are resident (least recently used first), and when the estimated
+    size of resident trees exceeds ``memory_budget`` bytes. Unloaded
+    sessions keep their id and reload their file transparently on next
+    access; only when more than ``max_ids`` sessions exist are the least
+    recently used unloaded ones forgotten. Sessions end for good through
+    close(). Documents are loaded with ``keep_content=False`` so only the
+    parsed tree is held per session.
+    """
+
+    def __init__(self, max_sessions: int = 100, ttl: float = 3600.0,
+                 memory_budget: int = 512 * 1024 * 1024, max_ids: int = 10000):
+        """Initialize the store.
+
+        Args:
+            max_sessions: Maximum number of resident trees
+            ttl: Seconds a session may stay idle before its tree is unloaded
+            memory_budget: Maximum estimated bytes of resident trees
+            max_ids: Maximum number of sessions, resident or not
+        """
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.memory_budget = memory_budget
+        self.max_ids = max_ids
+        self.evictions = 0
+        self.expirations = 0
+        self.reloads = 0
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def open(self, file_path: str) -> Session:
+        """Load a file into a new session.
+
+        Args:
+            file_path: Path to file or URL
+
+        Returns:
+            Session: The new session
+        """
+        editor = FileEditor(file_path, keep_content=False, track_changes=True)
+        session = Session(uuid.uuid4().hex, file_path, editor)
+        with self._lock:
+            self._sessions[session.session_id] = session
+            self._evict(keep=session.session_id)
+        return session
+
+    def close(self, session_id: str) -> bool:
+        """Close a session, discarding unsaved edits.
+
+        Returns:
+            bool: True if the session existed
+        """
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _lookup(self, session_id: Optional[str]) -> Session:
+        """Find a session and mark it as most recently used.
+
+        Without a session id the most recently used session is returned.
+
+        Raises:
+            KeyError: If the session does not exist
+        """
+        with self._lock:
+            self._evict()
+            if session_id is None:
+                if not self._sessions:
+                    raise KeyError("No files loaded")
+                session_id = next(reversed(self._sessions))
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise KeyError(f"Unknown session: {session_id}")
+            self._sessions.move_to_end(session_id)
+            session.last_access = time.monotonic()
+            return session
+
+    @contextmanager
+    def checkout(self, session_id: Optional[str] = None, edit: bool = False):
+        """Lock a session and yield its editor, reloading it if needed.
+
+        Args:
+            session_id: Session id (default: most recently used session)
+            edit: The caller changes the document, so its size estimate
+                is refreshed afterwards
+
+        Yields:
+            Session: The session, with a resident editor
+        """
+        session = self._lookup(session_id)
+        with session.lock:
+            if session.editor is None:
+                session.editor = FileEditor(session.file_path, keep_content=False,
+                                            track_changes=True)
+                session.size = session.editor.estimated_size()
+                with self._lock:
+                    self.reloads += 1
+            try:
+                yield session
+            finally:
+                session.last_access = time.monotonic()
+                if edit and session.editor is not None:
+                    session.size = session.editor.estimated_size()
+        with self._lock:
+            self._evict(keep=session.session_id)
+
+    def _evict(self, keep: Optional[str] = None):
+        """Apply TTL, resident count, memory and id limits. Caller holds the lock.
+
+        Sessions currently checked out, sessions with unsaved edits and the
+        session ``keep`` are skipped.
+        """
+        def unloadable(session):
+            return session.session_id != keep and session.resident and not session.dirty
+
+        now = time.monotonic()
+        for session in list(self._sessions.values()):
+            if unloadable(session) and now - session.last_access > self.ttl:
+                if self._unload(session):
+                    self.expirations += 1
+
+        excess = sum(1 for s in self._sessions.values() if s.resident) - self.max_sessions
+        for session in list(self._sessions.values()):
+            if excess <= 0:
+                break
+            if unloadable(session) and self._unload(session):
+                self.evictions += 1
+                excess -= 1
+
+        used = self._memory_used()
+        for session in list(self._sessions.values()):
+            if used <= self.memory_budget:
+                break
+            if unloadable(session) and self._unload(session):
+                used -= session.size
+                self.evictions += 1
+
+        excess = len(self._sessions) - self.max_ids
+        for session in list(self._sessions.values()):
+            if excess <= 0:
+                break
+            if session.session_id == keep or session.resident:
+                continue
+            if session.lock.acquire(blocking=False):
+                try:
+                    del self._sessions[session.session_id]
+                    excess -= 1
+                finally:
+                    session.lock.release()
+
+    @staticmethod
+    def _unload(session: Session) -> bool:
+        """Drop the tree of a session that is not checked out.
+
+        Returns:
+            bool: True if the tree was dropped
+        """
+        if not session.lock.acquire(blocking=False):
+            return False
+        try:
+            session.editor = None
+        finally:
+            session.lock.release()
+        return True
+
+    def _memory_used(self) -> int:
+        """Estimated bytes held by resident sessions. Caller holds the lock."""
+        return sum(s.size for s in self._sessions.values() if s.resident)
+
+    def stats(self) -> Dict[str, Any]:
+        """Report store occupancy.
+
+        Returns:
+            dict: Session counts, memory usage and eviction counters
+        """
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'resident': sum(1 for s in self._sessions.values() if s.resident),
+                'dirty': sum(1 for s in self._sessions.values() if s.dirty),
+                'max_sessions': self.max_sessions,
+                'max_ids': self.max_ids,
+                'memory_used': self._memory_used(),
+                'memory_budget': self.memory_budget,
+                'ttl': self.ttl,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'reloads': self.reloads,
+            }
+
+
+def _log_save_failure(future):
+    """Report a background save that failed; nobody waits on its future."""
+    error = future.exception()
+    if error is not None:
+        logging.error(f"Background save failed: {error}")
 
 
 class FileEditorServer(BaseHTTPRequestHandler):
     """HTTP request handler for xsl server."""
 
-    # Class variable to store loaded editors
-    editors: Dict[str, FileEditor] = {}
+    # Documents opened through /api/load, shared by all handler instances
+    sessions = SessionStore()
 
     def do_GET(self):
         """Handle GET requests."""
@@ -29,9 +266,13 @@ class FileEditorServer(BaseHTTPRequestHandler):
             self._serve_interface()
         elif path == "/api/health":
             self._send_json_response({"status": "ok", "version": __version__})
+        elif path == "/api/sessions":
+            self._send_json_response(self.sessions.stats())
         elif path == "/api/extract":
             # Direct extraction endpoint with URL + XPath
             self._extract_from_url(query)
+        elif path == "/api/document":
+            self._send_document(query)
         else:
             self._send_error(404, "Not Found")
 
@@ -53,18 +294,24 @@ class FileEditorServer(BaseHTTPRequestHandler):
             self._load_file(data)
         elif path == "/api/query":
             self._query_elements(data)
+        elif path == "/api/query_batch":
+            self._query_batch(data)
         elif path == "/api/update":
             self._update_element(data)
         elif path == "/api/save":
             self._save_file(data)
         elif path == "/api/extract_data_uri":
             self._extract_data_uri(data)
+        elif path == "/api/extract_batch":
+            self._extract_batch(data)
         elif path == "/api/add":
             self._add_element(data)
         elif path == "/api/remove":
             self._remove_element(data)
         elif path == "/api/info":
             self._get_file_info(data)
+        elif path == "/api/close":
+            self._close_session(data)
         else:
             self._send_error(404, "Not Found")
 
@@ -76,6 +323,260 @@ class FileEditorServer(BaseHTTPRequestHandler):
         self.send_header("Access-Control-Allow-Headers", "Content-Type")
         self.end_headers()
 
+    def _extract_from_url(self, query):
+        """Extract a Data URI from a URL + XPath (GET endpoint)."""
+        try:
+            url = query.get("url", [""])[0]
+            xpath = query.get("xpath", [""])[0]
+
+            if not url or not xpath:
+                self._send_json_response({"error": "Missing url or xpath parameter"})
+                return
+
+            editor = FileEditor.open_cached(url, read_only=True)
+            self._send_json_response(editor.extract_data_uri(xpath))
+        except Exception as e:
+            self._send_json_response({"error": str(e)})
+
+    def _extract_batch(self, data):
+        """Extract a Data URI from many URLs, streaming NDJSON results.
+
+        Expects {"urls": [...], "xpath": ..., "workers": n}. One JSON line
+        is written per URL as soon as it completes, in completion order.
+        """
+        urls = data.get("urls")
+        xpath = data.get("xpath")
+        if not isinstance(urls, list) or not xpath:
+            self._send_json_response({"success": False, "error": "Missing urls or xpath"})
+            return
+        try:
+            workers = min(int(data.get("workers", DEFAULT_FETCH_WORKERS)), MAX_FETCH_WORKERS)
+        except (TypeError, ValueError, OverflowError):
+            self._send_error(400, "Invalid workers: expected an integer")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-type", "application/x-ndjson")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        for result in extract_from_urls(urls, xpath, max(workers, 1)):
+            self.wfile.write(json.dumps(result).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+    def _send_document(self, query):
+        """Stream the serialized document of a session.
+
+        The body is written chunk by chunk as it is serialized and ends when
+        the connection closes, so large documents are never held as one
+        string. ``pretty=1`` indents the output.
+        """
+        session_id = query.get("session_id", [None])[0]
+        pretty_print = query.get("pretty", ["0"])[0] in ("1", "true")
+        headers_sent = False
+        try:
+            with self.sessions.checkout(session_id) as session:
+                chunks = session.editor.iter_bytes(pretty_print)
+                first = next(chunks)
+                self.send_response(200)
+                self.send_header("Content-type", "application/xml")
+                self.send_header("Access-Control-Allow-Origin", "*")
+                self.end_headers()
+                headers_sent = True
+                self.close_connection = True
+                self.wfile.write(first)
+                for chunk in chunks:
+                    self.wfile.write(chunk)
+        except Exception as e:
+            if headers_sent:
+                # Too late for an error response: cut the body short instead
+                logging.error(f"Streaming document failed: {e}")
+                self.close_connection = True
+            else:
+                self._send_json_response({"success": False, "error": str(e)})
+
+    def _load_file(self, data):
+        """Load a file into a new session."""
+        try:
+            session = self.sessions.open(data["file_path"])
+            info = session.editor.get_info()
+            response = {
+                "success": True,
+                "session_id": session.session_id,
+                "message": f"File loaded: {session.file_path}",
+                "file_type": info["file_type"],
+                "is_remote": info["is_remote"],
+                "elements_count": info.get("elements_count", 0),
+            }
+        except Exception as e:
+            response = {"success": False, "error": str(e)}
+
+        self._send_json_response(response)
+
+    def _query_elements(self, data):
+        """Run an XPath query against a session."""
+        try:
+            with self.sessions.checkout(data.get("session_id")) as session:
+                elements = session.editor.list_elements(data["query"])
+            response = {
+                "success": True,
+                "session_id": session.session_id,
+                "elements": elements,
+                "count": len(elements),
+            }
+        except Exception as e:
+            response = {"success": False, "error": str(e)}
+
+        self._send_json_response(response)
+
+    def _query_batch(self, data):
+        """Evaluate a mapping of named lookups against a session in one call."""
+        try:
+            queries = data["queries"]
+            if not isinstance(queries, dict):
+                raise ValueError("'queries' must map names to XPaths or specs")
+            with self.sessions.checkout(data.get("session_id")) as session:
+                results = session.editor.query_many(queries)
+            response = {
+                "success": True,
+                "session_id": session.session_id,
+                "results": results,
+            }
+        except Exception as e:
+            response = {"success": False, "error": str(e)}
+
+        self._send_json_response(response)
+
+    def _update_element(self, data):
+        """Update element text or an attribute in a session."""
+        try:
+            xpath = data["xpath"]
+            update_type = data["type"]
+            value = data["value"]
+
+            with self.sessions.checkout(data.get("session_id"), edit=True) as session:
+                if update_type == "text":
+                    success = session.editor.set_element_text(xpath, value)
+                elif update_type == "attribute":
+                    success = session.editor.set_element_attribute(
+                        xpath, data["attribute"], value
+                    )
+                else:
+                    raise ValueError(f"Unknown update type: {update_type}")
+
+            response = {
+                "success": success,
+                "session_id": session.session_id,
+                "message": "Element updated successfully" if success else "Element not found",
+            }
+        except Exception as e:
+            response = {"success": False, "error": str(e)}
+
+        self._send_json_response(response)
+
+    def _add_element(self, data):
+        """Append a new element to a parent in a session."""
+        try:
+            with self.sessions.checkout(data.get("session_id"), edit=True) as session:
+                success = session.editor.add_element(
+                    data["parent_xpath"],
+                    data["tag"],
+                    data.get("text", ""),
+                    data.get("attributes") or {},
+                )
+
+            response = {
+                "success": success,
+                "session_id": session.session_id,
+                "message": "Element added" if success else "Parent element not found",
+            }
+        except Exception as e:
+            response = {"success": False, "error": str(e)}
+
+        self._send_json_response(response)
+
+    def _remove_element(self, data):
+        """Remove an element from a session."""
+        try:
+            with self.sessions.checkout(data.get("session_id"), edit=True) as session:
+                success = session.editor.remove_element(data["xpath"])
+
+            response = {
+                "success": success,
+                "session_id": session.session_id,
+                "message": "Element removed" if success else "Element not found",
+            }
+        except Exception as e:
+            response = {"success": False, "error": str(e)}
+
+        self._send_json_response(response)
+
+    def _save_file(self, data):
+        """Save a session to its file or to output_path.
+
+        With ``"async": true`` the save is handed to the background writer
+        and the response is sent right away; the session keeps its unsaved
+        state (and stays resident) until the write has completed.
+        """
+        try:
+            output_path = data.get("output_path")
+            with self.sessions.checkout(data.get("session_id")) as session:
+                if data.get("async"):
+                    future = session.editor.save_async(output_path, lock=session.lock)
+                    future.add_done_callback(_log_save_failure)
+                else:
+                    saved_path = session.editor.save(output_path)
+
+            if data.get("async"):
+                response = {
+                    "success": True,
+                    "session_id": session.session_id,
+                    "pending": True,
+                    "message": f"Saving to {output_path or session.file_path}",
+                }
+            else:
+                response = {
+                    "success": True,
+                    "session_id": session.session_id,
+                    "message": f"File saved successfully to {saved_path}",
+                }
+        except Exception as e:
+            response = {"success": False, "error": str(e)}
+
+        self._send_json_response(response)
+
+    def _extract_data_uri(self, data):
+        """Extract a Data URI from a session."""
+        try:
+            with self.sessions.checkout(data.get("session_id")) as session:
+                result = session.editor.extract_data_uri(data["xpath"])
+            self._send_json_response(result)
+        except Exception as e:
+            self._send_json_response({"error": str(e)})
+
+    def _get_file_info(self, data):
+        """Show information about a session's file."""
+        try:
+            with self.sessions.checkout(data.get("session_id")) as session:
+                info = session.editor.get_info()
+            info["session_id"] = session.session_id
+            info["success"] = True
+            self._send_json_response(info)
+        except Exception as e:
+            self._send_json_response({"success": False, "error": str(e)})
+
+    def _close_session(self, data):
+        """Close a session, discarding unsaved edits."""
+        try:
+            success = self.sessions.close(data["session_id"])
+            response = {
+                "success": success,
+                "message": "Session closed" if success else "Unknown session",
+            }
+        except Exception as e:
+            response = {"success": False, "error": str(e)}
+
+        self._send_json_response(response)
+
     def _send_response(self, status_code, content, content_type="text/plain"):
         """Send HTTP response."""
         self.send_response(status_code)
@@ -103,23 +604,105 @@ class FileEditorServer(BaseHTTPRequestHandler):
         print(f"{self.address_string()} - {format % args}")
 
 
-def start_server(host="localhost", port=8080):
-    """Start the xsl HTTP server."""
+class PooledHTTPServer(HTTPServer):
+    """HTTP server that handles requests on a bounded worker pool.
+
+    Each accepted connection is handed to a ``ThreadPoolExecutor`` so a slow
+    request (e.g. ``/api/extract`` fetching a remote URL) no longer blocks
+    other clients. At most ``workers + queue_size`` connections are in flight;
+    beyond that new connections are answered with ``503 Service Unavailable``.
+    """
+
+    def __init__(self, server_address, handler_class, workers: Optional[int] = None,
+                 queue_size: int = 64):
+        """Initialize the server.
+
+        Args:
+            server_address: (host, port) tuple to bind to
+            handler_class: Request handler class
+            workers: Number of worker threads (default: CPU count + 4, max 32)
+            queue_size: Connections allowed to wait for a free worker
+        """
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.queue_size = queue_size
+        # Listen backlog used by server_activate()
+        self.request_queue_size = max(queue_size, 5)
+        super().__init__(server_address, handler_class)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="xsl-server"
+        )
+        self._slots = threading.BoundedSemaphore(self.workers + queue_size)
+
+    def process_request(self, request, client_address):
+        """Queue the request on the worker pool or reject it when full."""
+        if not self._slots.acquire(blocking=False):
+            try:
+                request.sendall(
+                    b"HTTP/1.0 503 Service Unavailable\r\n"
+                    b"Content-Type: application/json\r\n"
+                    b"Connection: close\r\n\r\n"
+                    b'{"error": "Server busy"}'
+                )
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        self._executor.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address):
+        """Handle one request on a worker thread."""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        """Stop accepting connections and wait for in-flight requests."""
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+
+def start_server(host="localhost", port=8080, workers=None, queue_size=64,
+                 max_sessions=100, session_ttl=3600.0, memory_budget=512 * 1024 * 1024):
+    """Start the xsl HTTP server.
+
+    Args:
+        host: Host to bind to
+        port: Port to listen on
+        workers: Number of worker threads (default: CPU count + 4, max 32)
+        queue_size: Connections allowed to wait for a free worker
+        max_sessions: Maximum number of resident documents
+        session_ttl: Seconds a session may stay idle before it is unloaded
+        memory_budget: Maximum estimated bytes of resident trees
+    """
+    FileEditorServer.sessions = SessionStore(
+        max_sessions=max_sessions, ttl=session_ttl, memory_budget=memory_budget
+    )
     try:
-        server = HTTPServer((host, port), FileEditorServer)
+        server = PooledHTTPServer(
+            (host, port), FileEditorServer, workers=workers, queue_size=queue_size
+        )
         print(f"🌐 xsl Server v{__version__} starting on {host}:{port}")
+        print(f"🧵 {server.workers} workers, queue depth {server.queue_size}")
         print(f"📖 Open http://{host}:{port} in your browser")
         print("🔗 API endpoints:")
         print(f"   GET  http://{host}:{port}/api/extract?url=<URL>&xpath=<XPATH>")
+        print(f"   POST http://{host}:{port}/api/extract_batch")
         print(f"   POST http://{host}:{port}/api/load")
         print(f"   POST http://{host}:{port}/api/query")
         print(f"   POST http://{host}:{port}/api/update")
         print(f"   POST http://{host}:{port}/api/save")
+        print(f"   GET  http://{host}:{port}/api/document?session_id=<ID>")
+        print(f"   GET  http://{host}:{port}/api/sessions")
         print("\n⏹️  Press Ctrl+C to stop the server")
         print("-" * 60)
 
         server.serve_forever()
     except KeyboardInterrupt:
+        server.server_close()
         print("\n\n👋 Server stopped by user")
     except Exception as e:
         print(f"❌ Server error: {e}")
@@ -147,13 +730,51 @@ def main(args: list = None) -> int:
         default=8082,
         help="Port to listen on (default: 8082)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker threads (default: CPU count + 4, max 32)",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=64,
+        help="Requests allowed to wait for a free worker (default: 64)",
+    )
+    parser.add_argument(
+        "--max-sessions",
+        type=int,
+        default=100,
+        help="Maximum number of loaded documents (default: 100)",
+    )
+    parser.add_argument(
+        "--session-ttl",
+        type=float,
+        default=3600.0,
+        help="Seconds an idle document stays loaded (default: 3600)",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        default=512,
+        help="Memory budget for parsed documents in MB (default: 512)",
+    )
     args = parser.parse_args(args)
 
     print(f"Starting xsl server on http://{args.host}:{args.port}")
     print("Press Ctrl+C to stop")
 
     try:
-        start_server(host=args.host, port=args.port)
+        start_server(
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            queue_size=args.queue_size,
+            max_sessions=args.max_sessions,
+            session_ttl=args.session_ttl,
+            memory_budget=args.memory_budget * 1024 * 1024,
+        )
         return 0
     except KeyboardInterrupt:
         print("\nServer stopped")
@@ -0,0 +1,213 @@
+"""
+Byte-level splicing of edits into the source of a parsed document.
+
+FileEditor identifies the elements it changed by their path in the source:
+the index of each element among its parent's child nodes (elements,
+comments and processing instructions), from the root down.
+locate_elements() finds those elements in the original bytes with a
+lightweight markup scanner, and write_spliced() copies the source to a
+stream with only the changed byte ranges replaced, so everything else
+keeps its exact formatting.
+"""
+
+import re
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Tuple
+
+# One markup construct; the bytes between two matches are character data.
+# The final alternative catches a '<' that starts nothing well-formed.
+MARKUP_PATTERN = re.compile(
+    rb'(?P<comment><!--.*?-->)'
+    rb'|(?P<cdata><!\[CDATA\[.*?\]\]>)'
+    rb'|(?P<pi><\?.*?\?>)'
+    rb'|(?P<doctype><!DOCTYPE(?:[^\[>]|\[.*?\])*>)'
+    rb'|(?P<end></[^>]*>)'
+    rb'|(?P<start><(?P<name>[^\s/>!?]+)'
+    rb'(?:\s+[^\s=/>]+\s*=\s*(?:"[^"]*"|\'[^\']*\'))*\s*/?>)'
+    rb'|(?P<invalid><)',
+    re.DOTALL
+)
+
+# Namespace declarations inside a start tag
+XMLNS_PATTERN = re.compile(
+    rb'\s(?P<decl>xmlns(?::(?P<prefix>[^\s=]+))?\s*=\s*'
+    rb'(?:"(?P<dq>[^"]*)"|\'(?P<sq>[^\']*)\'))'
+)
+
+# Bytes copied per write when streaming unchanged regions
+SPLICE_CHUNK_SIZE = 1024 * 1024
+
+
+class SpliceError(ValueError):
+    """The source cannot be spliced; callers re-serialize the whole tree."""
+
+
+def locate_elements(source, paths: Iterable[Tuple[int, ...]]) -> Dict[Tuple[int, ...], Dict[str, Any]]:
+    """Find elements in the source bytes of a document.
+
+    Scanning stops as soon as every requested element has been located.
+
+    Args:
+        source: Document bytes (bytes, mmap or any buffer)
+        paths: Child-index paths of the elements to find; ``()`` is the root
+
+    Returns:
+        dict: Each path mapped to byte offsets: 'start' and 'start_end' of
+            the start tag, 'text_end' (end of the leading text),
+            'end_tag_start' (None for an empty-element tag), 'end' of the
+            element and 'tail_end' (end of the text after it), plus the raw
+            'name' and whether the tag is 'empty' (``<tag/>``)
+
+    Raises:
+        SpliceError: If the source is not plain well-formed markup (e.g. it
+            declares entities) or an element cannot be found
+    """
+    wanted = set(paths)
+    found: Dict[Tuple[int, ...], Dict[str, Any]] = {}
+    # Open elements as [path, child nodes seen so far, location if wanted]
+    stack: List[list] = []
+    open_wanted = 0
+    root_seen = False
+    # Locations whose leading text or tail ends at the next markup
+    awaiting_text = None
+    awaiting_tail = None
+
+    for match in MARKUP_PATTERN.finditer(source):
+        kind = match.lastgroup
+        if kind == 'cdata':
+            continue
+        if awaiting_text is not None:
+            awaiting_text['text_end'] = match.start()
+            awaiting_text = None
+        if awaiting_tail is not None:
+            awaiting_tail['tail_end'] = match.start()
+            awaiting_tail = None
+        if len(found) == len(wanted) and not open_wanted:
+            break
+
+        if kind == 'start':
+            if stack:
+                parent = stack[-1]
+                path = parent[0] + (parent[1],)
+                parent[1] += 1
+            elif root_seen:
+                raise SpliceError("Element after the root element")
+            else:
+                path = ()
+                root_seen = True
+            empty = source[match.end() - 2:match.end()] == b'/>'
+            location = None
+            if path in wanted:
+                location = {
+                    'name': match.group('name'),
+                    'empty': empty,
+                    'start': match.start(),
+                    'start_end': match.end(),
+                }
+                found[path] = location
+            if empty:
+                if location is not None:
+                    location.update(text_end=match.end(), end_tag_start=None, end=match.end())
+                    if stack:
+                        awaiting_tail = location
+                    else:
+                        location['tail_end'] = match.end()
+            else:
+                stack.append([path, 0, location])
+                if location is not None:
+                    open_wanted += 1
+                    awaiting_text = location
+        elif kind == 'end':
+            if not stack:
+                raise SpliceError("Unbalanced end tag")
+            _, _, location = stack.pop()
+            if location is not None:
+                open_wanted -= 1
+                location.update(end_tag_start=match.start(), end=match.end())
+                if stack:
+                    awaiting_tail = location
+                else:
+                    location['tail_end'] = match.end()
+        elif kind in ('comment', 'pi'):
+            if stack:
+                stack[-1][1] += 1
+        elif kind == 'doctype':
+            if re.search(rb'<!ENTITY', source[match.start():match.end()]):
+                raise SpliceError("Document declares entities")
+        else:
+            raise SpliceError(f"Unrecognized markup at byte {match.start()}")
+
+    missing = wanted.difference(found)
+    if missing:
+        raise SpliceError(f"Element not found in source: {sorted(missing)[0]}")
+    return found
+
+
+def write_spliced(source, edits: List[Tuple[int, int, bytes]], stream: BinaryIO,
+                  chunk_size: int = SPLICE_CHUNK_SIZE) -> int:
+    """Copy the source to a stream, replacing byte ranges.
+
+    Args:
+        source: Document bytes (bytes, mmap or any buffer)
+        edits: Sorted, non-overlapping (start, end, replacement) ranges;
+            ``start == end`` inserts
+        stream: Writable binary stream
+        chunk_size: Bytes copied per write for unchanged regions
+
+    Returns:
+        int: Number of bytes written
+    """
+    written = 0
+    with memoryview(source) as view:
+        position = 0
+        for start, end, replacement in edits + [(len(view), len(view), b'')]:
+            for offset in range(position, start, chunk_size):
+                with view[offset:min(offset + chunk_size, start)] as chunk:
+                    stream.write(chunk)
+                    written += len(chunk)
+            stream.write(replacement)
+            written += len(replacement)
+            position = end
+    return written
+
+
+def drop_inherited_declarations(fragment: bytes, in_scope: Dict[Optional[str], str],
+                                encoding: str) -> bytes:
+    """Remove declarations repeating in-scope namespaces from a fragment's first tag.
+
+    Serializing a subtree on its own declares every namespace in scope on
+    its root element; inserted back into the document most of those are
+    redundant.
+
+    Args:
+        fragment: Serialized element
+        in_scope: Prefix to URI mapping in scope where it is inserted
+        encoding: Encoding of the fragment
+
+    Returns:
+        bytes: The fragment without the redundant declarations
+    """
+    match = MARKUP_PATTERN.match(fragment)
+    if match is None or match.lastgroup != 'start':
+        return fragment
+
+    def drop(decl):
+        prefix = decl.group('prefix')
+        prefix = prefix.decode(encoding) if prefix else None
+        uri = decl.group('dq') if decl.group('dq') is not None else decl.group('sq')
+        if prefix in in_scope and in_scope[prefix] == uri.decode(encoding):
+            return b''
+        return decl.group(0)
+
+    return XMLNS_PATTERN.sub(drop, fragment[:match.end()]) + fragment[match.end():]
+
+
+def escape_text(text: str) -> str:
+    """Escape character data for use between tags."""
+    return (text.replace('&', '&amp;').replace('<', '&lt;')
+            .replace('>', '&gt;').replace('\r', '&#13;'))
+
+
+def escape_attribute(value: str) -> str:
+    """Escape an attribute value for use inside double quotes."""
+    return (escape_text(value).replace('"', '&quot;')
+            .replace('\t', '&#9;').replace('\n', '&#10;'))
@@ -5,11 +5,19 @@ This module provides various utility functions used throughout the xsl package.
 """
 
 import base64
+import binascii
+import hashlib
+import mimetypes
+import os
 import re
+import shutil
 import urllib.parse
-from typing import Any, Dict, Optional, Tuple
+import uuid
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Callable, Dict, Iterator, Optional, Tuple, Union
 
-# Regular expression for matching data URIs
+# Regular expression for matching whole data URIs; prefer
+# parse_data_uri_header(), which never scans the payload
 DATA_URI_PATTERN = re.compile(
     r'^data:(?P<mime>[a-z]+/[a-z0-9\-+.]+)?'
     r'(?P<charset>;charset=[a-z0-9\-]+)?'
@@ -18,16 +26,88 @@ DATA_URI_PATTERN = re.compile(
     re.IGNORECASE
 )
 
+# The part of a data URI before the first comma
+_DATA_URI_HEADER = (
+    r'data:(?P<mime>[a-z]+/[a-z0-9\-+.]+)?'
+    r'(?P<charset>;charset=[a-z0-9\-]+)?'
+    r'(?P<base64>;base64)?'
+)
+DATA_URI_HEADER_PATTERN = re.compile(_DATA_URI_HEADER, re.IGNORECASE)
+_DATA_URI_HEADER_PATTERN_BYTES = re.compile(_DATA_URI_HEADER.encode('ascii'), re.IGNORECASE)
+
+# Headers longer than this are not considered, so the comma search never
+# walks into a large payload
+MAX_DATA_URI_HEADER = 256
+
+# A complete base64 payload: alphabet characters followed by optional padding
+BASE64_PATTERN = re.compile(r'[A-Za-z0-9+/]*={0,2}')
+
+# CSS url(...) references holding a data URI, e.g. in style attributes
+CSS_DATA_URL_PATTERN = re.compile(
+    r'url\(\s*([\'"]?)(?P<uri>data:[^\'")]*)\1\s*\)',
+    re.IGNORECASE
+)
+
+# Characters of payload decoded per step when streaming; a multiple of 4 so
+# every chunk boundary falls on a base64 quantum
+DATA_URI_CHUNK_SIZE = 64 * 1024
+
+
+def parse_data_uri_header(uri: Union[str, bytes]) -> Optional[Dict[str, Any]]:
+    """Parse only the header of a data URI, up to the first comma.
+
+    The cost is bounded by the header length, never the payload. The
+    payload is not copied: it starts at ``data_offset``, and for bytes
+    input a zero-copy ``memoryview`` of it is returned as ``payload``.
+
+    Args:
+        uri: The string or bytes to check
+
+    Returns:
+        dict: 'mime_type', 'mime', 'charset', 'is_base64', 'encoding',
+            'data_offset' and (bytes input only) 'payload', or None if the
+            input does not start with a data URI header
+    """
+    is_bytes = isinstance(uri, (bytes, bytearray))
+    comma = uri.find(b',' if is_bytes else ',', 0, MAX_DATA_URI_HEADER)
+    if comma < 0:
+        return None
+    pattern = _DATA_URI_HEADER_PATTERN_BYTES if is_bytes else DATA_URI_HEADER_PATTERN
+    match = pattern.fullmatch(uri, 0, comma)
+    if not match:
+        return None
+
+    groups = {
+        name: value.decode('ascii') if is_bytes and value is not None else value
+        for name, value in match.groupdict().items()
+    }
+    mime = groups['mime'] or 'text/plain'
+    is_base64 = bool(groups['base64'])
+    header = {
+        'mime_type': mime,
+        'mime': mime,
+        'charset': groups['charset'].split('=', 1)[1] if groups['charset'] else 'utf-8',
+        'is_base64': is_base64,
+        'encoding': 'base64' if is_base64 else 'utf-8',
+        'data_offset': comma + 1,
+    }
+    if is_bytes:
+        header['payload'] = memoryview(uri)[comma + 1:]
+    return header
+
 def is_data_uri(uri: str) -> bool:
     """Check if a string is a valid data URI.
     
+    Only the header is inspected, so the cost does not depend on the
+    payload size.
+
     Args:
         uri: The string to check
         
     Returns:
         bool: True if the string is a valid data URI, False otherwise
     """
-    return bool(DATA_URI_PATTERN.match(uri))
+    return parse_data_uri_header(uri) is not None
 
 def parse_data_uri(uri: str) -> Dict[str, Any]:
     """Parse a data URI into its components.
@@ -45,27 +125,21 @@ def parse_data_uri(uri: str) -> Dict[str, Any]:
     Raises:
         ValueError: If the input is not a valid data URI
     """
-    match = DATA_URI_PATTERN.match(uri)
-    if not match:
+    header = parse_data_uri_header(uri)
+    if header is None:
         raise ValueError("Invalid data URI")
         
-    mime = match.group('mime') or 'text/plain'
-    charset = None
-    if match.group('charset'):
-        # Extract just the charset value without the 'charset=' prefix
-        charset_match = re.search(r'charset=([^;]+)', match.group('charset'))
-        if charset_match:
-            charset = charset_match.group(1)
-    is_base64 = bool(match.group('base64'))
-    data = match.group('data')
+    mime = header['mime_type']
+    charset = header['charset']
+    is_base64 = header['is_base64']
+    offset = header['data_offset']
     
-    # Convert data to bytes
-    if is_base64:
-        try:
-            data_bytes = base64.b64decode(data, validate=True)
-        except Exception as e:
-            raise ValueError(f"Invalid base64 data: {e}")
-    else:
+    # Validate base64 in place without materializing the decoded bytes
+    if is_base64 and ((len(uri) - offset) % 4
+                      or not BASE64_PATTERN.fullmatch(uri, offset)):
+        raise ValueError("Invalid base64 data: malformed payload or padding")
+    data = uri[offset:]
+    if not is_base64:
         data_bytes = data.encode('utf-8')
     
     # For base64 data, return the original base64 string
@@ -104,3 +178,228 @@ def create_data_uri(data: bytes, mime: str = 'application/octet-stream',
         # For text data, we can include it directly
         text = data.decode(charset)
         return f"data:{mime};charset={charset},{urllib.parse.quote(text)}"
+
+
+def decode_data_uri(uri: str, stream: BinaryIO,
+                    chunk_size: int = DATA_URI_CHUNK_SIZE) -> Dict[str, Any]:
+    """Decode a data URI payload into a writable binary stream.
+
+    The payload is decoded in fixed-size chunks, each validated as it is
+    decoded, so neither a full decoded copy nor a separate validation pass
+    is needed.
+
+    Args:
+        uri: The data URI to decode
+        stream: Writable binary stream receiving the decoded bytes
+        chunk_size: Payload characters decoded per step (rounded down to a
+            multiple of 4)
+
+    Returns:
+        dict: 'mime_type', 'charset', 'is_base64' and 'size' (bytes written)
+
+    Raises:
+        ValueError: If the input is not a valid data URI
+    """
+    header = parse_data_uri_header(uri)
+    if header is None:
+        raise ValueError("Invalid data URI")
+    is_base64 = header['is_base64']
+
+    chunk_size = max(4, chunk_size - chunk_size % 4)
+    size = 0
+    start = header['data_offset']
+    end_of_data = len(uri)
+    while start < end_of_data:
+        end = min(start + chunk_size, end_of_data)
+        chunk = uri[start:end]
+        if is_base64:
+            if end < end_of_data and '=' in chunk:
+                raise ValueError("Invalid base64 data: padding before end of data")
+            try:
+                decoded = base64.b64decode(chunk, validate=True)
+            except (binascii.Error, ValueError) as e:
+                raise ValueError(f"Invalid base64 data: {e}")
+        else:
+            # Never split a %XX escape across two chunks
+            escape = chunk.rfind('%', max(0, len(chunk) - 2))
+            if escape >= 0 and end < end_of_data:
+                chunk = chunk[:escape]
+                end = start + escape
+            decoded = urllib.parse.unquote_to_bytes(chunk)
+        stream.write(decoded)
+        size += len(decoded)
+        start = end
+
+    return {
+        'mime_type': header['mime_type'],
+        'charset': header['charset'],
+        'is_base64': is_base64,
+        'size': size,
+    }
+
+
+class HashingWriter:
+    """Binary stream wrapper that computes a SHA-256 digest of what it writes."""
+
+    def __init__(self, stream: BinaryIO):
+        """Wrap a writable binary stream.
+
+        Args:
+            stream: Stream receiving the data
+        """
+        self.stream = stream
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        """Hash and forward a block of data."""
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.stream.write(data)
+
+    def hexdigest(self) -> str:
+        """Get the SHA-256 digest of everything written so far."""
+        return self.sha256.hexdigest()
+
+
+def extension_for_mime(mime: str) -> str:
+    """Get a file extension for a MIME type.
+
+    Args:
+        mime: The MIME type
+
+    Returns:
+        str: Extension including the dot, '.bin' if unknown
+    """
+    if mime == 'image/svg+xml':
+        return '.svg'
+    return mimetypes.guess_extension(mime) or '.bin'
+
+
+def decode_data_uri_content_addressed(uri: str, directory: str,
+                                      path_for_digest: Callable[[str], str]) -> Dict[str, Any]:
+    """Decode a data URI into a file named after its SHA-256 digest.
+
+    The payload is streamed into a temporary file in ``directory`` while
+    being hashed, then renamed to ``path_for_digest(digest)``. If that file
+    already exists the temporary file is discarded, so identical content
+    is stored once.
+
+    Args:
+        uri: The data URI to decode
+        directory: Directory for the temporary file (same filesystem as
+            the final path)
+        path_for_digest: Maps the hex digest to the final file path
+
+    Returns:
+        dict: 'mime_type', 'charset', 'is_base64', 'size', 'sha256' and 'path'
+
+    Raises:
+        ValueError: If the input is not a valid data URI
+    """
+    fd, temp_path = _create_temp_file(directory, '.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            writer = HashingWriter(f)
+            result = decode_data_uri(uri, writer)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+    digest = writer.hexdigest()
+    final_path = path_for_digest(digest)
+    if os.path.exists(final_path):
+        os.unlink(temp_path)
+    else:
+        os.makedirs(os.path.dirname(final_path) or '.', exist_ok=True)
+        os.replace(temp_path, final_path)
+    result.update(sha256=digest, path=final_path)
+    return result
+
+
+@contextmanager
+def atomic_write(path: str) -> Iterator[BinaryIO]:
+    """Write a file so that readers see either its old or its new content.
+
+    Yields a temporary file in the same directory. When the block exits
+    normally the data is flushed and fsynced, the file gets the mode of
+    the file it replaces, and it is renamed over ``path``; the directory is
+    then fsynced so the rename survives a crash. If the block raises, the
+    temporary file is removed and ``path`` is left untouched. A symbolic
+    link is written through: its target is replaced, not the link.
+
+    Args:
+        path: File to create or replace
+
+    Yields:
+        BinaryIO: Stream to write the new content to
+    """
+    path = os.path.realpath(path)
+    directory = os.path.dirname(path)
+    fd, temp_path = _create_temp_file(directory, '.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    _fsync_directory(directory)
+
+
+def _create_temp_file(directory: str, suffix: str) -> Tuple[int, str]:
+    """Create a new file with the permissions of any new file.
+
+    Unlike tempfile.mkstemp(), which makes the file private, the mode is
+    0o666 less the process umask, as applied by the kernel.
+
+    Returns:
+        tuple: (file descriptor open for writing, file path)
+    """
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, 'O_BINARY', 0)
+    while True:
+        temp_path = os.path.join(directory, f".xsl-{uuid.uuid4().hex}{suffix}")
+        try:
+            return os.open(temp_path, flags, 0o666), temp_path
+        except FileExistsError:
+            continue
+
+
+def _fsync_directory(directory: str):
+    """Persist renames in a directory, where the platform supports it."""
+    if os.name != 'posix':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def snapshot_file(path: str, snapshot_path: str) -> str:
+    """Preserve the current content of a file under another name.
+
+    The snapshot is a hard link, so it costs no copying. That is only a
+    snapshot because files are saved with atomic_write(), which replaces
+    the file instead of modifying it in place. Filesystems without hard
+    links get a copy.
+
+    Args:
+        path: File to preserve
+        snapshot_path: Name of the snapshot; an existing file is replaced
+
+    Returns:
+        str: snapshot_path
+    """
+    temp_path = f"{snapshot_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.link(path, temp_path)
+    except OSError:
+        shutil.copy2(path, temp_path)
+    os.replace(temp_path, snapshot_path)
+    return snapshot_path